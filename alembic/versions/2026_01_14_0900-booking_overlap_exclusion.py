@@ -0,0 +1,36 @@
+"""add booking overlap exclusion constraint
+
+Revision ID: booking_overlap_exclusion
+Revises: add_status_fields
+Create Date: 2026-01-14 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = 'booking_overlap_exclusion'
+down_revision: Union[str, None] = 'add_status_fields'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # btree_gist lets the GiST index handle the plain equality on room_id
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        """
+        ALTER TABLE bookings
+        ADD CONSTRAINT bookings_no_overlap
+        EXCLUDE USING gist (
+            room_id WITH =,
+            tstzrange(start_time, end_time) WITH &&
+        )
+        WHERE (status <> 'cancelled')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE bookings DROP CONSTRAINT IF EXISTS bookings_no_overlap")
@@ -0,0 +1,37 @@
+"""add keyset pagination indexes
+
+Revision ID: keyset_pagination_indexes
+Revises: booking_overlap_exclusion
+Create Date: 2026-01-15 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = 'keyset_pagination_indexes'
+down_revision: Union[str, None] = 'booking_overlap_exclusion'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    ('ix_rooms_name_id', 'rooms', ['name', 'id']),
+    ('ix_bookings_created_at_id', 'bookings', ['created_at', 'id']),
+    ('ix_bookings_user_id_created_at_id', 'bookings', ['user_id', 'created_at', 'id']),
+    ('ix_users_created_at_id', 'users', ['created_at', 'id']),
+)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside the migration transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,38 @@
+"""add room availability indexes
+
+Revision ID: room_availability_indexes
+Revises: keyset_pagination_indexes
+Create Date: 2026-01-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'room_availability_indexes'
+down_revision: Union[str, None] = 'keyset_pagination_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The per-room overlap probe itself is served by the bookings_no_overlap GiST index
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_rooms_status_capacity', 'rooms', ['status', 'capacity'], postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_bookings_room_id_start_time',
+            'bookings',
+            ['room_id', 'start_time'],
+            postgresql_where=sa.text("status <> 'cancelled'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_bookings_room_id_start_time', table_name='bookings', postgresql_concurrently=True)
+        op.drop_index('ix_rooms_status_capacity', table_name='rooms', postgresql_concurrently=True)
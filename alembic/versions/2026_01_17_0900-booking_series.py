@@ -0,0 +1,59 @@
+"""add booking series
+
+Revision ID: booking_series
+Revises: room_availability_indexes
+Create Date: 2026-01-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = 'booking_series'
+down_revision: Union[str, None] = 'room_availability_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    frequency_enum = sa.Enum('daily', 'weekly', 'monthly', name='frequency')
+    frequency_enum.create(op.get_bind(), checkfirst=True)
+
+    op.create_table('booking_series',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('room_id', sa.UUID(), nullable=False),
+    sa.Column('start_time', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('end_time', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('frequency', postgresql.ENUM(name='frequency', create_type=False), nullable=False),
+    sa.Column('interval', sa.Integer(), nullable=False, server_default='1'),
+    sa.Column('time_zone', sa.String(length=64), nullable=False, server_default='UTC'),
+    sa.Column('until', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('count', sa.Integer(), nullable=True),
+    sa.Column('ends_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column(
+        'status', postgresql.ENUM(name='bookingstatus', create_type=False), nullable=False, server_default='scheduled'
+    ),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id')
+    )
+    op.create_index('ix_booking_series_created_at_id', 'booking_series', ['created_at', 'id'])
+    op.create_index(
+        'ix_booking_series_room_id_start_time_ends_at',
+        'booking_series',
+        ['room_id', 'start_time', 'ends_at'],
+        postgresql_where=sa.text("status <> 'cancelled'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_booking_series_room_id_start_time_ends_at', table_name='booking_series')
+    op.drop_index('ix_booking_series_created_at_id', table_name='booking_series')
+    op.drop_table('booking_series')
+    sa.Enum(name='frequency').drop(op.get_bind(), checkfirst=True)
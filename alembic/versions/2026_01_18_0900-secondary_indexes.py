@@ -0,0 +1,41 @@
+"""add secondary indexes
+
+Revision ID: secondary_indexes
+Revises: booking_series
+Create Date: 2026-01-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'secondary_indexes'
+down_revision: Union[str, None] = 'booking_series'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fails on duplicate emails differing only by case, merge those accounts first
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_lower_email', 'users', [sa.text('lower(email)')], unique=True, postgresql_concurrently=True
+        )
+        op.create_index('ix_bookings_room_id', 'bookings', ['room_id'], postgresql_concurrently=True)
+        op.create_index(
+            'ix_booking_series_user_id_created_at_id',
+            'booking_series',
+            ['user_id', 'created_at', 'id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_booking_series_user_id_created_at_id', table_name='booking_series', postgresql_concurrently=True
+        )
+        op.drop_index('ix_bookings_room_id', table_name='bookings', postgresql_concurrently=True)
+        op.drop_index('ix_users_lower_email', table_name='users', postgresql_concurrently=True)
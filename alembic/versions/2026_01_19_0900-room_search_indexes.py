@@ -0,0 +1,46 @@
+"""add room search indexes
+
+Revision ID: room_search_indexes
+Revises: secondary_indexes
+Create Date: 2026-01-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = 'room_search_indexes'
+down_revision: Union[str, None] = 'secondary_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Trigram GIN indexes serve ILIKE '%...%', ILIKE '...%' and the %> word similarity operator
+TRIGRAM_INDEXES = {
+    'ix_rooms_name_trgm': 'name',
+    'ix_rooms_description_trgm': 'description',
+    'ix_rooms_address_trgm': 'address',
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for index_name, column in TRIGRAM_INDEXES.items():
+            op.create_index(
+                index_name,
+                'rooms',
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+        # Keyset of the listing sorted by capacity
+        op.create_index('ix_rooms_capacity_id', 'rooms', ['capacity', 'id'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_rooms_capacity_id', table_name='rooms', postgresql_concurrently=True)
+        for index_name in TRIGRAM_INDEXES:
+            op.drop_index(index_name, table_name='rooms', postgresql_concurrently=True)
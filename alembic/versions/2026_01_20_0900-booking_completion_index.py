@@ -0,0 +1,34 @@
+"""add the index of the booking completion
+
+Revision ID: booking_completion_index
+Revises: room_search_indexes
+Create Date: 2026-01-20 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'booking_completion_index'
+down_revision: Union[str, None] = 'room_search_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Only the scheduled bookings, the completed ones leave the index
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_bookings_scheduled_end_time',
+            'bookings',
+            ['end_time'],
+            postgresql_where=sa.text("status = 'scheduled'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_bookings_scheduled_end_time', table_name='bookings', postgresql_concurrently=True)
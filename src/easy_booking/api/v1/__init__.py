@@ -2,6 +2,7 @@ from fastapi import APIRouter
 
 from easy_booking.api.v1.room import router as RoomRouter
 from easy_booking.api.v1.booking import router as BookingRouter
+from easy_booking.api.v1.booking_series import router as BookingSeriesRouter
 from easy_booking.api.v1.auth import router as AuthRouter
 from easy_booking.api.v1.user import router as UserRouter
 
@@ -9,6 +10,7 @@ __all__ = (
     AuthRouter,
     RoomRouter,
     BookingRouter,
+    BookingSeriesRouter,
     UserRouter,
 )
 
@@ -5,6 +5,7 @@ from fastapi_users import FastAPIUsers
 
 from easy_booking.auth.auth import auth_backend
 from easy_booking.dependencies import get_user_service
+from easy_booking.metrics import TimedRoute
 from easy_booking.models.user import User
 from easy_booking.schemas.user import UserCreate, UserRead
 
@@ -12,7 +13,7 @@ fastapi_users = FastAPIUsers[User, UUID](
     get_user_service,
     [auth_backend],
 )
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], route_class=TimedRoute)
 
 router.include_router(
     fastapi_users.get_auth_router(auth_backend),
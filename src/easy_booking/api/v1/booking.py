@@ -1,35 +1,127 @@
+from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from easy_booking.api.v1.auth import fastapi_users
-from easy_booking.db import get_session
+from easy_booking.db import get_read_session, get_session
+from easy_booking.metrics import TimedRoute
 from easy_booking.models.user import User
 from easy_booking.schemas.booking import (
+    BookingBulkIn,
+    BookingBulkOut,
     BookingIn,
     BookingOut,
-    BookingPatch
+    BookingPatch,
+    BookingStatus,
 )
-from easy_booking.schemas.page import Page
+from easy_booking.schemas.booking_series import Occurrence
+from easy_booking.schemas.page import ExportFormat, Page, TotalMode
 from easy_booking.services.booking import BookingService
+from easy_booking.streams import event_stream_response
 
-router = APIRouter(prefix="/booking", tags=["Booking"])
+router = APIRouter(prefix="/booking", tags=["Booking"], route_class=TimedRoute)
 
 current_active_user = fastapi_users.current_user(active=True)
 
+
+def _split(value: str | None) -> list[str] | None:
+    return None if value is None else [name.strip() for name in value.split(",") if name.strip()]
+
+
+def _view_response(view: BaseModel) -> Response:
+    # Sparse views aren't instances of the response_model, they are validated already and dumped as is
+    return Response(content=view.model_dump_json(), media_type="application/json")
+
+
 @router.get("/", response_model=Page[BookingOut])
 async def list_booking(
     offset:int=0,
     limit:int=10,
-    session:AsyncSession = Depends(get_session),
+    cursor:str | None=None,
+    with_total:bool=True,
+    total_mode:TotalMode=TotalMode.EXACT,
+    fields:str | None=None,
+    expand:str="user,room",
+    session:AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    List the bookings. `fields` keeps only the given columns, e.g. `id,start_time,end_time`,
+    and `expand` the embedded relationships among `user,room`, empty for none.
+    """
+    page = await BookingService.get_all_booking(
+        session=session,
+        offset=offset,
+        limit=limit,
+        user=user,
+        cursor=cursor,
+        total=total_mode if with_total else TotalMode.NONE,
+        fields=_split(fields),
+        expand=_split(expand),
+    )
+    return _view_response(page)
+
+@router.get("/occurrences", response_model=list[Occurrence])
+async def list_occurrences(
+    start:datetime,
+    end:datetime,
+    room_id:UUID | None=None,
+    limit:int=100,
+    session:AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Get the bookings and the occurrences of booking series overlapping [start, end), ordered by start.
+    """
+    return await BookingService.get_occurrences(start, end, session, room_id=room_id, user=user, limit=limit)
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_booking(
+    format:ExportFormat=ExportFormat.NDJSON,
+    start:datetime | None=None,
+    end:datetime | None=None,
+    room_id:UUID | None=None,
+    status:BookingStatus | None=None,
+    session:AsyncSession = Depends(get_read_session, scope="request"),
     user: User = Depends(current_active_user)
 ):
-    return await BookingService.get_all_booking(session=session, offset=offset, limit=limit, user=user)
+    """
+    Stream the bookings overlapping [start, end) as NDJSON or CSV, oldest first, in constant memory.
+    """
+    chunks = BookingService.export_bookings(
+        session, format, user=user, start_time=start, end_time=end, room_id=room_id, status=status
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="bookings.{format.value}"'},
+    )
+
+@router.get("/events", response_class=StreamingResponse)
+async def booking_events(user: User = Depends(current_active_user)):
+    """
+    Server-Sent Events of the booking changes, your own bookings unless you are a superuser.
+
+    Each `created`, `updated`, `cancelled` or `deleted` event carries the booking. A `resync`
+    event asks to refetch the bookings, e.g. after a bulk change or when the client fell too far behind.
+    """
+    return event_stream_response(BookingService.stream_changes(user=user))
 
 @router.get("/{id}", response_model=BookingOut)
-async def get_booking(id:UUID, session:AsyncSession=Depends(get_session)):
-    return await BookingService.get_by_id(id, session)
+async def get_booking(
+    id:UUID,
+    fields:str | None=None,
+    expand:str="user,room",
+    session:AsyncSession=Depends(get_read_session),
+):
+    """
+    Get a booking, `fields` and `expand` select its columns and relationships as for the listing.
+    """
+    return _view_response(await BookingService.get_by_id(id, session, fields=_split(fields), expand=_split(expand)))
 
 @router.post("/")
 async def add_booking(
@@ -39,6 +131,14 @@ async def add_booking(
 ):
     return await BookingService.add_booking(booking_data, session, user.id)
 
+@router.post("/bulk", response_model=BookingBulkOut)
+async def add_bookings(
+    bulk:BookingBulkIn,
+    session:AsyncSession=Depends(get_session),
+    user: User = Depends(current_active_user)
+):
+    return await BookingService.add_bookings(bulk, session, user.id)
+
 @router.patch("/{id}", response_model=BookingOut)
 async def update_booking(id:UUID, booking:BookingPatch, session:AsyncSession=Depends(get_session)):
     return await BookingService.update_by_id(id, booking, session)
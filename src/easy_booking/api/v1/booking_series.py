@@ -0,0 +1,61 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from easy_booking.api.v1.auth import fastapi_users
+from easy_booking.db import get_read_session, get_session
+from easy_booking.metrics import TimedRoute
+from easy_booking.models.user import User
+from easy_booking.schemas.booking_series import (
+    BookingSeriesIn,
+    BookingSeriesOut
+)
+from easy_booking.schemas.page import Page, TotalMode
+from easy_booking.services.booking_series import BookingSeriesService
+
+router = APIRouter(prefix="/series", tags=["Booking series"], route_class=TimedRoute)
+
+current_active_user = fastapi_users.current_user(active=True)
+
+@router.get("/", response_model=Page[BookingSeriesOut])
+async def list_series(
+    offset:int=0,
+    limit:int=10,
+    cursor:str | None=None,
+    with_total:bool=True,
+    total_mode:TotalMode=TotalMode.EXACT,
+    session:AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user)
+):
+    return await BookingSeriesService.get_all_series(
+        session=session,
+        offset=offset,
+        limit=limit,
+        user=user,
+        cursor=cursor,
+        total=total_mode if with_total else TotalMode.NONE,
+    )
+
+@router.get("/{id}", response_model=BookingSeriesOut)
+async def get_series(id:UUID, session:AsyncSession=Depends(get_read_session)):
+    return await BookingSeriesService.get_by_id(id, session)
+
+@router.post("/", response_model=BookingSeriesOut)
+async def add_series(
+    series_data:BookingSeriesIn,
+    session:AsyncSession=Depends(get_session),
+    user: User = Depends(current_active_user)
+):
+    """
+    Create a recurring booking:
+
+    Occurrences start every `interval` days, weeks or months from `start_time` and last
+    as long as the first one, up to `until` and/or `count` occurrences. They are not
+    stored, `GET /booking/occurrences` expands them inside a window.
+    """
+    return await BookingSeriesService.add_series(series_data, session, user.id)
+
+@router.delete("/{id}", response_model=BookingSeriesOut)
+async def delete_series(id:UUID, session:AsyncSession=Depends(get_session)):
+    return await BookingSeriesService.delete_by_id(id, session)
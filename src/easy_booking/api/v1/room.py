@@ -1,38 +1,182 @@
+from datetime import datetime, timedelta
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from fastapi_filter import FilterDepends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from easy_booking.db import get_session
+from easy_booking.api.v1.auth import fastapi_users
+from easy_booking.db import get_read_session, get_session
+from easy_booking.metrics import TimedRoute
+from easy_booking.models.user import User
+from easy_booking.schemas.booking import Slot
 from easy_booking.schemas.room import (
+    RoomFilter,
     RoomIn,
     RoomOut,
-    RoomPatch
+    RoomPatch,
+    RoomSort,
+    RoomStatus,
 )
-from easy_booking.schemas.page import Page
+from easy_booking.schemas.page import ExportFormat, ImportReport, Page, TotalMode
+from easy_booking.services.booking import BookingService
 from easy_booking.services.room import RoomService
+from easy_booking.streams import event_stream_response
+from easy_booking.utils import decode_lines, etag_matches
+
+router = APIRouter(prefix="/room", tags=["Room"], route_class=TimedRoute)
+
+current_active_user = fastapi_users.current_user(active=True)
+
+
+def conditional_response(cached: tuple[str, bytes], if_none_match: str | None) -> Response:
+    """The cached JSON body, or 304 Not Modified when the client already holds its ETag"""
+    tag, body = cached
+    # Clients may keep the body but must revalidate it on every use
+    headers = {"ETag": tag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, tag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
-router = APIRouter(prefix="/room", tags=["Room"])
 
 @router.get("/", response_model=Page[RoomOut])
 async def list_room(
     offset:int=0,
     limit:int=10,
+    cursor:str | None=None,
+    with_total:bool=True,
+    total_mode:TotalMode=TotalMode.EXACT,
+    filters:RoomFilter=FilterDepends(RoomFilter),
+    sort:RoomSort=RoomSort.NAME,
+    if_none_match:str | None=Header(default=None),
+    # The primary, a lagging replica would fill the room cache with rows older than the last write
     session:AsyncSession = Depends(get_session)
 ):
     """
     Get all room:
     
+    Pass the `next_cursor` of a page as `cursor` to get the next one, `offset` is ignored then.
+    A cursor only resumes a listing with the same `sort`.
+
+    Filter on `status`, a capacity range (`capacity__gte`, `capacity__lte`) and an `address_prefix`.
+    `search` matches the name, description or address, misspelled words included on PostgreSQL.
+
+    `total_mode` picks how `total` is computed: `exact` count query, `window` count in the
+    page query, `estimated` planner statistics. `with_total=false` skips it.
+
+    The page carries an ETag, send it back in `If-None-Match` to get a 304 while no room changed.
+
     Return : 
     
     RoomOut : Room with all it's attributes
     
     """
-    return await RoomService.get_all_room(session=session, offset=offset, limit=limit)
+    cached = await RoomService.get_all_room_json(
+        session=session,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+        total=total_mode if with_total else TotalMode.NONE,
+        filters=filters,
+        sort=sort,
+    )
+    return conditional_response(cached, if_none_match)
+
+@router.get("/available", response_model=Page[RoomOut])
+async def list_available_room(
+    start:datetime,
+    end:datetime,
+    min_capacity:int=1,
+    offset:int=0,
+    limit:int=10,
+    cursor:str | None=None,
+    with_total:bool=True,
+    total_mode:TotalMode=TotalMode.EXACT,
+    session:AsyncSession = Depends(get_read_session)
+):
+    """
+    Get the available rooms with at least `min_capacity` seats and no booking between `start` and `end`.
+    """
+    return await RoomService.get_available_rooms(
+        start,
+        end,
+        session=session,
+        min_capacity=min_capacity,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+        total=total_mode if with_total else TotalMode.NONE,
+    )
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_room(
+    format:ExportFormat=ExportFormat.NDJSON,
+    status:RoomStatus | None=None,
+    min_capacity:int | None=None,
+    session:AsyncSession = Depends(get_read_session, scope="request"),
+):
+    """
+    Stream the rooms as NDJSON or CSV, ordered by name, in constant memory.
+    """
+    return StreamingResponse(
+        RoomService.export_rooms(session, format, status=status, min_capacity=min_capacity),
+        media_type=format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="rooms.{format.value}"'},
+    )
+
+@router.post("/import", response_model=ImportReport)
+async def import_room(
+    file:UploadFile,
+    format:ExportFormat | None=None,
+    session:AsyncSession = Depends(get_session),
+):
+    """
+    Create rooms in bulk from a CSV file with a header row or from NDJSON.
+
+    `format` defaults to CSV for a `.csv` file name and NDJSON otherwise.
+    Invalid lines are skipped and reported with their line number.
+    """
+    return await RoomService.import_rooms(
+        session, decode_lines(file.file), format or ExportFormat.from_filename(file.filename)
+    )
 
 @router.get("/{id}", response_model=RoomOut)
-async def get_room(id:UUID, session:AsyncSession=Depends(get_session)):
-    return await RoomService.get_by_id(id, session)
+async def get_room(
+    id:UUID,
+    if_none_match:str | None=Header(default=None),
+    # The primary, like list_room()
+    session:AsyncSession=Depends(get_session),
+):
+    """
+    Get a room, with an ETag to send back in `If-None-Match` to get a 304 while it is unchanged.
+    """
+    return conditional_response(await RoomService.get_by_id_json(id, session), if_none_match)
+
+@router.get("/{id}/slots", response_model=list[Slot])
+async def get_room_slots(
+    id:UUID,
+    start:datetime,
+    end:datetime,
+    min_minutes:int=0,
+    session:AsyncSession = Depends(get_session)
+):
+    """
+    Get the free slots of a room between `start` and `end`, at least `min_minutes` long.
+    """
+    return await BookingService.get_free_slots(id, start, end, session, min_length=timedelta(minutes=min_minutes))
+
+@router.get("/{id}/events", response_class=StreamingResponse)
+async def room_events(
+    id:UUID,
+    session:AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    """
+    Server-Sent Events of the changes of the room bookings, see `GET /booking/events`.
+    """
+    await RoomService.get_by_id(id, session)
+    return event_stream_response(BookingService.stream_changes(user=user, room_id=id))
 
 @router.post("/")
 async def add_room(room_data:RoomIn, session:AsyncSession=Depends(get_session)):
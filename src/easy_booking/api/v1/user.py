@@ -5,16 +5,19 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from easy_booking.api.v1.auth import fastapi_users
-from easy_booking.db import get_session
+from easy_booking.cache import user_cache
+from easy_booking.db import get_read_session, get_session
 from easy_booking.dependencies import get_user_service
+from easy_booking.metrics import TimedRoute
 from easy_booking.models.user import User
-from easy_booking.schemas.page import Page
+from easy_booking.schemas.page import Page, TotalMode
 from easy_booking.schemas.user import UserCreate, UserRead
 from easy_booking.services.user import UserService
 
-router = APIRouter(prefix="/user", tags=["User"])
+router = APIRouter(prefix="/user", tags=["User"], route_class=TimedRoute)
 
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
 UserServiceDep = Annotated[UserService, Depends(get_user_service)]
 CurrentActiveUser = Annotated[User, Depends(fastapi_users.current_user(active=True))]
 CurrentSuperuser = Annotated[User, Depends(fastapi_users.current_user(active=True, superuser=True))]
@@ -29,15 +32,29 @@ async def get_current_user(user: CurrentActiveUser):
 async def get_users(
     user_service: UserServiceDep,
     _: CurrentSuperuser,
-    session: SessionDep,
+    session: ReadSessionDep,
     offset: int = 0,
     limit: int = 10,
+    cursor: str | None = None,
+    with_total: bool = True,
+    total_mode: TotalMode = TotalMode.EXACT,
 ):
-    return await user_service.get_all(offset=offset, limit=limit, session=session)
+    return await user_service.get_all(
+        offset=offset,
+        limit=limit,
+        session=session,
+        cursor=cursor,
+        total=total_mode if with_total else TotalMode.NONE,
+    )
+
+
+@router.get("/cache", response_model=dict[str, int])
+async def get_user_cache_stats(_: CurrentSuperuser):
+    return user_cache.stats()
 
 
 @router.get("/{user_id}", response_model=UserRead)
-async def get_user(user_id: UUID, session: SessionDep):
+async def get_user(user_id: UUID, session: ReadSessionDep):
     return await UserService.get_user_by_id(user_id, session)
 
 
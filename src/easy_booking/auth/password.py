@@ -0,0 +1,49 @@
+"""
+Password hashing off the event loop.
+
+argon2 and bcrypt release the GIL while hashing, so a small thread pool per
+worker is enough to keep a burst of logins from stalling the other requests.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi_users.password import PasswordHelper
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from easy_booking.settings import PasswordAlgorithm, Settings, settings
+
+
+def build_password_hash(config: Settings = settings) -> PasswordHash:
+    """
+    Hashers for the given settings, the configured algorithm first.
+
+    pwdlib hashes with the first one and reports any hash made by another
+    hasher, or with other costs, as needing an update on verification.
+    """
+    argon2 = Argon2Hasher(time_cost=config.password_argon2_time_cost, memory_cost=config.password_argon2_memory_cost)
+    bcrypt = BcryptHasher(rounds=config.password_bcrypt_rounds)
+    if config.password_hash_algorithm == PasswordAlgorithm.BCRYPT:
+        return PasswordHash((bcrypt, argon2))
+    return PasswordHash((argon2, bcrypt))
+
+
+class AsyncPasswordHelper(PasswordHelper):
+    """fastapi-users password helper with awaitable variants running in a bounded thread pool."""
+
+    def __init__(self, password_hash: PasswordHash | None = None, workers: int = settings.password_hash_workers) -> None:
+        super().__init__(password_hash or build_password_hash())
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.hash, password)
+
+    async def verify_and_update_async(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.verify_and_update, plain_password, hashed_password
+        )
+
+
+password_helper = AsyncPasswordHelper()
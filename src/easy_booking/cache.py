@@ -0,0 +1,109 @@
+"""
+In-process caches.
+
+Each uvicorn worker has its own copy, entries are dropped by the change
+events of the writes to the underlying rows, see easy_booking.events, and
+expire after their TTL otherwise.
+"""
+from collections import OrderedDict
+from collections.abc import Hashable
+from time import monotonic
+from typing import Any
+
+from easy_booking.settings import settings
+
+_MISSING = object()
+
+
+class Cache:
+    """Bounded LRU cache with an optional TTL and tag based invalidation."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float | None, Any, Hashable]] = OrderedDict()
+        self._tags: dict[Hashable, set[Hashable]] = {}
+        # Bumped on every invalidation, see generation()
+        self._epoch = 0
+        self._generations: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def generation(self, tag: Hashable = None) -> tuple[int, int]:
+        """
+        Token to read before computing a value and to pass to set().
+
+        The value is then dropped instead of stored if the tag was invalidated
+        in between, e.g. by a writer committing while the reader awaited.
+        """
+        return self._epoch, self._generations.get(tag, 0)
+
+    def set(self, key: Hashable, value: Any, tag: Hashable = None, generation: tuple[int, int] | None = None) -> None:
+        if generation is not None and generation != self.generation(tag):
+            return
+        self.invalidate(key)
+        expires_at = monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (expires_at, value, tag)
+        if tag is not None:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self.invalidate(next(iter(self._entries)))
+
+    def invalidate(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[2] is None:
+            return
+        keys = self._tags.get(entry[2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[entry[2]]
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        self._generations[tag] = self._generations.get(tag, 0) + 1
+        for key in list(self._tags.get(tag, ())):
+            self.invalidate(key)
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._generations.clear()
+        self._entries.clear()
+        self._tags.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value, _ = entry
+        if expires_at is not None and expires_at <= monotonic():
+            self.invalidate(key)
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+
+# Free slots per room, tagged with the room id
+slot_cache = Cache(maxsize=settings.slot_cache_size, ttl=settings.slot_cache_ttl)
+
+# Column values of the authenticated users, tagged with the user id
+user_cache = Cache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
+
+# Room listing pages and rooms as (ETag, JSON body), cleared by any room write
+room_cache = Cache(maxsize=settings.room_cache_size, ttl=settings.room_cache_ttl)
@@ -1,3 +1,6 @@
+import asyncio
+import time
+from pathlib import Path
 from typing import Annotated, Union
 
 import typer
@@ -6,6 +9,7 @@ from rich.padding import Padding
 from rich.panel import Panel
 
 from easy_booking.exceptions import EasyBookingCLIException
+from easy_booking.schemas.page import ExportFormat, ImportReport
 from easy_booking.settings import LogLevel, settings
 
 try:
@@ -14,6 +18,8 @@ except ImportError:
     uvicorn = None
 
 app = typer.Typer(rich_markup_mode="rich")
+import_app = typer.Typer(rich_markup_mode="rich", help="Load data in bulk from CSV or NDJSON files.")
+app.add_typer(import_app, name="import")
 
 
 @app.command()
@@ -129,5 +135,91 @@ def _run(
     )
 
 
+@app.command()
+def worker(
+    interval: Annotated[
+        float,
+        typer.Option(min=0.001, help="Seconds between two runs of the booking completion."),
+    ] = settings.booking_completion_interval,
+    batch_size: Annotated[
+        int,
+        typer.Option(min=1, help="Bookings completed per transaction."),
+    ] = settings.booking_completion_batch_size,
+    once: Annotated[
+        bool,
+        typer.Option("--once", help="Run once and exit, e.g. from cron."),
+    ] = False,
+) -> None:
+    """
+    Run the background jobs outside of the app: the completion of the ended bookings.
+
+    Set [blue]BOOKING_COMPLETION_IN_APP=false[/blue] to run them only here. Several workers can run side by side.
+    """
+    asyncio.run(_worker(interval, batch_size, once))
+
+
+async def _worker(interval: float, batch_size: int, once: bool) -> None:
+    from easy_booking.db import AsyncSessionFactory, engine
+    from easy_booking.scheduler import BookingCompleter
+
+    completer = BookingCompleter(interval=interval, batch_size=batch_size)
+    try:
+        if once:
+            completed = await completer.run_once(AsyncSessionFactory)
+            print(f"[green]{completed}[/green] bookings completed in {completer.last_duration:.1f}s")
+        else:
+            print(f"[dim]Completing the ended bookings every {interval:g}s, stop with Ctrl+C[/dim]")
+            await completer.run(AsyncSessionFactory)
+    finally:
+        await engine.dispose()
+
+
+@import_app.command("rooms")
+def import_rooms(
+    path: Annotated[
+        Path,
+        typer.Argument(
+            exists=True,
+            dir_okay=False,
+            help="CSV file with a header row ([blue]name,address,capacity,description,status[/blue]) or NDJSON file of rooms.",
+        ),
+    ],
+    format: Annotated[
+        Union[ExportFormat, None],
+        typer.Option(help="File format, guessed from the extension by default: [blue].csv[/blue] or NDJSON."),
+    ] = None,
+    chunk_size: Annotated[
+        int,
+        typer.Option(min=1, help="Rows validated and loaded per round trip."),
+    ] = settings.import_chunk_size,
+) -> None:
+    started = time.perf_counter()
+    report = asyncio.run(_import_rooms(path, format or ExportFormat.from_filename(path.name), chunk_size))
+    elapsed = time.perf_counter() - started
+    for error in report.errors:
+        print(f"[red]line {error.line}[/red]: {'; '.join(error.errors)}")
+    print(
+        f"[green]{report.imported}[/green] rooms imported in {elapsed:.1f}s "
+        f"({report.imported / elapsed:.0f} rows/s), [red]{len(report.errors)}[/red] lines rejected"
+    )
+    if report.errors:
+        raise typer.Exit(code=1)
+
+
+async def _import_rooms(path: Path, import_format: ExportFormat, chunk_size: int) -> ImportReport:
+    from easy_booking.db import AsyncSessionFactory, engine
+    from easy_booking.services.room import RoomService
+    from easy_booking.utils import decode_lines
+
+    try:
+        async with AsyncSessionFactory() as session:
+            with path.open("rb") as raw_lines:
+                return await RoomService.import_rooms(
+                    session, decode_lines(raw_lines), import_format, chunk_size=chunk_size
+                )
+    finally:
+        await engine.dispose()
+
+
 def main() -> None:
     app()
\ No newline at end of file
@@ -1,11 +1,41 @@
+import base64
+import binascii
+import json
 from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from uuid import UUID
 
+from sqlalchemy import Select, func, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from easy_booking.events import ChangeAction, ChangeEvent, publish
+from easy_booking.exceptions.page import InvalidCursor
+from easy_booking.schemas.page import TotalMode
+
 class BaseDao(ABC):
+    model = None
+    # Unique sort key of the listing, used for ORDER BY and keyset cursors
+    cursor_columns: tuple = ()
+    # Walk the sort key from the largest values down
+    cursor_descending: bool = False
+
     def __init__(self, session:AsyncSession):
         self.session = session
 
+    def publish_change(
+        self,
+        id: UUID | None = None,
+        room_id: UUID | None = None,
+        action: ChangeAction | None = None,
+        data: dict | None = None,
+    ) -> None:
+        """Queue the change event of a row of the table, or of any row when `id` is None, sent on commit"""
+        publish(
+            self.session,
+            ChangeEvent(table=self.model.__tablename__, id=id, room_id=room_id, action=action, data=data),
+        )
+
     @abstractmethod
     async def create(self, request):
         pass
@@ -20,4 +50,88 @@ class BaseDao(ABC):
 
     @abstractmethod
     async def delete_all(self):
-        pass
\ No newline at end of file
+        pass
+
+    def paginate(self, statement: Select, offset: int, limit: int, cursor: str | None = None) -> Select:
+        """Order the statement on the cursor columns and seek past the cursor, or skip `offset` rows."""
+        if self.cursor_descending:
+            statement = statement.order_by(*(column.desc() for column in self.cursor_columns)).limit(limit)
+        else:
+            statement = statement.order_by(*self.cursor_columns).limit(limit)
+        if cursor:
+            key, seek = tuple_(*self.cursor_columns), tuple_(*self.decode_cursor(cursor))
+            return statement.where(key < seek if self.cursor_descending else key > seek)
+        return statement.offset(offset)
+
+    async def paginate_with_total(
+        self,
+        statement: Select,
+        offset: int,
+        limit: int,
+        count: Callable[[], Awaitable[int]],
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+        estimable: bool = True,
+    ) -> tuple[list, int | None]:
+        """
+        Fetch a page and its total according to `total`:
+
+        - exact: separate COUNT(*) query
+        - window: count(*) OVER () in the page query, the rows before a cursor
+          are not visible to it so this falls back to exact with a cursor
+        - estimated: planner estimate from pg_class, only for unfiltered
+          listings (`estimable`) on PostgreSQL, exact otherwise
+        - none: no total
+        """
+        statement = self.paginate(statement, offset=offset, limit=limit, cursor=cursor)
+        if total == TotalMode.WINDOW and not cursor:
+            rows = (await self.session.execute(statement.add_columns(func.count().over()))).all()
+            if rows:
+                return [row[0] for row in rows], rows[0][1]
+            items = []
+        else:
+            items = (await self.session.scalars(statement)).all()
+
+        if total == TotalMode.NONE:
+            return items, None
+        if total == TotalMode.ESTIMATED and estimable:
+            estimate = await self.estimate_count()
+            if estimate is not None:
+                return items, estimate
+        return items, await count()
+
+    async def estimate_count(self) -> int | None:
+        """Row count of the table as estimated by the last ANALYZE, None when unknown."""
+        if self.session.get_bind().dialect.name != "postgresql":
+            return None
+        statement = text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table_name AS regclass)")
+        estimate = await self.session.scalar(statement, {"table_name": self.model.__tablename__})
+        # reltuples is -1 until the table has been vacuumed or analyzed
+        if estimate is None or estimate < 0:
+            return None
+        return estimate
+
+    def encode_cursor(self, row) -> str:
+        values = [getattr(row, column.key) for column in self.cursor_columns]
+        payload = json.dumps([value.isoformat() if isinstance(value, datetime) else str(value) for value in values])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> tuple:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.cursor_columns):
+                raise ValueError(cursor)
+            return tuple(
+                _parse_cursor_value(column.type.python_type, value)
+                for column, value in zip(self.cursor_columns, values)
+            )
+        except (binascii.Error, TypeError, ValueError) as err:
+            raise InvalidCursor from err
+
+
+def _parse_cursor_value(python_type: type, value: str):
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is UUID:
+        return UUID(value)
+    return python_type(value)
@@ -1,57 +1,319 @@
+from collections.abc import AsyncIterator, Iterable, Sequence
 from datetime import datetime
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import delete, func, select
+from sqlalchemy import Row, and_, delete, func, insert, literal, or_, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, load_only, selectinload
 
 from easy_booking.daos.base import BaseDao
+from easy_booking.daos.booking_series import BookingSeriesDao
+from easy_booking.events import ChangeAction
 from easy_booking.exceptions.booking import BookingLinkedToAnotherObject
-from easy_booking.exceptions.booking import BookingLinkedToAnotherObject
+from easy_booking.exceptions.room import ALREADYBOOKED, RoomUnavailable
 from easy_booking.models.booking import Booking, BookingStatus
+from easy_booking.schemas.booking import BOOKING_EXPANDS
+from easy_booking.schemas.page import TotalMode
+from easy_booking.utils import as_utc
+
+OVERLAP_CONSTRAINT = "bookings_no_overlap"
+EXCLUSION_VIOLATION = "23P01"
+# Columns sent with the booking change events, streamed to the dashboards
+CHANGE_COLUMNS = ("room_id", "user_id", "start_time", "end_time", "status")
+
+
+def is_overlap_violation(error: IntegrityError) -> bool:
+    """Tell whether an IntegrityError comes from the bookings_no_overlap exclusion constraint."""
+    orig = error.orig
+    return getattr(orig, "sqlstate", None) == EXCLUSION_VIOLATION or OVERLAP_CONSTRAINT in str(orig)
+
+
+def overlaps(start_time: datetime, end_time: datetime, dialect_name: str):
+    """Bookings overlapping [start_time, end_time)."""
+    if dialect_name == "postgresql":
+        # Same expression as the exclusion constraint so the GiST index is probed
+        return func.tstzrange(Booking.start_time, Booking.end_time).op("&&")(
+            func.tstzrange(start_time, end_time)
+        )
+    return and_(Booking.start_time < end_time, Booking.end_time > start_time)
+
+
+def not_cancelled():
+    # Rendered inline so the planner can match the partial indexes predicate
+    return Booking.status != literal(BookingStatus.CANCELLED, type_=Booking.status.type, literal_execute=True)
+
 
 class BookingDao(BaseDao):
+    model = Booking
+    cursor_columns = (Booking.created_at, Booking.id)
+
     def __init__(self, session:AsyncSession):
         super().__init__(session)
 
     async def create(self, booking_data: dict) -> Booking:
-        _booking = Booking(**booking_data)
-        self.session.add(_booking)
-        await self.session.commit()
-        await self.session.refresh(_booking)
-        booking_id = _booking.id
+        statement = insert(Booking).values(**booking_data).returning(Booking)
+        try:
+            _booking = await self.session.scalar(statement=statement)
+        except IntegrityError as err:
+            await self._handle_integrity_error(err)
+        # Identity is already known, the relationships come back in one joined SELECT
         statement = (
             select(Booking)
-            .where(Booking.id == booking_id)
-            .options(selectinload(Booking.user), selectinload(Booking.room))
+            .where(Booking.id == _booking.id)
+            .options(joinedload(Booking.user), joinedload(Booking.room))
         )
         _booking = await self.session.scalar(statement=statement)
+        self.publish_booking(_booking, ChangeAction.CREATED)
+        await self.commit()
         return _booking
     
-    async def get_by_id(self, booking_id: UUID) -> Booking | None:
+    async def create_many(self, bookings_data: list[dict]) -> list[Booking]:
+        """
+        Insert the bookings with a single multi-row INSERT, all or none.
+
+        Ids are generated here so the rows can be reloaded, in input order,
+        with their relationships in one joined SELECT.
+        """
+        bookings_data = [{"id": uuid4(), **booking_data} for booking_data in bookings_data]
+        try:
+            await self.session.execute(insert(Booking).values(bookings_data))
+        except IntegrityError as err:
+            await self._handle_integrity_error(err)
+        ids = [booking_data["id"] for booking_data in bookings_data]
         statement = (
             select(Booking)
-            .where(Booking.id == booking_id)
-            .options(selectinload(Booking.user), selectinload(Booking.room))
+            .where(Booking.id.in_(ids))
+            .options(joinedload(Booking.user), joinedload(Booking.room))
         )
+        by_id = {_booking.id: _booking for _booking in (await self.session.scalars(statement=statement)).unique()}
+        for booking_id in ids:
+            self.publish_booking(by_id[booking_id], ChangeAction.CREATED)
+        await self.commit()
+        return [by_id[booking_id] for booking_id in ids]
+
+    def publish_booking(self, _booking: Booking, action: ChangeAction, room_id: UUID | None = None) -> None:
+        """Queue the change event of a booking, with its CHANGE_COLUMNS, for `room_id` or its own room"""
+        self.publish_change(
+            _booking.id,
+            room_id=room_id or _booking.room_id,
+            action=action,
+            data={column: getattr(_booking, column) for column in CHANGE_COLUMNS},
+        )
+
+    def _loader_options(self, fields: Iterable[str] | None = None, expand: Iterable[str] = BOOKING_EXPANDS) -> list:
+        """
+        Load the relationships of `expand` only and, when `fields` is given,
+        only those columns plus the keys the cursor and relationships need.
+        """
+        options = [selectinload(getattr(Booking, name)) for name in expand]
+        if fields is not None:
+            columns = set(fields) | {column.key for column in self.cursor_columns} | {f"{name}_id" for name in expand}
+            options.append(load_only(*(getattr(Booking, name) for name in sorted(columns))))
+        return options
+
+    async def get_by_id(
+        self, booking_id: UUID, fields: Iterable[str] | None = None, expand: Iterable[str] = BOOKING_EXPANDS
+    ) -> Booking | None:
+        statement = select(Booking).where(Booking.id == booking_id).options(*self._loader_options(fields, expand))
         return await self.session.scalar(statement=statement)
 
-    async def get_all(self, offset:int, limit:int, user_id: UUID | None = None) -> list[Booking]:
+    def _select_all(
+        self, user_id: UUID | None = None, fields: Iterable[str] | None = None, expand: Iterable[str] = BOOKING_EXPANDS
+    ):
+        statement = select(Booking).options(*self._loader_options(fields, expand))
+        if user_id:
+            statement = statement.where(Booking.user_id == user_id)
+        return statement
+
+    async def get_all(
+        self,
+        offset:int,
+        limit:int,
+        user_id: UUID | None = None,
+        cursor: str | None = None,
+    ) -> list[Booking]:
+        statement = self.paginate(self._select_all(user_id), offset=offset, limit=limit, cursor=cursor)
+        result = await self.session.execute(statement=statement)
+        return result.scalars().all()
+
+    async def get_page(
+        self,
+        offset:int,
+        limit:int,
+        user_id: UUID | None = None,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+        fields: Iterable[str] | None = None,
+        expand: Iterable[str] = BOOKING_EXPANDS,
+    ) -> tuple[list[Booking], int | None]:
+        return await self.paginate_with_total(
+            self._select_all(user_id, fields=fields, expand=expand),
+            offset=offset,
+            limit=limit,
+            count=lambda: self.count(user_id=user_id),
+            cursor=cursor,
+            total=total,
+            estimable=user_id is None,
+        )
+    
+    async def stream(
+        self,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+        room_id: UUID | None = None,
+        status: BookingStatus | None = None,
+        user_id: UUID | None = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Bookings overlapping the window, as column rows in partitions of
+        `batch_size` read from a server-side cursor.
+
+        Rows are not ORM objects, so the session doesn't keep them and memory
+        stays flat whatever the number of exported bookings.
+        """
+        statement = (
+            select(*Booking.__table__.columns)
+            .order_by(*self.cursor_columns)
+            .execution_options(yield_per=batch_size)
+        )
+        if start_time:
+            statement = statement.where(Booking.end_time > start_time)
+        if end_time:
+            statement = statement.where(Booking.start_time < end_time)
+        if room_id:
+            statement = statement.where(Booking.room_id == room_id)
+        if status:
+            statement = statement.where(Booking.status == status)
+        if user_id:
+            statement = statement.where(Booking.user_id == user_id)
+        result = await self.session.stream(statement)
+        async for partition in result.partitions():
+            yield partition
+
+    async def get_busy_intervals(
+        self, room_id: UUID, start_time: datetime, end_time: datetime
+    ) -> list[tuple[datetime, datetime]]:
+        """
+        (start_time, end_time) of the room's bookings and series occurrences
+        overlapping the window, ordered by start.
+        """
+        statement = (
+            select(Booking.start_time, Booking.end_time)
+            .where(
+                Booking.room_id == room_id,
+                Booking.start_time < end_time,
+                Booking.end_time > start_time,
+                not_cancelled(),
+            )
+            .order_by(Booking.start_time)
+        )
+        result = await self.session.execute(statement=statement)
+        busy = [tuple(row) for row in result.all()]
+        occurrences = await BookingSeriesDao(self.session).get_busy_intervals(start_time, end_time, room_ids=(room_id,))
+        if occurrences:
+            busy = sorted(
+                [(as_utc(busy_start), as_utc(busy_end)) for busy_start, busy_end in busy] + occurrences[room_id]
+            )
+        return busy
+
+    async def get_in_window(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        room_id: UUID | None = None,
+        user_id: UUID | None = None,
+        limit: int | None = None,
+    ) -> list[Booking]:
+        """Bookings, cancelled ones aside, overlapping the window ordered by start."""
         statement = (
             select(Booking)
-            .offset(offset)
+            .where(Booking.start_time < end_time, Booking.end_time > start_time, not_cancelled())
+            .order_by(Booking.start_time, Booking.id)
             .limit(limit)
-            .options(selectinload(Booking.user), selectinload(Booking.room))
         )
+        if room_id:
+            statement = statement.where(Booking.room_id == room_id)
         if user_id:
             statement = statement.where(Booking.user_id == user_id)
-        
         result = await self.session.execute(statement=statement)
         return result.scalars().all()
-    
+
+    async def get_busy_intervals_by_room(
+        self, windows: dict[UUID, tuple[datetime, datetime]]
+    ) -> dict[UUID, list[tuple[datetime, datetime]]]:
+        """
+        Busy intervals of several rooms at once, each room bounded by its own
+        (start_time, end_time) window, with one query for the bookings and one
+        for the series.
+        """
+        busy = {room_id: [] for room_id in windows}
+        if not windows:
+            return busy
+        statement = select(Booking.room_id, Booking.start_time, Booking.end_time).where(
+            or_(
+                *(
+                    and_(Booking.room_id == room_id, Booking.start_time < end_time, Booking.end_time > start_time)
+                    for room_id, (start_time, end_time) in windows.items()
+                )
+            ),
+            not_cancelled(),
+        )
+        result = await self.session.execute(statement=statement)
+        for room_id, start_time, end_time in result.all():
+            busy[room_id].append((start_time, end_time))
+        occurrences = await BookingSeriesDao(self.session).get_busy_intervals(
+            min(start_time for start_time, _ in windows.values()),
+            max(end_time for _, end_time in windows.values()),
+            room_ids=windows,
+        )
+        for room_id, intervals in occurrences.items():
+            busy[room_id].extend(intervals)
+        return busy
+
+    async def update_by_id(self, booking_id: UUID, booking_data: dict) -> Booking | None:
+        _booking = await self.get_by_id(booking_id=booking_id)
+        if not _booking:
+            return None
+        room_ids = {_booking.room_id}
+        for key, value in booking_data.items():
+            setattr(_booking, key, value)
+        room_ids.add(_booking.room_id)
+        for room_id in room_ids:
+            self.publish_booking(_booking, ChangeAction.UPDATED, room_id=room_id)
+        await self.commit()
+        return await self.get_by_id(booking_id=booking_id)
+
+    async def complete_ended(self, limit: int, ended_before: datetime | None = None) -> int:
+        """
+        Mark up to `limit` scheduled bookings ended before `ended_before`, the
+        database clock by default, as completed in one transaction.
+
+        The rows locked by another transaction, such as the batch of another
+        node, are skipped instead of waited for (SKIP LOCKED, ignored by SQLite).
+        """
+        ended = (
+            select(Booking.id)
+            .where(Booking.status == BookingStatus.SCHEDULED, Booking.end_time < (ended_before or func.now()))
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(Booking)
+            .where(Booking.id.in_(ended))
+            .values(status=BookingStatus.COMPLETED)
+            .returning(Booking.id, *(getattr(Booking, column) for column in CHANGE_COLUMNS))
+        )
+        rows = (await self.session.execute(statement=statement)).all()
+        for row in rows:
+            self.publish_booking(row, ChangeAction.UPDATED)
+        await self.session.commit()
+        return len(rows)
+
     async def delete_all(self) -> None:
         await self.session.execute(delete(Booking))
+        self.publish_change()
         await self.session.commit()
 
     async def delete_by_id(self, booking_id:UUID) -> None:
@@ -59,6 +321,8 @@ class BookingDao(BaseDao):
         try:
             statement = delete(Booking).where(Booking.id == booking_id)
             await self.session.execute(statement=statement)
+            if _booking:
+                self.publish_booking(_booking, ChangeAction.DELETED)
             await self.session.commit()
         except IntegrityError:
             raise BookingLinkedToAnotherObject
@@ -71,12 +335,42 @@ class BookingDao(BaseDao):
         result = await self.session.execute(statement=statement)
         return result.scalar_one()
 
-    async def check_overlapping_bookings(self, room_id: UUID, start_time: datetime, end_time: datetime) -> bool:
-        statement = select(Booking).where(
-            Booking.room_id == room_id,
-            Booking.start_time < end_time,
-            Booking.end_time > start_time,
-            Booking.status != BookingStatus.CANCELLED
+    async def commit(self) -> None:
+        """
+        Commit the pending booking writes.
+
+        On PostgreSQL the bookings_no_overlap exclusion constraint is the real
+        conflict guard, its violation is turned into RoomUnavailable.
+        """
+        try:
+            await self.session.commit()
+        except IntegrityError as err:
+            await self._handle_integrity_error(err)
+
+    async def _handle_integrity_error(self, error: IntegrityError) -> None:
+        await self.session.rollback()
+        if is_overlap_violation(error):
+            raise RoomUnavailable(ALREADYBOOKED) from error
+        raise error
+
+    async def check_overlapping_bookings(
+        self,
+        room_id: UUID,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_id: UUID | None = None,
+    ) -> bool:
+        statement = (
+            select(Booking.id)
+            .where(
+                Booking.room_id == room_id,
+                overlaps(start_time, end_time, self.session.get_bind().dialect.name),
+                not_cancelled(),
+            )
+            .limit(1)
         )
-        result = await self.session.execute(statement)
-        return result.scalars().first() is not None
\ No newline at end of file
+        if exclude_id:
+            statement = statement.where(Booking.id != exclude_id)
+        if await self.session.scalar(statement=statement) is not None:
+            return True
+        return await BookingSeriesDao(self.session).has_overlapping_occurrence(room_id, start_time, end_time)
\ No newline at end of file
@@ -0,0 +1,135 @@
+from collections.abc import Iterable
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import Select, delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from easy_booking.daos.base import BaseDao
+from easy_booking.models.booking import BookingStatus
+from easy_booking.models.booking_series import BookingSeries
+from easy_booking.recurrence import occurrences
+from easy_booking.schemas.page import TotalMode
+
+
+def series_not_cancelled():
+    # Rendered inline so the planner can match the partial index predicate
+    return BookingSeries.status != literal(
+        BookingStatus.CANCELLED, type_=BookingSeries.status.type, literal_execute=True
+    )
+
+
+class BookingSeriesDao(BaseDao):
+    model = BookingSeries
+    cursor_columns = (BookingSeries.created_at, BookingSeries.id)
+
+    def __init__(self, session:AsyncSession):
+        super().__init__(session)
+
+    async def create(self, series_data: dict) -> BookingSeries:
+        statement = insert(BookingSeries).values(**series_data).returning(BookingSeries)
+        _series = await self.session.scalar(statement=statement)
+        self.publish_change(_series.id, room_id=_series.room_id)
+        await self.session.commit()
+        return _series
+
+    async def get_by_id(self, series_id: UUID) -> BookingSeries | None:
+        statement = select(BookingSeries).where(BookingSeries.id == series_id)
+        return await self.session.scalar(statement=statement)
+
+    def _select_all(self, user_id: UUID | None = None):
+        statement = select(BookingSeries)
+        if user_id:
+            statement = statement.where(BookingSeries.user_id == user_id)
+        return statement
+
+    async def get_all(
+        self,
+        offset:int,
+        limit:int,
+        user_id: UUID | None = None,
+        cursor: str | None = None,
+    ) -> list[BookingSeries]:
+        statement = self.paginate(self._select_all(user_id), offset=offset, limit=limit, cursor=cursor)
+        result = await self.session.execute(statement=statement)
+        return result.scalars().all()
+
+    async def get_page(
+        self,
+        offset:int,
+        limit:int,
+        user_id: UUID | None = None,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+    ) -> tuple[list[BookingSeries], int | None]:
+        return await self.paginate_with_total(
+            self._select_all(user_id),
+            offset=offset,
+            limit=limit,
+            count=lambda: self.count(user_id=user_id),
+            cursor=cursor,
+            total=total,
+            estimable=user_id is None,
+        )
+
+    async def get_overlapping(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        room_ids: Iterable[UUID] | Select | None = None,
+        user_id: UUID | None = None,
+    ) -> list[BookingSeries]:
+        """
+        Active series whose span [start_time, ends_at) meets the window, their occurrences may still miss it.
+
+        `room_ids` can be a SELECT of room ids, it is then applied as a subquery.
+        """
+        statement = select(BookingSeries).where(
+            BookingSeries.start_time < end_time,
+            BookingSeries.ends_at > start_time,
+            series_not_cancelled(),
+        )
+        if room_ids is not None:
+            statement = statement.where(
+                BookingSeries.room_id.in_(room_ids if isinstance(room_ids, Select) else set(room_ids))
+            )
+        if user_id:
+            statement = statement.where(BookingSeries.user_id == user_id)
+        result = await self.session.execute(statement=statement)
+        return result.scalars().all()
+
+    async def get_busy_intervals(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        room_ids: Iterable[UUID] | Select | None = None,
+    ) -> dict[UUID, list[tuple[datetime, datetime]]]:
+        """Occurrences overlapping the window grouped by room, expanded only inside the window."""
+        busy = {}
+        for _series in await self.get_overlapping(start_time, end_time, room_ids=room_ids):
+            busy.setdefault(_series.room_id, []).extend(occurrences(_series, start_time, end_time))
+        return {room_id: intervals for room_id, intervals in busy.items() if intervals}
+
+    async def has_overlapping_occurrence(self, room_id: UUID, start_time: datetime, end_time: datetime) -> bool:
+        return bool(await self.get_busy_intervals(start_time, end_time, room_ids=(room_id,)))
+
+    async def delete_all(self) -> None:
+        await self.session.execute(delete(BookingSeries))
+        self.publish_change()
+        await self.session.commit()
+
+    async def delete_by_id(self, series_id: UUID) -> BookingSeries | None:
+        _series = await self.get_by_id(series_id=series_id)
+        statement = delete(BookingSeries).where(BookingSeries.id == series_id)
+        await self.session.execute(statement=statement)
+        if _series:
+            self.publish_change(series_id, room_id=_series.room_id)
+        await self.session.commit()
+        return _series
+
+    async def count(self, user_id: UUID | None = None) -> int:
+        statement = select(func.count()).select_from(BookingSeries)
+        if user_id:
+            statement = statement.where(BookingSeries.user_id == user_id)
+        result = await self.session.execute(statement=statement)
+        return result.scalar_one()
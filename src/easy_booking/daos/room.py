@@ -1,36 +1,218 @@
-from uuid import UUID
+from collections.abc import AsyncIterator, Iterable, Sequence
+from datetime import datetime
+from uuid import UUID, uuid4
 
-from sqlalchemy import delete, func, select
+from sqlalchemy import Row, delete, func, insert, or_, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from easy_booking.daos.base import BaseDao
+from easy_booking.daos.booking import not_cancelled, overlaps
+from easy_booking.daos.booking_series import BookingSeriesDao
 from easy_booking.exceptions.room import RoomLinkedToAnotherObject
-from easy_booking.models.room import Room
+from easy_booking.models.booking import Booking
+from easy_booking.models.room import Room, RoomStatus
+from easy_booking.schemas.page import TotalMode
+from easy_booking.schemas.room import RoomFilter, RoomSort
+from easy_booking.settings import RoomLock, settings
+from easy_booking.utils import escape_like
+
+
+def advisory_lock_key(room_id: UUID) -> int:
+    """Signed 64-bit pg_advisory_xact_lock key of a room, stable across processes"""
+    return int.from_bytes(room_id.bytes[:8], "big", signed=True)
+
+
+# Keyset of each listing order, each served by an index in both directions
+ROOM_SORTS = {
+    RoomSort.NAME: ((Room.name, Room.id), False),
+    RoomSort.NAME_DESC: ((Room.name, Room.id), True),
+    RoomSort.CAPACITY: ((Room.capacity, Room.id), False),
+    RoomSort.CAPACITY_DESC: ((Room.capacity, Room.id), True),
+}
+# Columns of the text search, each with a pg_trgm GIN index
+SEARCH_COLUMNS = (Room.name, Room.description, Room.address)
+
 
 class RoomDao(BaseDao):
+    model = Room
+    cursor_columns = (Room.name, Room.id)
 
-    def __init__(self, session:AsyncSession):
+    def __init__(self, session:AsyncSession, sort: RoomSort = RoomSort.NAME):
         super().__init__(session)
+        self.cursor_columns, self.cursor_descending = ROOM_SORTS[sort]
 
     async def create(self, room_data: dict) -> Room:
-        _room = Room(**room_data)
-        self.session.add(_room)
+        statement = insert(Room).values(**room_data).returning(Room)
+        _room = await self.session.scalar(statement=statement)
+        self.publish_change(_room.id, room_id=_room.id)
         await self.session.commit()
-        await self.session.refresh(_room)
         return _room
     
+    async def bulk_create(self, rooms_data: Sequence[dict]) -> int:
+        """
+        Insert rooms without reading them back, in the current transaction.
+
+        asyncpg loads them with COPY, other drivers with one multi-row
+        INSERT. Return the number of rooms inserted.
+        """
+        if not rooms_data:
+            return 0
+        rows = [{"id": uuid4(), **room_data} for room_data in rooms_data]
+        connection = await self.session.connection()
+        if connection.dialect.driver == "asyncpg":
+            columns = list(rows[0])
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                Room.__tablename__,
+                records=[tuple(row[column] for column in columns) for row in rows],
+                columns=columns,
+            )
+        else:
+            await connection.execute(insert(Room.__table__), rows)
+        self.publish_change()
+        return len(rows)
+
     async def get_by_id(self, room_id: UUID) -> Room | None:
         statement = select(Room).where(Room.id == room_id)
         return await self.session.scalar(statement=statement)
 
-    async def get_all(self, offset:int, limit:int) -> list[Room]:
-        statement = select(Room).offset(offset).limit(limit)
+    async def get_by_ids(self, room_ids: Iterable[UUID]) -> list[Room]:
+        statement = select(Room).where(Room.id.in_(set(room_ids)))
         result = await self.session.execute(statement=statement)
         return result.scalars().all()
+
+    async def lock(self, room_ids: Iterable[UUID], mode: RoomLock | None = None) -> bool:
+        """
+        Serialize the booking writes on the rooms until the end of the transaction.
+
+        Writers on other rooms are not blocked. Rooms are locked in a fixed
+        order so two batches can't deadlock each other. Without PostgreSQL it
+        is a no-op. Tell whether a lock was taken.
+        """
+        mode = mode or settings.booking_room_lock
+        if mode == RoomLock.NONE or self.session.get_bind().dialect.name != "postgresql":
+            return False
+        room_ids = sorted(set(room_ids))
+        if mode == RoomLock.ROW:
+            statement = select(Room.id).where(Room.id.in_(room_ids)).order_by(Room.id).with_for_update()
+            await self.session.execute(statement=statement)
+            return True
+        for room_id in room_ids:
+            await self.session.execute(statement=select(func.pg_advisory_xact_lock(advisory_lock_key(room_id))))
+        return True
+
+    async def get_all(self, offset:int, limit:int, cursor: str | None = None) -> list[Room]:
+        statement = self.paginate(select(Room), offset=offset, limit=limit, cursor=cursor)
+        result = await self.session.execute(statement=statement)
+        return result.scalars().all()
+
+    async def get_page(
+        self,
+        offset:int,
+        limit:int,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+        filters: RoomFilter | None = None,
+    ) -> tuple[list[Room], int | None]:
+        if filters is None or not filters.model_dump(exclude_none=True):
+            return await self.paginate_with_total(
+                select(Room), offset=offset, limit=limit, count=self.count, cursor=cursor, total=total
+            )
+        statement = filters.filter(select(Room))
+        if filters.search:
+            statement = statement.where(self.matches(filters.search))
+        return await self.paginate_with_total(
+            statement,
+            offset=offset,
+            limit=limit,
+            count=lambda: self.session.scalar(select(func.count()).select_from(statement.subquery())),
+            cursor=cursor,
+            total=total,
+            estimable=False,
+        )
+
+    def matches(self, search: str):
+        """
+        Rooms with `search` in their name, description or address.
+
+        On PostgreSQL a word close enough to it also matches (pg_trgm word
+        similarity, so typos are tolerated). Both operators are served by the
+        trigram GIN index of each column.
+        """
+        pattern = f"%{escape_like(search)}%"
+        conditions = [column.ilike(pattern, escape="\\") for column in SEARCH_COLUMNS]
+        if self.session.get_bind().dialect.name == "postgresql":
+            conditions.extend(column.op("%>")(search) for column in SEARCH_COLUMNS)
+        return or_(*conditions)
     
+    async def stream(
+        self, status: RoomStatus | None = None, min_capacity: int | None = None, batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Rooms as column rows in partitions of `batch_size` read from a server-side cursor, see BookingDao.stream."""
+        statement = (
+            select(*Room.__table__.columns)
+            .order_by(*self.cursor_columns)
+            .execution_options(yield_per=batch_size)
+        )
+        if status:
+            statement = statement.where(Room.status == status)
+        if min_capacity:
+            statement = statement.where(Room.capacity >= min_capacity)
+        result = await self.session.stream(statement)
+        async for partition in result.partitions():
+            yield partition
+
+    def _select_available(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        min_capacity: int,
+        busy_room_ids: Iterable[UUID] = (),
+    ):
+        # Anti-join: each room is checked with one probe of the bookings range index
+        conflicts = select(Booking.id).where(
+            Booking.room_id == Room.id,
+            overlaps(start_time, end_time, self.session.get_bind().dialect.name),
+            not_cancelled(),
+        )
+        return select(Room).where(
+            Room.status == RoomStatus.AVAILABLE,
+            Room.capacity >= min_capacity,
+            ~conflicts.exists(),
+            Room.id.not_in(set(busy_room_ids)),
+        )
+
+    async def get_available(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        min_capacity: int = 1,
+        offset: int = 0,
+        limit: int = 10,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+    ) -> tuple[list[Room], int | None]:
+        # Series occurrences are virtual, the rooms they keep busy are resolved first.
+        # Only the series of rooms passing every other filter are loaded and expanded.
+        candidates = self._select_available(start_time, end_time, min_capacity).with_only_columns(Room.id)
+        busy_room_ids = await BookingSeriesDao(self.session).get_busy_intervals(
+            start_time, end_time, room_ids=candidates
+        )
+        statement = self._select_available(start_time, end_time, min_capacity, busy_room_ids)
+        return await self.paginate_with_total(
+            statement,
+            offset=offset,
+            limit=limit,
+            count=lambda: self.session.scalar(select(func.count()).select_from(statement.subquery())),
+            cursor=cursor,
+            total=total,
+            estimable=False,
+        )
+
     async def delete_all(self) -> None:
         await self.session.execute(delete(Room))
+        self.publish_change()
         await self.session.commit()
 
     async def delete_by_id(self, room_id:UUID) -> None:
@@ -38,6 +220,7 @@ class RoomDao(BaseDao):
         try:
             statement = delete(Room).where(Room.id == room_id)
             await self.session.execute(statement=statement)
+            self.publish_change(room_id, room_id=room_id)
             await self.session.commit()
         except IntegrityError:
             raise RoomLinkedToAnotherObject
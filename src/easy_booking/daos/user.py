@@ -7,7 +7,7 @@ from uuid import UUID
 import sqlalchemy.sql.functions
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 from pydantic import BaseModel
-from sqlalchemy import delete, select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -15,10 +15,14 @@ from easy_booking.daos.base import BaseDao
 from easy_booking.exceptions.base import INVALIDDATATYPE
 from easy_booking.exceptions.user import UserLinkedToAnotherObject
 from easy_booking.models.user import User
+from easy_booking.schemas.page import TotalMode
 from easy_booking.schemas.user import UserCreate
 
 
 class UserDao(BaseDao):
+    model = User
+    cursor_columns = (User.created_at, User.id)
+
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session)
         self.user_db = SQLAlchemyUserDatabase(session, User)
@@ -31,23 +35,35 @@ class UserDao(BaseDao):
         else:
             raise TypeError(INVALIDDATATYPE)
 
-        _user = User(**data)
-        self.session.add(_user)
+        statement = insert(User).values(**data).returning(User)
+        _user = await self.session.scalar(statement=statement)
+        self.publish_change(_user.id)
         await self.session.commit()
-        await self.session.refresh(_user)
         return _user
 
     async def get_by_id(self, user_id: UUID) -> User | None:
         statement = select(User).where(User.id == user_id)
         return await self.session.scalar(statement=statement)
 
-    async def get_all(self, offset: int = 0, limit: int = 100) -> list[User]:
-        statement = select(User).offset(offset).limit(limit)
+    async def get_all(self, offset: int = 0, limit: int = 100, cursor: str | None = None) -> list[User]:
+        statement = self.paginate(select(User), offset=offset, limit=limit, cursor=cursor)
         result = await self.session.execute(statement=statement)
         return result.scalars().all()
 
+    async def get_page(
+        self,
+        offset: int,
+        limit: int,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+    ) -> tuple[list[User], int | None]:
+        return await self.paginate_with_total(
+            select(User), offset=offset, limit=limit, count=self.count, cursor=cursor, total=total
+        )
+
     async def delete_all(self) -> None:
         await self.session.execute(delete(User))
+        self.publish_change()
         await self.session.commit()
 
     async def delete_by_id(self, user_id: UUID) -> User:
@@ -55,6 +71,7 @@ class UserDao(BaseDao):
         try:
             statement = delete(User).where(User.id == user_id)
             await self.session.execute(statement=statement)
+            self.publish_change(user_id)
             await self.session.commit()
         except IntegrityError as err:
             raise UserLinkedToAnotherObject from err
@@ -1,19 +1,167 @@
-from collections.abc import AsyncGenerator
+import asyncio
+from collections.abc import AsyncGenerator, Sequence
+from time import monotonic
+from uuid import uuid4
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from loguru import logger
+from sqlalchemy import event, text
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
 
-from easy_booking.settings import settings
+from easy_booking.metrics import log_queries, track_queries
+from easy_booking.settings import Settings, settings
 
 postgresql_url = settings.database_uri.unicode_string()
 
-engine = create_async_engine(postgresql_url, echo=True, future=True)
-AsyncSessionFactory = async_sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    expire_on_commit=False,
-    bind=engine,
-    class_=AsyncSession,
-)
+
+def get_connect_args(config: Settings) -> dict:
+    """asyncpg connection arguments for the given settings."""
+    connect_args = {
+        "statement_cache_size": config.database_statement_cache_size,
+        "command_timeout": config.database_command_timeout,
+        "server_settings": config.database_server_settings,
+    }
+    if config.database_pgbouncer:
+        # No server-side prepared statement may outlive a transaction behind PgBouncer
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    return connect_args
+
+
+def build_engine(url: str = postgresql_url, config: Settings = settings) -> AsyncEngine:
+    """
+    Create the application engine from the database settings.
+
+    Each uvicorn worker owns one engine, so the server opens up to
+    workers * (database_pool_size + database_max_overflow) connections.
+    """
+    return create_async_engine(
+        url,
+        echo=config.database_echo,
+        pool_size=config.database_pool_size,
+        max_overflow=config.database_max_overflow,
+        pool_timeout=config.database_pool_timeout,
+        pool_recycle=config.database_pool_recycle,
+        pool_pre_ping=config.database_pool_pre_ping,
+        connect_args=get_connect_args(config),
+    )
+
+
+class ReplicaSet:
+    """
+    Round-robin over the replica engines that are up.
+
+    A replica is taken out as soon as one of its connections fails, and put
+    back once check() reaches it again. It is also retried after
+    `retry_after` seconds when nothing runs check().
+    """
+
+    def __init__(self, engines: Sequence[AsyncEngine] = (), retry_after: float = settings.database_replica_retry_after) -> None:
+        self.engines = list(engines)
+        self.retry_after = retry_after
+        self._next = 0
+        # Replica -> monotonic time from which it is tried again
+        self._down: dict[AsyncEngine, float] = {}
+        self._by_sync_engine = {replica.sync_engine: replica for replica in self.engines}
+        for replica in self.engines:
+            event.listen(replica.sync_engine, "handle_error", self._on_error)
+
+    def choose(self) -> AsyncEngine | None:
+        """Next replica up, None when there is none"""
+        now = monotonic()
+        for _ in range(len(self.engines)):
+            replica = self.engines[self._next % len(self.engines)]
+            self._next += 1
+            if self._down.get(replica, 0) <= now:
+                return replica
+        return None
+
+    def is_up(self, replica: AsyncEngine) -> bool:
+        return self._down.get(replica, 0) <= monotonic()
+
+    def mark_down(self, replica: AsyncEngine) -> None:
+        if self.is_up(replica):
+            logger.warning(f"Replica {replica.url.render_as_string()} is down, its reads go to the other replicas or the primary")
+        self._down[replica] = monotonic() + self.retry_after
+
+    def mark_up(self, replica: AsyncEngine) -> None:
+        if self._down.pop(replica, None) is not None:
+            logger.info(f"Replica {replica.url.render_as_string()} is back")
+
+    async def check(self, timeout: float = settings.database_replica_check_timeout) -> None:
+        for replica in self.engines:
+            try:
+                await asyncio.wait_for(self._ping(replica), timeout)
+            except (OSError, asyncio.TimeoutError, SQLAlchemyError):
+                self.mark_down(replica)
+            else:
+                self.mark_up(replica)
+
+    @staticmethod
+    async def _ping(replica: AsyncEngine) -> None:
+        async with replica.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def watch(self, interval: float = settings.database_replica_check_interval) -> None:
+        """Run check() every `interval` seconds until cancelled"""
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    def _on_error(self, context: ExceptionContext) -> None:
+        # A failure to connect has no connection yet
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(self._by_sync_engine[context.engine])
+
+
+class RoutingSession(Session):
+    """
+    Session of both the primary and the replicas.
+
+    Sessions opened with info={"read_only": True}, see get_read_session(),
+    read from one replica picked for the whole session. Their first write,
+    a flush, an INSERT/UPDATE/DELETE or a SELECT ... FOR UPDATE, moves them
+    to the primary for good so they read their own writes. Other sessions
+    and read-only sessions without a replica up use the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not self.info.get("read_only") or self.info.get("primary"):
+            return super().get_bind(mapper, clause=clause, **kw)
+        if self._flushing or (clause is not None and (clause.is_dml or getattr(clause, "_for_update_arg", None) is not None)):
+            self.info["primary"] = True
+            return super().get_bind(mapper, clause=clause, **kw)
+        replica = self.info.get("replica")
+        if replica is None:
+            replica = self.info["replica"] = self.info["replicas"].choose()
+        if replica is None:
+            self.info["primary"] = True
+            return super().get_bind(mapper, clause=clause, **kw)
+        return replica.sync_engine
+
+
+def build_session_factory(primary: AsyncEngine, replica_set: ReplicaSet) -> async_sessionmaker:
+    return async_sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        bind=primary,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        info={"replicas": replica_set},
+    )
+
+
+engine = build_engine()
+replicas = ReplicaSet([build_engine(url.unicode_string()) for url in settings.database_replica_uris])
+for _engine in (engine, *replicas.engines):
+    track_queries(_engine)
+    if settings.query_log:
+        log_queries(_engine)
+AsyncSessionFactory = build_session_factory(engine, replicas)
 
 
 async def get_session() -> AsyncGenerator:
@@ -21,4 +169,7 @@ async def get_session() -> AsyncGenerator:
         yield session
 
 
-        
\ No newline at end of file
+async def get_read_session() -> AsyncGenerator:
+    """Session of the read-only routes, served by a replica when one is up"""
+    async with AsyncSessionFactory(info={"read_only": True}) as session:
+        yield session
@@ -0,0 +1,231 @@
+"""
+Change events of the committed writes.
+
+The DAOs queue them on their session with publish(). On commit they are
+sent to the other workers over PostgreSQL NOTIFY, in the same transaction,
+and handed to the subscribers of this worker, evict_caches() by default.
+The other workers hand them to their own subscribers once notified, see
+PostgresBus.listen().
+"""
+import asyncio
+from collections.abc import Callable, Iterable
+from enum import Enum
+from typing import Any
+from uuid import UUID, uuid4
+
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from easy_booking.cache import room_cache, slot_cache, user_cache
+from easy_booking.settings import settings
+
+# Tells the notifications of this worker from the others
+WORKER_ID = uuid4().hex
+# NOTIFY payloads must stay below 8000 bytes
+MAX_PAYLOAD = 7900
+# Table of the event flushing every cache, sent instead of too large batches
+ALL = "*"
+
+_PENDING = "pending_changes"
+
+
+class ChangeAction(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+
+class ChangeEvent(BaseModel):
+    """A row of `table` was written, or any row when `id` is None"""
+    table: str
+    id: UUID | None = None
+    room_id: UUID | None = None
+    action: ChangeAction | None = None
+    # Column values of the row, for the subscribers streaming the changes
+    data: dict[str, Any] | None = None
+
+
+class ChangeBatch(BaseModel):
+    origin: str = WORKER_ID
+    events: list[ChangeEvent]
+
+
+Subscriber = Callable[[ChangeEvent], None]
+
+
+class InvalidationBus:
+    """Bus of a single worker, the events only reach its own subscribers."""
+
+    def __init__(self) -> None:
+        self.subscribers: list[Subscriber] = []
+
+    def subscribe(self, subscriber: Subscriber) -> Subscriber:
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def dispatch(self, events: Iterable[ChangeEvent]) -> None:
+        for change in events:
+            for subscriber in self.subscribers:
+                subscriber(change)
+
+    def send(self, session: Session, batch: ChangeBatch) -> None:
+        """Tell the other workers, called in the committing transaction"""
+
+    async def listen(self, engine: AsyncEngine) -> None:
+        """Dispatch the batches of the other workers until cancelled"""
+
+
+class PostgresBus(InvalidationBus):
+    """
+    Bus of the workers sharing a PostgreSQL database.
+
+    The batches are sent with pg_notify() before the commit, PostgreSQL only
+    delivers them if the transaction commits. listen() holds one pooled
+    connection for LISTEN and reconnects after `retry_interval` seconds
+    when it is lost. Notifications sent while nobody listened are lost, so
+    every cache is flushed on (re)connect.
+    """
+
+    def __init__(
+        self,
+        channel: str = settings.cache_invalidation_channel,
+        retry_interval: float = settings.cache_invalidation_retry_interval,
+    ) -> None:
+        super().__init__()
+        self.channel = channel
+        self.retry_interval = retry_interval
+
+    @staticmethod
+    def payloads(batch: ChangeBatch) -> list[str]:
+        """
+        The batch as NOTIFY payloads of at most MAX_PAYLOAD bytes each.
+
+        Events are packed in order. An event too large for a payload of its
+        own, the only case left, is sent as an ALL event flushing every cache.
+        """
+        envelope = len(ChangeBatch(origin=batch.origin, events=[]).model_dump_json().encode())
+        payloads = []
+        chunk: list[ChangeEvent] = []
+        size = envelope
+        for change in batch.events:
+            # With the comma separating it from the previous event
+            length = len(change.model_dump_json(exclude_none=True).encode()) + 1
+            if envelope + length > MAX_PAYLOAD:
+                change = ChangeEvent(table=ALL)
+                length = len(change.model_dump_json(exclude_none=True).encode()) + 1
+            if chunk and size + length > MAX_PAYLOAD:
+                payloads.append(ChangeBatch(origin=batch.origin, events=chunk).model_dump_json(exclude_none=True))
+                chunk, size = [], envelope
+            chunk.append(change)
+            size += length
+        if chunk:
+            payloads.append(ChangeBatch(origin=batch.origin, events=chunk).model_dump_json(exclude_none=True))
+        return payloads
+
+    def send(self, session: Session, batch: ChangeBatch) -> None:
+        if session.get_bind().dialect.name != "postgresql":
+            return
+        # All in the committing transaction, delivered together once it commits
+        for payload in self.payloads(batch):
+            session.execute(select(func.pg_notify(self.channel, payload)))
+
+    async def listen(self, engine: AsyncEngine) -> None:
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    connection = (await conn.get_raw_connection()).driver_connection
+                    lost = asyncio.Event()
+                    connection.add_termination_listener(lambda _, lost=lost: lost.set())
+                    await connection.add_listener(self.channel, self._on_notification)
+                    try:
+                        self.dispatch([ChangeEvent(table=ALL)])
+                        logger.info(f"Listening to the changes of the other workers on {self.channel}")
+                        await lost.wait()
+                    finally:
+                        if not connection.is_closed():
+                            await connection.remove_listener(self.channel, self._on_notification)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning(f"Change listener disconnected, retrying in {self.retry_interval}s: {error}")
+            else:
+                logger.warning(f"Change listener disconnected, retrying in {self.retry_interval}s")
+            await asyncio.sleep(self.retry_interval)
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            batch = ChangeBatch.model_validate_json(payload)
+        except ValidationError as error:
+            logger.warning(f"Malformed change notification on {channel} skipped: {error}")
+            return
+        if batch.origin != WORKER_ID:
+            self.dispatch(batch.events)
+
+
+class MemoryBus(InvalidationBus):
+    """
+    In-memory stand-in for PostgresBus, each bus of a hub plays a worker.
+
+    A batch sent by one bus is split into the NOTIFY payloads of PostgresBus
+    and dispatched at once to the other buses of `hub`, as if the commit had
+    been notified to the other workers.
+    """
+
+    def __init__(self, hub: list["MemoryBus"]) -> None:
+        super().__init__()
+        self.hub = hub
+        hub.append(self)
+
+    def send(self, session: Session, batch: ChangeBatch) -> None:
+        for payload in PostgresBus.payloads(batch):
+            events = ChangeBatch.model_validate_json(payload).events
+            for worker in self.hub:
+                if worker is not self:
+                    worker.dispatch(events)
+
+
+def evict_caches(change: ChangeEvent) -> None:
+    """Drop the cache entries computed from the changed row"""
+    if change.table == ALL:
+        slot_cache.clear()
+        user_cache.clear()
+        room_cache.clear()
+    elif change.table == "users":
+        user_cache.invalidate_tag(change.id) if change.id else user_cache.clear()
+    elif change.table in ("rooms", "bookings", "booking_series"):
+        slot_cache.invalidate_tag(change.room_id) if change.room_id else slot_cache.clear()
+        if change.table == "rooms":
+            # Any room write may move rooms across the listing pages
+            room_cache.clear()
+
+bus: InvalidationBus = PostgresBus()
+bus.subscribe(evict_caches)
+
+
+def publish(session: AsyncSession | Session, *events: ChangeEvent) -> None:
+    """Queue events sent once the current transaction of `session` commits"""
+    if isinstance(session, AsyncSession):
+        session = session.sync_session
+    session.info.setdefault(_PENDING, []).extend(events)
+
+
+@event.listens_for(Session, "before_commit")
+def _send_pending(session: Session) -> None:
+    events = session.info.get(_PENDING)
+    if events:
+        bus.send(session, ChangeBatch(events=events))
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_pending(session: Session) -> None:
+    events = session.info.pop(_PENDING, None)
+    if events:
+        bus.dispatch(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
@@ -1,4 +1,4 @@
-from easy_booking.exceptions.base import Conflict, NotFound
+from easy_booking.exceptions.base import BadRequest, Conflict, NotFound
 
 class BookingNotFound(NotFound):
     def __init__(self) -> None:
@@ -8,4 +8,17 @@ class BookingNotFound(NotFound):
 class BookingLinkedToAnotherObject(Conflict):
     def __init__(self) -> None:
         detail = "Booking is linked to another object and can't be deleted"
-        super().__init__(detail)
\ No newline at end of file
+        super().__init__(detail)
+
+class InvalidPeriod(BadRequest):
+    def __init__(self) -> None:
+        detail = "The end of the period must be after its start"
+        super().__init__(detail)
+
+class UnknownField(BadRequest):
+    def __init__(self, name: str) -> None:
+        detail = f"Unknown booking field or relationship: {name}"
+        super().__init__(detail)
+
+
+BATCHREJECTED = "Not created because another item of the batch was rejected"
@@ -0,0 +1,16 @@
+from easy_booking.exceptions.base import BadRequest, NotFound
+
+class BookingSeriesNotFound(NotFound):
+    def __init__(self) -> None:
+        detail = "Booking series with the given id doesn't exist"
+        super().__init__(detail)
+
+class InvalidRecurrence(BadRequest):
+    def __init__(self, reason: str = "The recurrence rule is invalid") -> None:
+        super().__init__(reason)
+
+
+UNBOUNDED = "A series needs an until date or a count"
+EMPTYSERIES = "The series has no occurrence before its until date"
+TOOMANYOCCURRENCES = "A series can't have more than {} occurrences"
+UNKNOWNTIMEZONE = "Unknown time zone, use an IANA name such as Europe/Paris"
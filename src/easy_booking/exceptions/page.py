@@ -0,0 +1,6 @@
+from easy_booking.exceptions.base import BadRequest
+
+class InvalidCursor(BadRequest):
+    def __init__(self) -> None:
+        detail = "The given pagination cursor is invalid"
+        super().__init__(detail)
@@ -13,4 +13,7 @@ class RoomLinkedToAnotherObject(Conflict):
 class RoomUnavailable(BadRequest):
     def __init__(self, status: str = "unavailable") -> None:
         detail = f"Room is currently {status} and cannot be booked"
-        super().__init__(detail)
\ No newline at end of file
+        super().__init__(detail)
+
+
+ALREADYBOOKED = "Room is already booked for this time period"
@@ -1,11 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from importlib.metadata import version
 
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
 from fastapi.openapi.docs import get_swagger_ui_html
 
 from easy_booking.api.v1 import router
+from easy_booking.db import AsyncSessionFactory, engine, replicas
+from easy_booking.events import bus
+from easy_booking.metrics import TimingMiddleware, metrics
+from easy_booking.scheduler import booking_completer
+from easy_booking.settings import settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The other workers' writes evict the local cache entries
+    tasks = [asyncio.create_task(bus.listen(engine))]
+    # Replicas are taken out and put back by the health checks
+    if replicas.engines:
+        tasks.append(asyncio.create_task(replicas.watch()))
+    # Every worker may run it, the batches skip each other's locked rows
+    if settings.booking_completion_in_app:
+        tasks.append(asyncio.create_task(booking_completer.run(AsyncSessionFactory)))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
 
 app = FastAPI(
     title=__package__.replace("_", " ").title(),
@@ -13,7 +38,8 @@ app = FastAPI(
     root_path="/api/v1",
     swagger_ui_parameters={
         "syntaxHighlight.theme": "obsidian", 
-    }
+    },
+    lifespan=lifespan,
     )
 
 
@@ -23,7 +49,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(TimingMiddleware)
 
 app.include_router(router=router)
 
@@ -34,4 +62,9 @@ async def default_exception_handler(request: Request, exc: Exception):
 
 @app.get("/", include_in_schema=False)
 async def redirect_depending_user_agent(request: Request):
-    return RedirectResponse("/api")
\ No newline at end of file
+    return RedirectResponse("/api")
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render() + booking_completer.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
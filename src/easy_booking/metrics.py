@@ -0,0 +1,338 @@
+"""
+In-process request metrics.
+
+TimingMiddleware times every request, the SQLAlchemy events of
+track_queries() add up the database time and TimedRoute the serialization
+of the response. Each request sends its timings back in a Server-Timing
+header and they are kept in per-route histograms, rendered in the
+Prometheus text format by Metrics.render(). Each uvicorn worker has its own
+histograms, like the caches.
+
+log_queries() is opt-in (QUERY_LOG=true): it logs the slow statements and
+the requests repeating a statement, the N+1 pattern.
+"""
+import re
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from time import perf_counter
+from typing import Any
+
+from fastapi.routing import APIRoute
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from easy_booking.settings import settings
+
+UNMATCHED_ROUTE = "<unmatched>"
+# Placeholder lists of the expanded IN (...) parameters, in the qmark, numeric and pyformat styles
+_PLACEHOLDERS = re.compile(r"\(\s*(?:\?|\$\d+|%\(\w+\)s)(?:\s*,\s*(?:\?|\$\d+|%\(\w+\)s))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class Histogram:
+    """
+    Latency histogram in the spirit of HdrHistogram.
+
+    Values are counted in microseconds in log-linear buckets: each power of
+    two is split into 2**precision linear sub-buckets, so a value is known to
+    within 1/2**precision of itself whatever its magnitude, with a few
+    hundred counters at most.
+    """
+
+    def __init__(self, precision: int = 3) -> None:
+        self.precision = precision
+        self.count = 0
+        self.sum = 0.0
+        # Exclusive upper bound of a bucket in microseconds -> number of values
+        self._counts: dict[int, int] = {}
+
+    def _upper_bound(self, micros: int) -> int:
+        shift = max(micros.bit_length() - 1 - self.precision, 0)
+        return ((micros >> shift) + 1) << shift
+
+    def record(self, seconds: float) -> None:
+        upper_bound = self._upper_bound(max(int(seconds * 1_000_000), 0))
+        self._counts[upper_bound] = self._counts.get(upper_bound, 0) + 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound in seconds of the bucket holding the q-quantile, 0 when empty"""
+        rank = q * self.count
+        seen = 0
+        for upper_bound, count in sorted(self._counts.items()):
+            seen += count
+            if seen >= rank:
+                return upper_bound / 1_000_000
+        return 0.0
+
+    def cumulative_counts(self, bounds: Iterable[float]) -> list[int]:
+        """Number of values at most each bound in seconds, to the resolution of the buckets"""
+        buckets = sorted(self._counts.items())
+        counts = []
+        seen = 0
+        position = 0
+        for bound in bounds:
+            while position < len(buckets) and buckets[position][0] - 1 <= bound * 1_000_000:
+                seen += buckets[position][1]
+                position += 1
+            counts.append(seen)
+        return counts
+
+
+class RequestTimings:
+    """
+    Phases of the current request, filled in by the hooks below.
+
+    `statements` counts the executions of each normalized statement when
+    it is given, see log_queries().
+    """
+
+    __slots__ = ("db", "queries", "serialization", "endpoint_end", "path", "statements")
+
+    def __init__(self, path: str | None = None, statements: dict[str, int] | None = None) -> None:
+        self.db = 0.0
+        self.queries = 0
+        self.serialization = 0.0
+        self.endpoint_end: float | None = None
+        self.path = path
+        self.statements = statements
+
+    def server_timing(self, total: float) -> str:
+        return (
+            f'total;dur={total * 1000:.2f}, db;dur={self.db * 1000:.2f};desc="{self.queries} queries", '
+            f"serialization;dur={self.serialization * 1000:.2f}"
+        )
+
+
+request_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+class RouteMetrics:
+    __slots__ = ("duration", "db", "serialization", "queries", "statuses")
+
+    def __init__(self) -> None:
+        self.duration = Histogram()
+        self.db = Histogram()
+        self.serialization = Histogram()
+        self.queries = 0
+        self.statuses: dict[int, int] = {}
+
+
+class Metrics:
+    """Per-route histograms of the request phases"""
+
+    def __init__(self, buckets: Iterable[float] = settings.metrics_buckets, prefix: str = "easy_booking") -> None:
+        self.buckets = sorted(buckets)
+        self.prefix = prefix
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+
+    def observe(self, method: str, route: str, status: int, duration: float, timings: RequestTimings) -> None:
+        route_metrics = self.routes.get((method, route))
+        if route_metrics is None:
+            route_metrics = self.routes[(method, route)] = RouteMetrics()
+        route_metrics.duration.record(duration)
+        route_metrics.db.record(timings.db)
+        route_metrics.serialization.record(timings.serialization)
+        route_metrics.queries += timings.queries
+        route_metrics.statuses[status] = route_metrics.statuses.get(status, 0) + 1
+
+    def clear(self) -> None:
+        self.routes.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format, version 0.0.4"""
+        lines = []
+        histograms = (
+            ("http_request_duration_seconds", "Time to handle a request and send its body.", "duration"),
+            ("http_request_db_duration_seconds", "Time spent executing SQL statements per request.", "db"),
+            ("http_request_serialization_seconds", "Time spent serializing the response model.", "serialization"),
+        )
+        for name, help_text, attribute in histograms:
+            lines += [f"# HELP {self.prefix}_{name} {help_text}", f"# TYPE {self.prefix}_{name} histogram"]
+            for (method, route), route_metrics in sorted(self.routes.items()):
+                histogram = getattr(route_metrics, attribute)
+                labels = f'method="{_escape(method)}",route="{_escape(route)}"'
+                for bound, count in zip(self.buckets, histogram.cumulative_counts(self.buckets)):
+                    lines.append(f'{self.prefix}_{name}_bucket{{{labels},le="{bound:g}"}} {count}')
+                lines.append(f'{self.prefix}_{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{self.prefix}_{name}_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"{self.prefix}_{name}_count{{{labels}}} {histogram.count}")
+        name = f"{self.prefix}_http_requests_total"
+        lines += [f"# HELP {name} Requests handled, by status code.", f"# TYPE {name} counter"]
+        for (method, route), route_metrics in sorted(self.routes.items()):
+            for status, count in sorted(route_metrics.statuses.items()):
+                lines.append(f'{name}{{method="{_escape(method)}",route="{_escape(route)}",status="{status}"}} {count}')
+        name = f"{self.prefix}_db_queries_total"
+        lines += [f"# HELP {name} SQL statements executed while handling requests.", f"# TYPE {name} counter"]
+        for (method, route), route_metrics in sorted(self.routes.items()):
+            lines.append(f'{name}{{method="{_escape(method)}",route="{_escape(route)}"}} {route_metrics.queries}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+
+
+def normalize_statement(statement: str) -> str:
+    """Statement with its whitespace collapsed and its IN lists of any length written (?)"""
+    return _PLACEHOLDERS.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._query_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    timings = request_timings.get()
+    if timings is None:
+        return
+    timings.db += perf_counter() - context._query_started
+    timings.queries += 1
+    if timings.statements is not None:
+        key = normalize_statement(statement)
+        timings.statements[key] = timings.statements.get(key, 0) + 1
+
+
+def _log_slow_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed_ms = (perf_counter() - context._query_started) * 1000
+    if elapsed_ms < settings.query_log_slow_ms:
+        return
+    timings = request_timings.get()
+    path = timings.path if timings is not None else None
+    # Only the statement is logged, its parameters may hold personal data or secrets
+    logger.bind(path=path).warning(
+        f"Slow query ({elapsed_ms:.1f}ms) during {path or 'no request'}: {normalize_statement(statement)} [parameters redacted]"
+    )
+
+
+def track_queries(engine: AsyncEngine) -> None:
+    """Add the statements executed on `engine` to the timings of the current request"""
+    for name, listener in (("before_cursor_execute", _before_cursor_execute), ("after_cursor_execute", _after_cursor_execute)):
+        if not event.contains(engine.sync_engine, name, listener):
+            event.listen(engine.sync_engine, name, listener)
+
+
+def log_queries(engine: AsyncEngine) -> None:
+    """Log the statements of `engine` slower than query_log_slow_ms, wherever they run"""
+    track_queries(engine)
+    if not event.contains(engine.sync_engine, "after_cursor_execute", _log_slow_query):
+        event.listen(engine.sync_engine, "after_cursor_execute", _log_slow_query)
+
+
+def check_repeated_statements(timings: RequestTimings, threshold: int = settings.query_log_similar_statements) -> list[str]:
+    """Log and return the statements the request ran more than `threshold` times"""
+    repeated = [statement for statement, count in (timings.statements or {}).items() if count > threshold]
+    for statement in repeated:
+        logger.bind(path=timings.path).warning(
+            f"Possible N+1 during {timings.path}: {timings.statements[statement]} similar statements: {statement}"
+        )
+    return repeated
+
+
+def _endpoint_returned() -> None:
+    timings = request_timings.get()
+    if timings is not None:
+        timings.endpoint_end = perf_counter()
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # FastAPI reads the signature of the wrapped endpoint through __wrapped__
+    if iscoroutinefunction(endpoint):
+
+        @wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _endpoint_returned()
+
+    else:
+
+        @wraps(endpoint)
+        def timed_endpoint(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _endpoint_returned()
+
+    return timed_endpoint
+
+
+class TimedRoute(APIRoute):
+    """
+    Route timing the serialization of the value returned by its endpoint.
+
+    It is the time between the return of the endpoint and the response being
+    ready, so routes building their own Response report next to nothing.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs) -> None:
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+
+        async def timed_route_handler(request):
+            response = await route_handler(request)
+            timings = request_timings.get()
+            if timings is not None and timings.endpoint_end is not None:
+                timings.serialization += perf_counter() - timings.endpoint_end
+            return response
+
+        return timed_route_handler
+
+
+class TimingMiddleware:
+    """
+    Time each HTTP request and record it in `metrics` once its body is sent.
+
+    The Server-Timing header holds the phases up to the start of the
+    response, the histograms the whole request including a streamed body.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        registry: Metrics = metrics,
+        server_timing: bool = settings.server_timing,
+        query_log: bool = settings.query_log,
+    ) -> None:
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+        self.query_log = query_log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = perf_counter()
+        timings = RequestTimings(f"{scope['method']} {scope['path']}", {} if self.query_log else None)
+        token = request_timings.set(timings)
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    header = timings.server_timing(perf_counter() - started).encode("latin-1")
+                    message["headers"] = [*message.get("headers", ()), (b"server-timing", header)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            self.registry.observe(scope["method"], route, status, perf_counter() - started, timings)
+            if self.query_log:
+                check_repeated_statements(timings)
@@ -1,3 +1,4 @@
 from easy_booking.models.user import User
 from easy_booking.models.room import Room
 from easy_booking.models.booking import Booking
+from easy_booking.models.booking_series import BookingSeries
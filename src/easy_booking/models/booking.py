@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime, timezone
 from enum import Enum
 
-from sqlalchemy import UUID, TIMESTAMP, ForeignKey, Enum as SQLEnum
+from sqlalchemy import UUID, TIMESTAMP, ForeignKey, Index, Enum as SQLEnum, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from easy_booking.models.base import Base
@@ -17,6 +17,26 @@ class BookingStatus(str, Enum):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_created_at_id", "created_at", "id"),
+        Index("ix_bookings_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Foreign key checks on room deletion also see the cancelled bookings
+        Index("ix_bookings_room_id", "room_id"),
+        Index(
+            "ix_bookings_room_id_start_time",
+            "room_id",
+            "start_time",
+            postgresql_where=text("status <> 'cancelled'"),
+            sqlite_where=text("status <> 'cancelled'"),
+        ),
+        # Scheduled bookings by end, scanned by the booking completion
+        Index(
+            "ix_bookings_scheduled_end_time",
+            "end_time",
+            postgresql_where=text("status = 'scheduled'"),
+            sqlite_where=text("status = 'scheduled'"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), unique=True, default=uuid.uuid4, nullable=False, primary_key=True
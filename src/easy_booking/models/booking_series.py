@@ -0,0 +1,70 @@
+import uuid
+from datetime import datetime, timezone
+from enum import Enum
+
+from sqlalchemy import UUID, TIMESTAMP, ForeignKey, Index, Integer, String, Enum as SQLEnum, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from easy_booking.models.base import Base
+from easy_booking.models.booking import BookingStatus
+
+
+class Frequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+
+class BookingSeries(Base):
+    """
+    A recurring booking, its occurrences are never stored but expanded on
+    demand (see easy_booking.recurrence) inside the queried window.
+    """
+    __tablename__ = "booking_series"
+    __table_args__ = (
+        Index("ix_booking_series_created_at_id", "created_at", "id"),
+        Index("ix_booking_series_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index(
+            "ix_booking_series_room_id_start_time_ends_at",
+            "room_id",
+            "start_time",
+            "ends_at",
+            postgresql_where=text("status <> 'cancelled'"),
+            sqlite_where=text("status <> 'cancelled'"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), unique=True, default=uuid.uuid4, nullable=False, primary_key=True
+    )
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
+    )
+    room_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("rooms.id"), nullable=False
+    )
+
+    # First occurrence
+    start_time: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    end_time: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+
+    frequency: Mapped[Frequency] = mapped_column(
+        SQLEnum(Frequency, values_callable=lambda x: [e.value for e in x]), nullable=False
+    )
+    interval: Mapped[int] = mapped_column(Integer(), default=1, nullable=False)
+    # IANA time zone whose wall time the occurrences follow
+    time_zone: Mapped[str] = mapped_column(String(64), default="UTC", nullable=False)
+    until: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    count: Mapped[int | None] = mapped_column(Integer(), nullable=True)
+    # End of the last occurrence, bounds the series for window queries
+    ends_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+
+    status: Mapped[BookingStatus] = mapped_column(
+        SQLEnum(BookingStatus, values_callable=lambda x: [e.value for e in x]), default=BookingStatus.SCHEDULED, nullable=False
+    )
+
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    user: Mapped["User"] = relationship("User")
+    room: Mapped["Room"] = relationship("Room")
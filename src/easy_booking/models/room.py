@@ -1,7 +1,7 @@
 import uuid
 from enum import Enum
 
-from sqlalchemy import UUID, String, Integer, Text, Enum as SQLEnum
+from sqlalchemy import UUID, Index, String, Integer, Text, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from easy_booking.models.base import Base
@@ -15,6 +15,12 @@ class RoomStatus(str, Enum):
 
 class Room(Base):
     __tablename__ = "rooms"
+    __table_args__ = (
+        Index("ix_rooms_name_id", "name", "id"),
+        Index("ix_rooms_status_capacity", "status", "capacity"),
+        Index("ix_rooms_capacity_id", "capacity", "id"),
+        # The pg_trgm GIN indexes of the text search are only created by the room_search_indexes migration
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), unique=True, default=uuid.uuid4, nullable=False, primary_key=True
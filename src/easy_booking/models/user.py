@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, Boolean, String, UUID
+from sqlalchemy import TIMESTAMP, Boolean, Index, String, UUID, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from easy_booking.models.base import Base
@@ -9,6 +9,11 @@ from easy_booking.models.base import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # fastapi-users looks logins up on lower(email)
+        Index("ix_users_lower_email", text("lower(email)"), unique=True),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), unique=True, default=uuid.uuid4, nullable=False, primary_key=True
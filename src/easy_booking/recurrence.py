@@ -0,0 +1,99 @@
+"""
+Lazy expansion of recurring booking series.
+
+A series is described by its first occurrence (start_time, end_time), a
+frequency, an interval and an `until` date and/or a `count`. Occurrence
+`index` starts `index * interval` days, weeks or months after the first
+one. Monthly occurrences on a day missing from the month (e.g. the 31st)
+fall on the last day of that month.
+
+Steps are taken in the wall time of the series time zone, so a weekly 09:00
+standup stays at 09:00 across DST changes, then each occurrence is turned
+back into UTC.
+"""
+from calendar import monthrange
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from easy_booking.models.booking_series import Frequency
+from easy_booking.utils import as_utc
+
+STEPS = {
+    Frequency.DAILY: timedelta(days=1),
+    Frequency.WEEKLY: timedelta(weeks=1),
+}
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    month_index = moment.month - 1 + months
+    year, month = moment.year + month_index // 12, month_index % 12 + 1
+    return moment.replace(year=year, month=month, day=min(moment.day, monthrange(year, month)[1]))
+
+
+def occurrence_start(series, index: int) -> datetime:
+    zone = ZoneInfo(series.time_zone)
+    wall_time = as_utc(series.start_time).astimezone(zone).replace(tzinfo=None)
+    steps = index * series.interval
+    if series.frequency == Frequency.MONTHLY:
+        wall_time = add_months(wall_time, steps)
+    else:
+        wall_time = wall_time + steps * STEPS[Frequency(series.frequency)]
+    return wall_time.replace(tzinfo=zone).astimezone(timezone.utc)
+
+
+def _estimate_index(series, moment: datetime) -> int:
+    """Index of an occurrence starting close to `moment`, callers step from there to the exact one."""
+    start_time = as_utc(series.start_time)
+    if series.frequency == Frequency.MONTHLY:
+        months = (moment.year - start_time.year) * 12 + moment.month - start_time.month
+        return max(0, months // series.interval)
+    return max(0, (moment - start_time) // (series.interval * STEPS[Frequency(series.frequency)]))
+
+
+def occurrence_total(series) -> int:
+    """Number of occurrences of the series, it needs an `until` or a `count`"""
+    total = series.count
+    if series.until is not None:
+        until = as_utc(series.until)
+        index = _estimate_index(series, until)
+        while index > 0 and occurrence_start(series, index) > until:
+            index -= 1
+        while occurrence_start(series, index + 1) <= until:
+            index += 1
+        until_total = index + 1 if occurrence_start(series, 0) <= until else 0
+        total = until_total if total is None else min(total, until_total)
+    if total is None:
+        raise ValueError("A series needs an until date or a count")
+    return total
+
+
+def series_end(series) -> datetime | None:
+    """End of the last occurrence, None for an empty series"""
+    total = occurrence_total(series)
+    if not total:
+        return None
+    return occurrence_start(series, total - 1) + (as_utc(series.end_time) - as_utc(series.start_time))
+
+
+def occurrences(
+    series, window_start: datetime, window_end: datetime, total: int | None = None
+) -> Iterator[tuple[datetime, datetime]]:
+    """
+    (start, end) of the occurrences overlapping [window_start, window_end).
+
+    The first candidate is computed arithmetically, so the cost depends on
+    the size of the window, not on how far it is from the series start.
+    """
+    duration = as_utc(series.end_time) - as_utc(series.start_time)
+    total = occurrence_total(series) if total is None else total
+    index = _estimate_index(series, window_start - duration)
+    while index > 0 and occurrence_start(series, index - 1) + duration > window_start:
+        index -= 1
+    while index < total:
+        start = occurrence_start(series, index)
+        if start >= window_end:
+            break
+        if start + duration > window_start:
+            yield start, start + duration
+        index += 1
@@ -0,0 +1,97 @@
+"""
+Background jobs, run by the app workers or by `easy_booking worker`.
+
+BookingCompleter marks the scheduled bookings that have ended as completed
+every `interval` seconds. Each batch is one short UPDATE of at most
+`batch_size` rows, locked with SKIP LOCKED, so any number of workers and
+nodes can run it at once without waiting for each other or completing a
+booking twice. The outcome of the last run is kept for /metrics.
+"""
+import asyncio
+import time
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from easy_booking.daos.booking import BookingDao
+from easy_booking.settings import settings
+
+
+class BookingCompleter:
+    """Complete the ended bookings in batches, with the metrics of its last run"""
+
+    def __init__(
+        self,
+        interval: float = settings.booking_completion_interval,
+        batch_size: int = settings.booking_completion_batch_size,
+    ) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.runs = 0
+        self.failures = 0
+        self.completed = 0
+        # Unix time at the end of the last run and of the last successful one, 0 before the first
+        self.last_run = 0.0
+        self.last_success = 0.0
+        self.last_duration = 0.0
+        self.last_completed = 0
+        self.last_batches = 0
+
+    async def run_once(self, session_factory: async_sessionmaker) -> int:
+        """Complete every booking ended by now, one transaction per batch, and return their number"""
+        started = time.perf_counter()
+        completed = batches = 0
+        try:
+            while True:
+                async with session_factory() as session:
+                    count = await BookingDao(session).complete_ended(self.batch_size)
+                batches += 1
+                completed += count
+                if count < self.batch_size:
+                    break
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.runs += 1
+            self.completed += completed
+            self.last_run = time.time()
+            self.last_duration = time.perf_counter() - started
+            self.last_completed = completed
+            self.last_batches = batches
+        self.last_success = self.last_run
+        if completed:
+            logger.info(f"Completed {completed} ended bookings in {batches} batches ({self.last_duration:.2f}s)")
+        return completed
+
+    async def run(self, session_factory: async_sessionmaker) -> None:
+        """Call run_once() every `interval` seconds until cancelled, a failed run is retried on the next one"""
+        while True:
+            try:
+                await self.run_once(session_factory)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning(f"Booking completion failed, retrying in {self.interval}s: {error}")
+            await asyncio.sleep(self.interval)
+
+    def render(self, prefix: str = "easy_booking") -> str:
+        """Prometheus text exposition format, version 0.0.4"""
+        name = f"{prefix}_booking_completion"
+        metrics = (
+            ("runs_total", "counter", "Runs of the booking completion.", self.runs),
+            ("failures_total", "counter", "Runs of the booking completion that failed.", self.failures),
+            ("bookings_total", "counter", "Bookings marked as completed.", self.completed),
+            ("last_run_timestamp_seconds", "gauge", "Unix time at the end of the last run.", self.last_run),
+            ("last_success_timestamp_seconds", "gauge", "Unix time at the end of the last successful run.", self.last_success),
+            ("last_run_duration_seconds", "gauge", "Duration of the last run.", self.last_duration),
+            ("last_run_bookings", "gauge", "Bookings completed by the last run.", self.last_completed),
+            ("last_run_batches", "gauge", "Transactions of the last run.", self.last_batches),
+        )
+        lines = []
+        for suffix, kind, help_text, value in metrics:
+            lines += [f"# HELP {name}_{suffix} {help_text}", f"# TYPE {name}_{suffix} {kind}", f"{name}_{suffix} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+booking_completer = BookingCompleter()
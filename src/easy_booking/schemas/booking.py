@@ -1,12 +1,16 @@
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, ConfigDict
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict, Field, create_model
 
 from easy_booking.schemas.room import RoomOut
 from easy_booking.schemas.user import UserOut
 
 
+BULK_MAX_ITEMS = 500
+
+
 class BookingStatus(str, Enum):
     SCHEDULED = "scheduled"
     CONFIRMED = "confirmed"
@@ -35,6 +39,29 @@ class BookingOut(BookingBase):
     room: RoomOut | None = None
 
 
+# Relationships embedded by BookingOut and the columns next to them
+BOOKING_EXPANDS = ("user", "room")
+BOOKING_FIELDS = tuple(name for name in BookingOut.model_fields if name not in BOOKING_EXPANDS)
+
+
+@lru_cache
+def booking_view(
+    fields: frozenset[str] | None = None, expand: frozenset[str] = frozenset(BOOKING_EXPANDS)
+) -> type[BaseModel]:
+    """
+    BookingOut restricted to `fields`, every column when None, embedding only
+    the relationships in `expand`. The full selection is BookingOut itself.
+    """
+    if fields is None and expand == frozenset(BOOKING_EXPANDS):
+        return BookingOut
+    kept = (frozenset(BOOKING_FIELDS) if fields is None else fields) | expand
+    return create_model(
+        "BookingView",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (field.annotation, field) for name, field in BookingOut.model_fields.items() if name in kept},
+    )
+
+
 class BookingPatch(BaseModel):
     room_id: UUID | None = None
     start_time: datetime | None = None
@@ -43,3 +70,31 @@ class BookingPatch(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class BookingDelta(BookingBase):
+    """Booking change pushed to the event streams, `event` is created, updated, cancelled or deleted"""
+    event: str
+    id: UUID
+    status: BookingStatus
+
+
+class Slot(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+
+class BookingBulkIn(BaseModel):
+    items: list[BookingIn] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+    atomic: bool = False
+
+
+class BookingBulkResult(BaseModel):
+    index: int
+    status_code: int
+    booking: BookingOut | None = None
+    detail: str | None = None
+
+
+class BookingBulkOut(BaseModel):
+    created: int
+    results: list[BookingBulkResult]
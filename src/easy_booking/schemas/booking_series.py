@@ -0,0 +1,48 @@
+from uuid import UUID
+from datetime import datetime
+from enum import Enum
+from pydantic import BaseModel, ConfigDict, Field
+
+from easy_booking.schemas.booking import BookingStatus
+
+
+class Frequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+
+class BookingSeriesBase(BaseModel):
+    room_id: UUID
+    start_time: datetime
+    end_time: datetime
+    frequency: Frequency
+    interval: int = Field(default=1, ge=1)
+    time_zone: str = "UTC"
+    until: datetime | None = None
+    count: int | None = Field(default=None, ge=1)
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BookingSeriesIn(BookingSeriesBase):
+    status: BookingStatus = BookingStatus.SCHEDULED
+
+
+class BookingSeriesOut(BookingSeriesBase):
+    id: UUID
+    user_id: UUID
+    ends_at: datetime
+    status: BookingStatus
+    created_at: datetime
+
+
+class Occurrence(BaseModel):
+    """A stored booking (booking_id set) or an occurrence of a series (series_id set)"""
+    room_id: UUID
+    user_id: UUID
+    start_time: datetime
+    end_time: datetime
+    status: BookingStatus
+    booking_id: UUID | None = None
+    series_id: UUID | None = None
@@ -1,11 +1,62 @@
-from typing import Generic, TypeVar 
+from collections.abc import Sequence
+from enum import Enum
+from typing import Any, Generic, TypeVar
 
 from pydantic import BaseModel
 
 T = TypeVar("T")
 
+
+class TotalMode(str, Enum):
+    EXACT = "exact"
+    WINDOW = "window"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    @property
+    def media_type(self) -> str:
+        return "text/csv" if self == ExportFormat.CSV else "application/x-ndjson"
+
+    @classmethod
+    def from_filename(cls, filename: str | None) -> "ExportFormat":
+        """CSV for a .csv file, NDJSON otherwise (.ndjson, .jsonl)"""
+        return cls.CSV if filename and filename.lower().endswith(".csv") else cls.NDJSON
+
+
+class LineError(BaseModel):
+    line: int
+    errors: list[str]
+
+
+class ImportReport(BaseModel):
+    imported: int = 0
+    errors: list[LineError] = []
+
+
 class Page(BaseModel, Generic[T]):
     items: list[T]
     limit:int
     offset:int
-    total: int
\ No newline at end of file
+    total: int | None = None
+    next_cursor: str | None = None
+
+    @classmethod
+    def from_rows(
+        cls, rows: Sequence[Any], offset: int, limit: int, total: int | None = None, next_cursor: str | None = None
+    ) -> "Page[T]":
+        """
+        Validate ORM rows in one pass into a parametrized page, e.g. Page[RoomOut].
+
+        The result is an instance of the route's response_model, so FastAPI
+        doesn't validate it a second time and dumps it to JSON bytes in
+        pydantic-core.
+        """
+        return cls.model_validate(
+            {"items": rows, "offset": offset, "limit": limit, "total": total, "next_cursor": next_cursor},
+            from_attributes=True,
+        )
@@ -1,6 +1,11 @@
 from uuid import UUID
 from enum import Enum
+from fastapi_filter.contrib.sqlalchemy import Filter
 from pydantic import BaseModel, ConfigDict
+from sqlalchemy import Select
+
+from easy_booking.models.room import Room
+from easy_booking.utils import escape_like
 
 
 class RoomStatus(str, Enum):
@@ -35,3 +40,37 @@ class RoomPatch(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class RoomSort(str, Enum):
+    NAME = "name"
+    NAME_DESC = "-name"
+    CAPACITY = "capacity"
+    CAPACITY_DESC = "-capacity"
+
+
+class RoomFilter(Filter):
+    """
+    Filters of the room listing.
+
+    `search` needs the dialect and is applied by RoomDao: a substring of the
+    name, description or address, or on PostgreSQL a close spelling of one.
+    """
+    status: RoomStatus | None = None
+    capacity__gte: int | None = None
+    capacity__lte: int | None = None
+    address_prefix: str | None = None
+    search: str | None = None
+
+    class Constants(Filter.Constants):
+        model = Room
+
+    @property
+    def filtering_fields(self):
+        return [(name, value) for name, value in super().filtering_fields if name not in ("address_prefix", "search")]
+
+    def filter(self, query: Select) -> Select:
+        query = super().filter(query)
+        if self.address_prefix:
+            # ILIKE so the trigram index serves it whatever the collation
+            query = query.where(Room.address.ilike(f"{escape_like(self.address_prefix)}%", escape="\\"))
+        return query
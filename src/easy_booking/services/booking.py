@@ -1,69 +1,390 @@
+from collections.abc import AsyncIterator, Iterable
+from datetime import datetime, timedelta
+from heapq import merge
+from itertools import islice
+from operator import attrgetter
 from uuid import UUID
 
+from fastapi import HTTPException, status
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from easy_booking.daos import booking, room
-from easy_booking.exceptions.booking import BookingNotFound
-from easy_booking.exceptions.room import RoomNotFound, RoomUnavailable
+from easy_booking.cache import slot_cache
+from easy_booking.daos import booking, booking_series, room
+from easy_booking.exceptions.booking import BATCHREJECTED, BookingNotFound, InvalidPeriod, UnknownField
+from easy_booking.exceptions.room import ALREADYBOOKED, RoomNotFound, RoomUnavailable
+from easy_booking.models.booking import BookingStatus
 from easy_booking.models.room import RoomStatus
 from easy_booking.models.user import User
-from easy_booking.schemas.booking import BookingIn, BookingOut, BookingPatch
-from easy_booking.schemas.page import Page
+from easy_booking.schemas.booking import (
+    BOOKING_EXPANDS,
+    BOOKING_FIELDS,
+    BookingBulkIn,
+    BookingBulkOut,
+    BookingBulkResult,
+    BookingIn,
+    BookingOut,
+    BookingPatch,
+    Slot,
+    booking_view,
+)
+from easy_booking.schemas.booking_series import Occurrence
+from easy_booking.schemas.page import ExportFormat, Page, TotalMode
+from easy_booking.settings import settings
+from easy_booking.streams import booking_broadcaster
+from easy_booking.recurrence import occurrences
+from easy_booking.utils import as_utc, claim_interval, encode_rows, free_intervals, merge_intervals
+
+
+def _selection(
+    fields: Iterable[str] | None, expand: Iterable[str]
+) -> tuple[frozenset[str] | None, frozenset[str]]:
+    """Check the requested booking fields and relationships, as hashable sets for booking_view()."""
+    fields = None if fields is None else frozenset(fields)
+    expand = frozenset(expand)
+    unknown = ((fields or frozenset()) - set(BOOKING_FIELDS)) | (expand - set(BOOKING_EXPANDS))
+    if unknown:
+        raise UnknownField(", ".join(sorted(unknown)))
+    return fields, expand
 
 
 class BookingService:
 
     @staticmethod
-    async def add_booking(booking_data:BookingIn, session:AsyncSession, user_id:UUID):
+    async def _check_bookable(
+        room_id: UUID,
+        start_time: datetime,
+        end_time: datetime,
+        session: AsyncSession,
+        exclude_id: UUID | None = None,
+    ) -> None:
+        """
+        Lock the room, then check it can take the booking.
+
+        The lock is held until the booking is committed, so concurrent writers
+        on the same room queue up behind the check. On refusal it is released
+        right away.
+        """
+        # A reversed period would reach PostgreSQL as an invalid tstzrange
+        if as_utc(end_time) <= as_utc(start_time):
+            raise InvalidPeriod
         room_dao = room.RoomDao(session)
-        _room = await room_dao.get_by_id(booking_data.room_id)
-        if not _room:
-            raise RoomNotFound
-        if _room.status != RoomStatus.AVAILABLE:
-            raise RoomUnavailable(_room.status.value)
-        
-        if await booking.BookingDao(session).check_overlapping_bookings(booking_data.room_id, booking_data.start_time, booking_data.end_time):
-             raise RoomUnavailable("Room is already booked for this time period")
-        
+        locked = await room_dao.lock((room_id,))
+        try:
+            _room = await room_dao.get_by_id(room_id)
+            if not _room:
+                raise RoomNotFound
+            if _room.status != RoomStatus.AVAILABLE:
+                raise RoomUnavailable(_room.status.value)
+
+            if settings.booking_overlap_precheck or locked:
+                conflict = await booking.BookingDao(session).check_overlapping_bookings(
+                    room_id, start_time, end_time, exclude_id=exclude_id
+                )
+            else:
+                # The exclusion constraint only guards stored rows, not series occurrences
+                conflict = await booking_series.BookingSeriesDao(session).has_overlapping_occurrence(
+                    room_id, start_time, end_time
+                )
+            if conflict:
+                raise RoomUnavailable(ALREADYBOOKED)
+        except HTTPException:
+            if locked:
+                await session.rollback()
+            raise
+
+    @staticmethod
+    async def add_booking(booking_data:BookingIn, session:AsyncSession, user_id:UUID):
+        await BookingService._check_bookable(
+            booking_data.room_id, booking_data.start_time, booking_data.end_time, session
+        )
+
         booking_dict = booking_data.model_dump()
         booking_dict["user_id"] = user_id
         new_booking = await booking.BookingDao(session).create(booking_dict)
         logger.info(f"New booking created successfully: {new_booking}")
         return new_booking
-    
+
     @staticmethod
-    async def get_all_booking(offset:int, limit:int, session:AsyncSession, user: User | None = None) -> Page[BookingOut]:
+    async def add_bookings(bulk: BookingBulkIn, session:AsyncSession, user_id:UUID) -> BookingBulkOut:
+        """
+        Create a batch of bookings, reporting the outcome of every item.
+
+        Rooms and existing bookings are fetched with one query each, conflicts
+        with the database and inside the batch are resolved in memory (earlier
+        items win) and the accepted items are written with one multi-row
+        INSERT. With `atomic` nothing is created unless every item is accepted.
+        """
+        results = [BookingBulkResult(index=index, status_code=0) for index in range(len(bulk.items))]
+
+        def reject(index: int, error: HTTPException) -> None:
+            results[index].status_code = error.status_code
+            results[index].detail = error.detail
+
+        periods = {}
+        for index, item in enumerate(bulk.items):
+            start_time, end_time = as_utc(item.start_time), as_utc(item.end_time)
+            if end_time <= start_time:
+                reject(index, InvalidPeriod())
+            else:
+                periods[index] = (item.room_id, start_time, end_time)
+
+        room_dao = room.RoomDao(session)
+        room_ids = {room_id for room_id, _, _ in periods.values()}
+        locked = await room_dao.lock(room_ids)
+        rooms = {_room.id: _room for _room in await room_dao.get_by_ids(room_ids)}
+        windows = {}
+        for index, (room_id, start_time, end_time) in periods.items():
+            if room_id not in rooms:
+                reject(index, RoomNotFound())
+            elif rooms[room_id].status != RoomStatus.AVAILABLE:
+                reject(index, RoomUnavailable(rooms[room_id].status.value))
+            else:
+                window_start, window_end = windows.get(room_id, (start_time, end_time))
+                windows[room_id] = (min(window_start, start_time), max(window_end, end_time))
+
+        booking_dao = booking.BookingDao(session)
+        busy = await booking_dao.get_busy_intervals_by_room(windows)
+        taken = {
+            room_id: merge_intervals((as_utc(busy_start), as_utc(busy_end)) for busy_start, busy_end in intervals)
+            for room_id, intervals in busy.items()
+        }
+        accepted = []
+        for index, (room_id, start_time, end_time) in periods.items():
+            if results[index].status_code:
+                continue
+            if claim_interval(taken[room_id], start_time, end_time):
+                accepted.append(index)
+            else:
+                reject(index, RoomUnavailable(ALREADYBOOKED))
+
+        if bulk.atomic and len(accepted) < len(bulk.items):
+            for index in accepted:
+                results[index].status_code = status.HTTP_409_CONFLICT
+                results[index].detail = BATCHREJECTED
+            accepted = []
+
+        rows = [{**bulk.items[index].model_dump(), "user_id": user_id} for index in accepted]
+        if not rows:
+            if locked:
+                await session.rollback()
+            return BookingBulkOut(created=0, results=results)
+        try:
+            created = await booking_dao.create_many(rows)
+        except RoomUnavailable:
+            # Without a room lock a concurrent writer can get in between the check and the insert
+            if bulk.atomic:
+                raise
+            created = []
+            for index, row in zip(accepted, rows):
+                try:
+                    created.append(await booking_dao.create(row))
+                except RoomUnavailable as err:
+                    reject(index, err)
+            accepted = [index for index in accepted if not results[index].status_code]
+
+        for index, _booking in zip(accepted, created):
+            results[index].status_code = status.HTTP_201_CREATED
+            results[index].booking = BookingOut.model_validate(_booking)
+        logger.info(f"Bulk booking: {len(created)} of {len(bulk.items)} created")
+        return BookingBulkOut(created=len(created), results=results)
+
+    @staticmethod
+    async def get_all_booking(
+        offset:int,
+        limit:int,
+        session:AsyncSession,
+        user: User | None = None,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+        fields: Iterable[str] | None = None,
+        expand: Iterable[str] = BOOKING_EXPANDS,
+    ) -> Page[BookingOut]:
+        """
+        Page of bookings, restricted to `fields` and the relationships of
+        `expand` in both the query and the items (see booking_view).
+        """
+        fields, expand = _selection(fields, expand)
         user_id = None
         if user and not user.is_superuser:
             user_id = user.id
             
-        all_booking = await booking.BookingDao(session).get_all(offset=offset, limit=limit, user_id=user_id)
-        return Page(
-            total = await booking.BookingDao(session).count(user_id=user_id),
-            items=[BookingOut.model_validate(_booking) for _booking in all_booking],
+        booking_dao = booking.BookingDao(session)
+        all_booking, booking_total = await booking_dao.get_page(
+            offset=offset, limit=limit, user_id=user_id, cursor=cursor, total=total, fields=fields, expand=expand
+        )
+        return Page[booking_view(fields, expand)].from_rows(
+            all_booking,
             offset=offset,
             limit=limit,
+            total=booking_total,
+            next_cursor=booking_dao.encode_cursor(all_booking[-1]) if all_booking and len(all_booking) == limit else None,
         )
     
     @staticmethod
-    async def get_by_id(booking_id:UUID, session:AsyncSession) -> BookingOut | None :
-        _booking = await booking.BookingDao(session).get_by_id(booking_id)
+    def export_bookings(
+        session: AsyncSession,
+        export_format: ExportFormat = ExportFormat.NDJSON,
+        user: User | None = None,
+        start_time: datetime | None = None,
+        end_time: datetime | None = None,
+        room_id: UUID | None = None,
+        status: BookingStatus | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Encoded bookings overlapping [start_time, end_time), either bound may
+        be omitted. The filters are checked here, before the first chunk.
+        """
+        start_time = as_utc(start_time) if start_time else None
+        end_time = as_utc(end_time) if end_time else None
+        if start_time and end_time and end_time <= start_time:
+            raise InvalidPeriod
+        user_id = None
+        if user and not user.is_superuser:
+            user_id = user.id
+        partitions = booking.BookingDao(session).stream(
+            start_time=start_time, end_time=end_time, room_id=room_id, status=status, user_id=user_id
+        )
+        return encode_rows(partitions, booking_view(None, frozenset()), export_format)
+
+    @staticmethod
+    def stream_changes(user: User | None = None, room_id: UUID | None = None) -> AsyncIterator[str]:
+        """
+        SSE messages of the booking changes, on `room_id` only when given.
+
+        The stream of all rooms carries the user's own bookings only, unless
+        they are a superuser.
+        """
+        user_id = None
+        if room_id is None and user and not user.is_superuser:
+            user_id = user.id
+        return booking_broadcaster.stream(room_id=room_id, user_id=user_id)
+
+    @staticmethod
+    async def get_occurrences(
+        start_time: datetime,
+        end_time: datetime,
+        session: AsyncSession,
+        room_id: UUID | None = None,
+        user: User | None = None,
+        limit: int = 100,
+    ) -> list[Occurrence]:
+        """
+        Bookings and series occurrences overlapping the window, ordered by start.
+
+        Each series is expanded lazily and merged with the stored bookings, so
+        only the first `limit` occurrences are ever built.
+        """
+        start_time, end_time = as_utc(start_time), as_utc(end_time)
+        if end_time <= start_time:
+            raise InvalidPeriod
+        user_id = None
+        if user and not user.is_superuser:
+            user_id = user.id
+
+        stored = (
+            Occurrence(
+                room_id=_booking.room_id,
+                user_id=_booking.user_id,
+                start_time=as_utc(_booking.start_time),
+                end_time=as_utc(_booking.end_time),
+                status=_booking.status,
+                booking_id=_booking.id,
+            )
+            for _booking in await booking.BookingDao(session).get_in_window(
+                start_time, end_time, room_id=room_id, user_id=user_id, limit=limit
+            )
+        )
+        all_series = await booking_series.BookingSeriesDao(session).get_overlapping(
+            start_time, end_time, room_ids=(room_id,) if room_id else None, user_id=user_id
+        )
+
+        def expand(_series):
+            for occurrence_start, occurrence_end in occurrences(_series, start_time, end_time):
+                yield Occurrence(
+                    room_id=_series.room_id,
+                    user_id=_series.user_id,
+                    start_time=occurrence_start,
+                    end_time=occurrence_end,
+                    status=_series.status,
+                    series_id=_series.id,
+                )
+
+        virtual = [expand(_series) for _series in all_series]
+        return list(islice(merge(stored, *virtual, key=attrgetter("start_time")), limit))
+
+    @staticmethod
+    async def get_by_id(
+        booking_id:UUID,
+        session:AsyncSession,
+        fields: Iterable[str] | None = None,
+        expand: Iterable[str] = BOOKING_EXPANDS,
+    ) -> BookingOut:
+        fields, expand = _selection(fields, expand)
+        _booking = await booking.BookingDao(session).get_by_id(booking_id, fields=fields, expand=expand)
         if not _booking:
             raise BookingNotFound
-        return _booking
+        return booking_view(fields, expand).model_validate(_booking)
     
     @staticmethod
     async def update_by_id(booking_id: UUID, booking_patch:BookingPatch, session:AsyncSession) -> BookingPatch:
-        _booking = await booking.BookingDao(session).get_by_id(booking_id)
+        booking_dao = booking.BookingDao(session)
+        booking_data = booking_patch.model_dump(exclude_unset=True)
+        if booking_data.keys() & {"room_id", "start_time", "end_time", "status"}:
+            _booking = await booking_dao.get_by_id(booking_id)
+            if not _booking:
+                raise BookingNotFound
+            period = {
+                key: booking_data.get(key, getattr(_booking, key)) for key in ("room_id", "start_time", "end_time")
+            }
+            if as_utc(period["end_time"]) <= as_utc(period["start_time"]):
+                raise InvalidPeriod
+            new_status = booking_data.get("status", _booking.status)
+            moved = period["room_id"] != _booking.room_id or any(
+                as_utc(period[key]) != as_utc(getattr(_booking, key)) for key in ("start_time", "end_time")
+            )
+            reactivated = _booking.status == BookingStatus.CANCELLED and new_status != BookingStatus.CANCELLED
+            if new_status != BookingStatus.CANCELLED and (moved or reactivated):
+                await BookingService._check_bookable(**period, session=session, exclude_id=booking_id)
+
+        _booking = await booking_dao.update_by_id(booking_id, booking_data)
         if not _booking:
             raise BookingNotFound
-        for key,value in booking_patch.model_dump(exclude_unset=True).items():
-            setattr(_booking, key, value)
-        await session.commit()
-        _booking = await booking.BookingDao(session).get_by_id(booking_id)
         return _booking
     
+    @staticmethod
+    async def get_free_slots(
+        room_id: UUID,
+        start_time: datetime,
+        end_time: datetime,
+        session: AsyncSession,
+        min_length: timedelta = timedelta(0),
+    ) -> list[Slot]:
+        start_time, end_time = as_utc(start_time), as_utc(end_time)
+        if end_time <= start_time:
+            raise InvalidPeriod
+        key = (room_id, start_time, end_time, min_length)
+        slots = slot_cache.get(key)
+        if slots is not None:
+            return list(slots)
+
+        generation = slot_cache.generation(room_id)
+        if not await room.RoomDao(session).get_by_id(room_id):
+            raise RoomNotFound
+        busy = await booking.BookingDao(session).get_busy_intervals(room_id, start_time, end_time)
+        slots = [
+            Slot(start_time=slot_start, end_time=slot_end)
+            for slot_start, slot_end in free_intervals(
+                ((as_utc(busy_start), as_utc(busy_end)) for busy_start, busy_end in busy),
+                start_time,
+                end_time,
+                min_length,
+            )
+        ]
+        # Skipped if a booking of the room changed while the intervals were read
+        slot_cache.set(key, tuple(slots), tag=room_id, generation=generation)
+        return slots
+    
     @staticmethod
     async def delete_by_id(booking_id:UUID, session:AsyncSession) -> None:
         _booking = await booking.BookingDao(session).delete_by_id(booking_id)
@@ -0,0 +1,121 @@
+from uuid import UUID
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from easy_booking.daos import booking, booking_series, room
+from easy_booking.exceptions.booking import InvalidPeriod
+from easy_booking.exceptions.booking_series import (
+    EMPTYSERIES,
+    TOOMANYOCCURRENCES,
+    UNBOUNDED,
+    UNKNOWNTIMEZONE,
+    BookingSeriesNotFound,
+    InvalidRecurrence,
+)
+from easy_booking.exceptions.room import ALREADYBOOKED, RoomNotFound, RoomUnavailable
+from easy_booking.models.room import RoomStatus
+from easy_booking.models.user import User
+from easy_booking.recurrence import occurrence_total, occurrences, series_end
+from easy_booking.schemas.booking_series import BookingSeriesIn, BookingSeriesOut
+from easy_booking.schemas.page import Page, TotalMode
+from easy_booking.settings import settings
+from easy_booking.utils import as_utc, claim_interval, merge_intervals
+
+
+class BookingSeriesService:
+
+    @staticmethod
+    async def add_series(series_data:BookingSeriesIn, session:AsyncSession, user_id:UUID):
+        if as_utc(series_data.end_time) <= as_utc(series_data.start_time):
+            raise InvalidPeriod
+        try:
+            ZoneInfo(series_data.time_zone)
+        except (ValueError, ZoneInfoNotFoundError):
+            raise InvalidRecurrence(UNKNOWNTIMEZONE)
+        if series_data.until is None and series_data.count is None:
+            raise InvalidRecurrence(UNBOUNDED)
+        total = occurrence_total(series_data)
+        if not total:
+            raise InvalidRecurrence(EMPTYSERIES)
+        if total > settings.booking_series_max_occurrences:
+            raise InvalidRecurrence(TOOMANYOCCURRENCES.format(settings.booking_series_max_occurrences))
+
+        room_dao = room.RoomDao(session)
+        locked = await room_dao.lock((series_data.room_id,))
+        try:
+            _room = await room_dao.get_by_id(series_data.room_id)
+            if not _room:
+                raise RoomNotFound
+            if _room.status != RoomStatus.AVAILABLE:
+                raise RoomUnavailable(_room.status.value)
+
+            # Stored bookings and other series are fetched once for the whole span,
+            # the occurrences are then checked against them (and each other) in memory
+            start_time, ends_at = as_utc(series_data.start_time), series_end(series_data)
+            busy = await booking.BookingDao(session).get_busy_intervals(series_data.room_id, start_time, ends_at)
+            taken = merge_intervals((as_utc(busy_start), as_utc(busy_end)) for busy_start, busy_end in busy)
+            for occurrence_start, occurrence_end in occurrences(series_data, start_time, ends_at, total=total):
+                if not claim_interval(taken, occurrence_start, occurrence_end):
+                    raise RoomUnavailable(ALREADYBOOKED)
+        except HTTPException:
+            if locked:
+                await session.rollback()
+            raise
+
+        series_dict = series_data.model_dump()
+        # Stored in UTC, the wall time is rebuilt from time_zone when expanding
+        for key in ("start_time", "end_time", "until"):
+            if series_dict[key] is not None:
+                series_dict[key] = as_utc(series_dict[key])
+        series_dict["user_id"] = user_id
+        series_dict["ends_at"] = ends_at
+        new_series = await booking_series.BookingSeriesDao(session).create(series_dict)
+        logger.info(f"New booking series created successfully: {new_series}")
+        return new_series
+
+    @staticmethod
+    async def get_all_series(
+        offset:int,
+        limit:int,
+        session:AsyncSession,
+        user: User | None = None,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+    ) -> Page[BookingSeriesOut]:
+        user_id = None
+        if user and not user.is_superuser:
+            user_id = user.id
+
+        series_dao = booking_series.BookingSeriesDao(session)
+        all_series, series_total = await series_dao.get_page(
+            offset=offset, limit=limit, user_id=user_id, cursor=cursor, total=total
+        )
+        return Page[BookingSeriesOut].from_rows(
+            all_series,
+            offset=offset,
+            limit=limit,
+            total=series_total,
+            next_cursor=series_dao.encode_cursor(all_series[-1]) if all_series and len(all_series) == limit else None,
+        )
+
+    @staticmethod
+    async def get_by_id(series_id:UUID, session:AsyncSession) -> BookingSeriesOut | None:
+        _series = await booking_series.BookingSeriesDao(session).get_by_id(series_id)
+        if not _series:
+            raise BookingSeriesNotFound
+        return _series
+
+    @staticmethod
+    async def delete_by_id(series_id:UUID, session:AsyncSession) -> None:
+        _series = await booking_series.BookingSeriesDao(session).delete_by_id(series_id)
+        if not _series:
+            raise BookingSeriesNotFound
+        return _series
+
+    @staticmethod
+    async def delete_all(session:AsyncSession) -> None:
+        await booking_series.BookingSeriesDao(session).delete_all()
+        return []
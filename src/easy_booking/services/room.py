@@ -1,12 +1,20 @@
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable, Iterable
+from datetime import datetime
+from itertools import islice
 from uuid import UUID
 
 from loguru import logger
+from pydantic import BaseModel, TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from easy_booking.cache import room_cache
 from easy_booking.daos import room
+from easy_booking.exceptions.booking import InvalidPeriod
 from easy_booking.exceptions.room import RoomNotFound
-from easy_booking.schemas.room import RoomIn, RoomOut, RoomPatch
-from easy_booking.schemas.page import Page
+from easy_booking.schemas.room import RoomFilter, RoomIn, RoomOut, RoomPatch, RoomSort, RoomStatus
+from easy_booking.schemas.page import ExportFormat, ImportReport, Page, TotalMode
+from easy_booking.settings import settings
+from easy_booking.utils import as_utc, decode_rows, encode_rows, etag, validate_rows
 
 
 class RoomService:
@@ -18,13 +26,137 @@ class RoomService:
         return new_room
     
     @staticmethod
-    async def get_all_room(offset:int, limit:int, session:AsyncSession) -> Page[RoomOut]:
-        all_room = await room.RoomDao(session).get_all(offset=offset, limit=limit)
-        return Page(
-            total = await room.RoomDao(session).count(),
-            items=[RoomOut.model_validate(_room) for _room in all_room],
+    async def get_all_room(
+        offset:int,
+        limit:int,
+        session:AsyncSession,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+        filters: RoomFilter | None = None,
+        sort: RoomSort = RoomSort.NAME,
+    ) -> Page[RoomOut]:
+        room_dao = room.RoomDao(session, sort=sort)
+        all_room, room_total = await room_dao.get_page(
+            offset=offset, limit=limit, cursor=cursor, total=total, filters=filters
+        )
+        return Page[RoomOut].from_rows(
+            all_room,
             offset=offset,
             limit=limit,
+            total=room_total,
+            next_cursor=room_dao.encode_cursor(all_room[-1]) if all_room and len(all_room) == limit else None,
+        )
+    
+    @staticmethod
+    async def get_all_room_json(
+        offset:int,
+        limit:int,
+        session:AsyncSession,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+        filters: RoomFilter | None = None,
+        sort: RoomSort = RoomSort.NAME,
+    ) -> tuple[str, bytes]:
+        """Page of get_all_room() as JSON with its ETag, through the room cache."""
+        return await RoomService._cached(
+            ("page", offset, limit, cursor, total, filters.model_dump_json() if filters else None, sort),
+            lambda: RoomService.get_all_room(
+                offset=offset, limit=limit, session=session, cursor=cursor, total=total, filters=filters, sort=sort
+            ),
+        )
+
+    @staticmethod
+    async def get_by_id_json(room_id:UUID, session:AsyncSession) -> tuple[str, bytes]:
+        """Room of get_by_id() as JSON with its ETag, through the room cache."""
+        async def load() -> RoomOut:
+            return RoomOut.model_validate(await RoomService.get_by_id(room_id, session))
+
+        return await RoomService._cached(("room", room_id), load)
+
+    @staticmethod
+    async def _cached(key: Hashable, load: Callable[[], Awaitable[BaseModel]]) -> tuple[str, bytes]:
+        """
+        Cached (ETag, JSON body) of `key`, loaded and serialized on a miss.
+
+        Room writes clear the cache, in every worker, once committed. The
+        version read before loading keeps a body loaded across such a write
+        from being stored. The ETag hashes the body, so the workers agree on it.
+        """
+        cached = room_cache.get(key)
+        if cached is not None:
+            return cached
+        version = room_cache.generation()
+        body = (await load()).model_dump_json().encode()
+        cached = (etag(body), body)
+        room_cache.set(key, cached, generation=version)
+        return cached
+
+    @staticmethod
+    def export_rooms(
+        session: AsyncSession,
+        export_format: ExportFormat = ExportFormat.NDJSON,
+        status: RoomStatus | None = None,
+        min_capacity: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        partitions = room.RoomDao(session).stream(status=status, min_capacity=min_capacity)
+        return encode_rows(partitions, RoomOut, export_format)
+
+    @staticmethod
+    async def import_rooms(
+        session: AsyncSession,
+        lines: Iterable[str],
+        import_format: ExportFormat = ExportFormat.NDJSON,
+        chunk_size: int = settings.import_chunk_size,
+    ) -> ImportReport:
+        """
+        Load rooms from CSV or NDJSON lines, `chunk_size` rows at a time.
+
+        Each chunk is validated against RoomIn in one call and inserted in one
+        round trip. Invalid lines are reported and skipped, the valid rooms are
+        committed together at the end.
+        """
+        room_dao = room.RoomDao(session)
+        adapter = TypeAdapter(list[RoomIn])
+        report = ImportReport()
+        rows = decode_rows(lines, import_format)
+        while chunk := list(islice(rows, chunk_size)):
+            rooms, errors = validate_rows(chunk, adapter)
+            report.imported += await room_dao.bulk_create(adapter.dump_python(rooms))
+            report.errors.extend(errors)
+        await session.commit()
+        logger.info(f"{report.imported} rooms imported, {len(report.errors)} lines rejected")
+        return report
+
+    @staticmethod
+    async def get_available_rooms(
+        start_time: datetime,
+        end_time: datetime,
+        session: AsyncSession,
+        min_capacity: int = 1,
+        offset: int = 0,
+        limit: int = 10,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+    ) -> Page[RoomOut]:
+        start_time, end_time = as_utc(start_time), as_utc(end_time)
+        if end_time <= start_time:
+            raise InvalidPeriod
+        room_dao = room.RoomDao(session)
+        available_rooms, room_total = await room_dao.get_available(
+            start_time,
+            end_time,
+            min_capacity=min_capacity,
+            offset=offset,
+            limit=limit,
+            cursor=cursor,
+            total=total,
+        )
+        return Page[RoomOut].from_rows(
+            available_rooms,
+            offset=offset,
+            limit=limit,
+            total=room_total,
+            next_cursor=room_dao.encode_cursor(available_rooms[-1]) if available_rooms and len(available_rooms) == limit else None,
         )
     
     @staticmethod
@@ -36,11 +168,13 @@ class RoomService:
     
     @staticmethod
     async def update_by_id(room_id: UUID, room_patch:RoomPatch, session:AsyncSession) -> RoomPatch:
-        _room = await room.RoomDao(session).get_by_id(room_id)
+        room_dao = room.RoomDao(session)
+        _room = await room_dao.get_by_id(room_id)
         if not _room:
             raise RoomNotFound
         for key,value in room_patch.model_dump(exclude_unset=True).items():
             setattr(_room, key, value)
+        room_dao.publish_change(room_id, room_id=room_id)
         await session.commit()
         return _room
     
@@ -1,13 +1,21 @@
+from typing import Any
 from uuid import UUID
 
-from fastapi_users import BaseUserManager, UUIDIDMixin
+from fastapi import Request
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users import BaseUserManager, UUIDIDMixin, exceptions
+from fastapi_users.db import BaseUserDatabase
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from easy_booking.auth.password import AsyncPasswordHelper, password_helper
+from easy_booking.cache import user_cache
+from easy_booking.events import ChangeEvent, publish
 from easy_booking.daos import user
 from easy_booking.exceptions.user import UserNotFound
 from easy_booking.models.user import User
-from easy_booking.schemas.page import Page
+from easy_booking.schemas.page import Page, TotalMode
 from easy_booking.schemas.user import UserCreate, UserOut, UserRead
 from easy_booking.settings import settings
 
@@ -15,6 +23,90 @@ from easy_booking.settings import settings
 class UserService(UUIDIDMixin, BaseUserManager[User, UUID]):
     reset_password_token_secret = settings.secret_key.get_secret_value()
     verification_token_secret = settings.secret_key.get_secret_value()
+    password_helper: AsyncPasswordHelper
+
+    def __init__(
+        self, user_db: BaseUserDatabase[User, UUID], password_helper: AsyncPasswordHelper = password_helper
+    ) -> None:
+        super().__init__(user_db, password_helper)
+
+    async def create(self, user_create: UserCreate, safe: bool = False, request: Request | None = None) -> User:
+        """Same as BaseUserManager.create, with the password hashed off the event loop."""
+        await self.validate_password(user_create.password, user_create)
+        if await self.user_db.get_by_email(user_create.email) is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = user_create.create_update_dict() if safe else user_create.create_update_dict_superuser()
+        user_dict["hashed_password"] = await self.password_helper.hash_async(user_dict.pop("password"))
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def authenticate(self, credentials: OAuth2PasswordRequestForm) -> User | None:
+        """
+        Same as BaseUserManager.authenticate, with the password verified off the event loop.
+
+        Hashes made with another algorithm or cost than the configured ones
+        are replaced on a successful login.
+        """
+        try:
+            _user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Hash anyway so an unknown email takes as long as a wrong password
+            await self.password_helper.hash_async(credentials.password)
+            return None
+
+        verified, updated_password_hash = await self.password_helper.verify_and_update_async(
+            credentials.password, _user.hashed_password
+        )
+        if not verified:
+            return None
+        if updated_password_hash is not None:
+            await self.user_db.update(_user, {"hashed_password": updated_password_hash})
+            await self._publish_change(_user.id)
+        return _user
+
+    async def _update(self, user: User, update_dict: dict[str, Any]) -> User:
+        password = update_dict.get("password")
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict = {key: value for key, value in update_dict.items() if key != "password"}
+            update_dict["hashed_password"] = await self.password_helper.hash_async(password)
+        return await super()._update(user, update_dict)
+
+    async def get(self, id: UUID) -> User:
+        """
+        Get a user by id, through the user cache.
+
+        Called on every authenticated request once the token is decoded. The
+        cache keeps the column values only, a hit is rebuilt as a User merged
+        into the request session without loading it.
+        """
+        values = user_cache.get(id)
+        if values is not None:
+            _user = User(**values)
+            make_transient_to_detached(_user)
+            return await self.user_db.session.merge(_user, load=False)
+        generation = user_cache.generation(id)
+        _user = await super().get(id)
+        user_cache.set(
+            id,
+            {column.key: getattr(_user, column.key) for column in User.__table__.columns},
+            tag=id,
+            generation=generation,
+        )
+        return _user
+
+    async def on_after_update(self, user: User, update_dict: dict[str, Any], request: Request | None = None) -> None:
+        await self._publish_change(user.id)
+
+    async def on_after_delete(self, user: User, request: Request | None = None) -> None:
+        await self._publish_change(user.id)
+
+    async def _publish_change(self, user_id: UUID) -> None:
+        """Evict the user in every worker, once the user database has committed its change"""
+        publish(self.user_db.session, ChangeEvent(table=User.__tablename__, id=user_id))
+        await self.user_db.session.commit()
 
     @staticmethod
     async def add_user(user_data: UserCreate, session: AsyncSession):
@@ -24,14 +116,21 @@ class UserService(UUIDIDMixin, BaseUserManager[User, UUID]):
         return new_user
 
     @staticmethod
-    async def get_all(offset: int, limit: int, session: AsyncSession) -> Page[UserRead]:
+    async def get_all(
+        offset: int,
+        limit: int,
+        session: AsyncSession,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.EXACT,
+    ) -> Page[UserRead]:
         dao = user.UserDao(session)
-        users = await dao.get_all(offset=offset, limit=limit)
-        return Page(
-            total=await dao.count(),
-            items=[UserRead.model_validate(u) for u in users],
+        users, users_total = await dao.get_page(offset=offset, limit=limit, cursor=cursor, total=total)
+        return Page[UserRead].from_rows(
+            users,
             offset=offset,
             limit=limit,
+            total=users_total,
+            next_cursor=dao.encode_cursor(users[-1]) if users and len(users) == limit else None,
         )
 
     @staticmethod
@@ -48,19 +147,23 @@ class UserService(UUIDIDMixin, BaseUserManager[User, UUID]):
 
     @staticmethod
     async def update_by_id(user_id: UUID, user_patch: UserCreate, session: AsyncSession) -> UserRead:
-        _user = await user.UserDao(session).get_by_id(user_id)
+        user_dao = user.UserDao(session)
+        _user = await user_dao.get_by_id(user_id)
         if not _user:
             raise UserNotFound
         for key, value in user_patch.model_dump(exclude_unset=True).items():
             setattr(_user, key, value)
+        user_dao.publish_change(user_id)
         await session.commit()
         return _user
 
     @staticmethod
     async def delete_by_id(user_id: UUID, session: AsyncSession) -> UserOut:
-        _user = await user.UserDao(session).get_by_id(user_id)
+        user_dao = user.UserDao(session)
+        _user = await user_dao.get_by_id(user_id)
         if not _user:
             raise UserNotFound
         await session.delete(_user)
+        user_dao.publish_change(user_id)
         await session.commit()
         return _user
\ No newline at end of file
@@ -14,21 +14,101 @@ class LogLevel(str, Enum):
     TRACE = "trace"
 
 
+class RoomLock(str, Enum):
+    ADVISORY = "advisory"
+    ROW = "row"
+    NONE = "none"
+
+
+class PasswordAlgorithm(str, Enum):
+    ARGON2 = "argon2"
+    BCRYPT = "bcrypt"
+
+
 class Settings(BaseSettings):
 
     database_uri: PostgresDsn
+    database_echo: bool = False
+    database_pool_size: int = Field(default=5, ge=1)
+    database_max_overflow: int = Field(default=10, ge=0)
+    database_pool_timeout: float = 30
+    database_pool_recycle: int = 1800
+    database_pool_pre_ping: bool = True
+    database_statement_cache_size: int = Field(default=100, ge=0)
+    database_command_timeout: float | None = 60
+    database_server_settings: dict[str, str] = {}
+    # PgBouncer in transaction mode can't keep prepared statements across transactions
+    database_pgbouncer: bool = False
+    # Read-only routes are spread over these, the primary takes them while none is up
+    database_replica_uris: list[PostgresDsn] = []
+    database_replica_check_interval: float = Field(default=5, gt=0)
+    database_replica_check_timeout: float = Field(default=2, gt=0)
+    database_replica_retry_after: float = Field(default=30, gt=0)
 
     secret_key: SecretStr
     token_lifetime_in_seconds: int = 3600
     algorithm: str
     date_format: str
 
+    # New hashes use this algorithm, the other one is still verified and rehashed on login
+    password_hash_algorithm: PasswordAlgorithm = PasswordAlgorithm.ARGON2
+    password_argon2_time_cost: int = Field(default=3, ge=1)
+    password_argon2_memory_cost: int = Field(default=65536, ge=8)
+    password_bcrypt_rounds: int = Field(default=12, ge=4, le=31)
+    # Threads hashing and verifying passwords off the event loop, per worker
+    password_hash_workers: int = Field(default=4, ge=1)
+
     host: str = "127.0.0.1"
     port: int = Field(default=8000, gt=0, lt=65535)
     workers: int | None = None
     proxy_headers: bool = False
     log_level: LogLevel = LogLevel.INFO
 
+    # Disable once the bookings_no_overlap constraint is migrated, it then guards conflicts on insert
+    booking_overlap_precheck: bool = True
+    # How booking writes on a room are serialized across workers (PostgreSQL only)
+    booking_room_lock: RoomLock = RoomLock.ADVISORY
+
+    # Upper bound on the occurrences of one booking series
+    booking_series_max_occurrences: int = Field(default=730, ge=1)
+
+    slot_cache_size: int = Field(default=4096, ge=1)
+    slot_cache_ttl: float | None = 300
+    # Authenticated users, kept short as the workers may miss invalidations while reconnecting
+    user_cache_size: int = Field(default=1024, ge=1)
+    user_cache_ttl: float | None = 60
+    # Serialized room pages and rooms, cleared on every room write
+    room_cache_size: int = Field(default=1024, ge=1)
+    room_cache_ttl: float | None = 300
+
+    # PostgreSQL NOTIFY channel the workers evict each other's cache entries through
+    cache_invalidation_channel: str = "easy_booking_changes"
+    cache_invalidation_retry_interval: float = Field(default=5, gt=0)
+
+    # Messages buffered per event stream client, a client falling further behind is dropped
+    events_queue_size: int = Field(default=100, ge=1)
+    # Seconds between the keep-alive comments of an idle event stream
+    events_keepalive: float = Field(default=15, gt=0)
+
+    # Complete the ended bookings in every app worker, only in `easy_booking worker` when false
+    booking_completion_in_app: bool = True
+    # Seconds between two runs of the booking completion
+    booking_completion_interval: float = Field(default=60, gt=0)
+    # Bookings completed per transaction, larger batches hold their row locks longer
+    booking_completion_batch_size: int = Field(default=500, ge=1)
+
+    # Rows validated and loaded per round trip by the bulk imports
+    import_chunk_size: int = Field(default=5000, ge=1)
+
+    # Bucket bounds in seconds of the latency histograms exposed at /metrics
+    metrics_buckets: list[float] = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+    # Send the timings of each request back in a Server-Timing header
+    server_timing: bool = True
+    # Log the slow statements and the requests repeating a statement (N+1), parameters are never logged
+    query_log: bool = False
+    query_log_slow_ms: float = Field(default=200, ge=0)
+    query_log_similar_statements: int = Field(default=10, ge=1)
+
     model_config = SettingsConfigDict(env_file=(".env", ".env.local", ".env.prod"), extra="ignore")
 
 
@@ -0,0 +1,122 @@
+"""
+Server-Sent Events streams of the booking changes.
+
+One BookingBroadcaster per worker subscribes to the change events, the
+committed writes of this worker and those notified by the others, and
+fans each booking delta out to the streams interested in it.
+"""
+import asyncio
+from collections.abc import AsyncIterator
+from uuid import UUID
+
+from fastapi.responses import StreamingResponse
+from loguru import logger
+
+from easy_booking.events import ALL, ChangeAction, ChangeEvent, bus
+from easy_booking.models.booking import Booking
+from easy_booking.schemas.booking import BookingDelta, BookingStatus
+from easy_booking.settings import settings
+
+# Tells the client to refetch, the changes of several bookings at once aren't streamed
+RESYNC = "event: resync\ndata: {}\n\n"
+# Last message of a dropped client, EventSource reconnects after `retry` milliseconds
+DROPPED = "event: resync\nretry: 1000\ndata: {}\n\n"
+KEEPALIVE = ": keepalive\n\n"
+
+
+class Subscription:
+    """Messages waiting for one stream, of one room or of one user's bookings when set"""
+
+    __slots__ = ("queue", "room_id", "user_id")
+
+    def __init__(self, queue_size: int, room_id: UUID | None = None, user_id: UUID | None = None) -> None:
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue(queue_size)
+        self.room_id = room_id
+        self.user_id = user_id
+
+    def wants(self, change: ChangeEvent) -> bool:
+        if self.room_id is not None and change.room_id != self.room_id:
+            return False
+        return self.user_id is None or str(change.data.get("user_id")) == str(self.user_id)
+
+
+class BookingBroadcaster:
+    """
+    Fan the booking changes out to the event streams of this worker.
+
+    Each stream has a bounded queue filled without waiting by publish(). A
+    stream that lets its queue fill up is dropped instead of holding back
+    the others or buffering without bound: its queue is emptied, it gets a
+    last resync message and ends, the client reconnects and refetches.
+    """
+
+    def __init__(
+        self, queue_size: int = settings.events_queue_size, keepalive: float = settings.events_keepalive
+    ) -> None:
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.subscriptions: set[Subscription] = set()
+        self.dropped = 0
+
+    def publish(self, change: ChangeEvent) -> None:
+        if change.table == ALL or (change.table == Booking.__tablename__ and change.id is None):
+            for subscription in list(self.subscriptions):
+                self._send(subscription, RESYNC)
+            return
+        if change.table != Booking.__tablename__ or change.action is None or change.data is None:
+            return
+        message = None
+        for subscription in list(self.subscriptions):
+            if subscription.wants(change):
+                message = message or self.format(change)
+                self._send(subscription, message)
+
+    @staticmethod
+    def format(change: ChangeEvent) -> str:
+        event = change.action.value
+        if change.action == ChangeAction.UPDATED and change.data["status"] == BookingStatus.CANCELLED:
+            event = "cancelled"
+        delta = BookingDelta.model_validate({**change.data, "id": change.id, "event": event})
+        return f"event: {event}\ndata: {delta.model_dump_json()}\n\n"
+
+    def _send(self, subscription: Subscription, message: str) -> None:
+        try:
+            subscription.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.subscriptions.discard(subscription)
+            self.dropped += 1
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait(None)
+            logger.warning(f"Event stream dropped, more than {self.queue_size} messages behind")
+
+    async def stream(self, room_id: UUID | None = None, user_id: UUID | None = None) -> AsyncIterator[str]:
+        """SSE messages of the booking changes, with a comment every `keepalive` idle seconds, until dropped"""
+        subscription = Subscription(self.queue_size, room_id=room_id, user_id=user_id)
+        self.subscriptions.add(subscription)
+        try:
+            # Sent right away so proxies and clients see the stream open
+            yield KEEPALIVE
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+                    continue
+                if message is None:
+                    yield DROPPED
+                    return
+                yield message
+        finally:
+            self.subscriptions.discard(subscription)
+
+
+def event_stream_response(messages: AsyncIterator[str]) -> StreamingResponse:
+    # X-Accel-Buffering: nginx would otherwise hold the messages back
+    return StreamingResponse(
+        messages, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+booking_broadcaster = BookingBroadcaster()
+bus.subscribe(booking_broadcaster.publish)
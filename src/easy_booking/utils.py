@@ -1,8 +1,19 @@
+import codecs
+import csv
+import hashlib
+import io
+import json
+from bisect import bisect_left
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from datetime import datetime, timedelta, timezone
 from inspect import isclass
+from operator import itemgetter
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from pydantic_core import SchemaSerializer, SchemaValidator
 
+from easy_booking.schemas.page import ExportFormat, LineError
+
 
 def optional(*fields):
     """Turn pydantic fields into optional"""
@@ -36,4 +47,204 @@ def optional(*fields):
         fields = _class.model_fields
         return dec(_class)
 
-    return dec
\ No newline at end of file
+    return dec
+
+
+def etag(body: bytes) -> str:
+    """Strong ETag of a response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, tag: str) -> bool:
+    """Tell whether an If-None-Match header lists `tag`, W/ prefixes are ignored as the weak comparison requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return tag in (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+
+
+def escape_like(value: str) -> str:
+    """Escape the LIKE wildcards of `value`, to use with escape="\\"."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def as_utc(value: datetime) -> datetime:
+    """Aware UTC datetime, naive values (e.g. read back from SQLite) are taken as UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def free_intervals(
+    busy: Iterable[tuple[datetime, datetime]],
+    start: datetime,
+    end: datetime,
+    min_length: timedelta = timedelta(0),
+) -> list[tuple[datetime, datetime]]:
+    """
+    Gaps of [start, end) not covered by the busy intervals.
+
+    `busy` must be sorted by start, overlapping or touching intervals are
+    merged on the fly in a single pass.
+    """
+    gaps = []
+    cursor = start
+    for busy_start, busy_end in busy:
+        if busy_start > cursor:
+            gaps.append((cursor, min(busy_start, end)))
+        cursor = max(cursor, busy_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return [(gap_start, gap_end) for gap_start, gap_end in gaps if gap_end - gap_start >= min_length]
+
+
+def merge_intervals(busy: Iterable[tuple[datetime, datetime]]) -> list[tuple[datetime, datetime]]:
+    """Sorted, disjoint intervals covering the busy ones, overlapping or touching intervals are merged"""
+    merged = []
+    for busy_start, busy_end in sorted(busy):
+        if merged and busy_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], busy_end))
+        else:
+            merged.append((busy_start, busy_end))
+    return merged
+
+
+def claim_interval(taken: list[tuple[datetime, datetime]], start: datetime, end: datetime) -> bool:
+    """
+    Insert [start, end) into `taken` unless it overlaps one of its intervals.
+
+    `taken` must be sorted and disjoint (see merge_intervals), so only the
+    two neighbours of the insertion point have to be looked at.
+    """
+    position = bisect_left(taken, start, key=itemgetter(0))
+    if position > 0 and taken[position - 1][1] > start:
+        return False
+    if position < len(taken) and taken[position][0] < end:
+        return False
+    taken.insert(position, (start, end))
+    return True
+
+
+async def encode_rows(
+    partitions: AsyncIterator[Sequence], model: type[BaseModel], export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    """
+    Encode partitions of rows as NDJSON lines or CSV, one chunk per partition.
+
+    Each row is validated through `model` so the values are formatted as in
+    the API responses. Only one partition is held in memory at a time.
+    """
+    adapter = TypeAdapter(model)
+    if export_format == ExportFormat.CSV:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(model.model_fields))
+        writer.writeheader()
+        yield buffer.getvalue().encode()
+    async for rows in partitions:
+        items = [adapter.validate_python(row, from_attributes=True) for row in rows]
+        if export_format == ExportFormat.CSV:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(adapter.dump_python(item, mode="json") for item in items)
+            yield buffer.getvalue().encode()
+        else:
+            yield b"".join(adapter.dump_json(item) + b"\n" for item in items)
+
+
+def decode_lines(raw_lines: Iterable[bytes], encoding: str = "utf-8-sig") -> Iterator[str]:
+    """
+    Decode the lines of a binary file one at a time, e.g. an upload.
+
+    Unlike a TextIOWrapper reading ahead, an undecodable byte raises its
+    UnicodeDecodeError while its own line is read, so decode_rows() reports
+    the right line.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for raw_line in raw_lines:
+        yield decoder.decode(raw_line)
+    if rest := decoder.decode(b"", final=True):
+        yield rest
+
+
+def decode_rows(lines: Iterable[str], export_format: ExportFormat) -> Iterator[tuple[int, dict | str]]:
+    """
+    Parse CSV or NDJSON lines lazily into (line number, record) pairs.
+
+    Empty CSV cells are left out so the schema defaults apply. A line that
+    isn't valid CSV or JSON gives its error message instead of a record. So
+    does a line that can't be decoded, the rest of the file is skipped then.
+    """
+    if export_format == ExportFormat.CSV:
+        return _decode_csv(lines)
+    return _decode_ndjson(lines)
+
+
+def _decode_csv(lines: Iterable[str]) -> Iterator[tuple[int, dict | str]]:
+    reader = csv.reader(lines)
+    try:
+        header = next(reader, None)
+        line = reader.line_num + 1
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as error:
+                # The reader resumes on the next line
+                yield line, f"Invalid CSV: {error}"
+            else:
+                yield line, {key: value for key, value in zip(header, row) if value}
+            line = reader.line_num + 1
+    except csv.Error as error:
+        yield 1, f"Invalid CSV header: {error}"
+    except UnicodeDecodeError as error:
+        yield reader.line_num + 1, _undecodable(error)
+
+
+def _decode_ndjson(lines: Iterable[str]) -> Iterator[tuple[int, dict | str]]:
+    line = 0
+    try:
+        for line, text in enumerate(lines, 1):
+            if not text.strip():
+                continue
+            try:
+                yield line, json.loads(text)
+            except ValueError as error:
+                yield line, f"Invalid JSON: {error}"
+    except UnicodeDecodeError as error:
+        yield line + 1, _undecodable(error)
+
+
+def _undecodable(error: UnicodeDecodeError) -> str:
+    # The line is exact with decode_lines(), a lower bound when the decoding reads ahead
+    return f"Invalid {error.encoding} text, the rest of the file is skipped: {error.reason}"
+
+
+def validate_rows(rows: Sequence[tuple[int, dict | str]], adapter: TypeAdapter) -> tuple[list, list[LineError]]:
+    """
+    Validate a chunk of decoded rows with an adapter of a list, e.g. TypeAdapter(list[RoomIn]).
+
+    The chunk is validated in a single call, the invalid records are only
+    singled out from the error locations when it fails. Return the valid
+    items and the errors sorted by line.
+    """
+    errors = {line: [record] for line, record in rows if isinstance(record, str)}
+    records = [(line, record) for line, record in rows if not isinstance(record, str)]
+    try:
+        return adapter.validate_python([record for _, record in records]), _line_errors(errors)
+    except ValidationError as error:
+        failed = {}
+        for detail in error.errors(include_url=False):
+            index, *loc = detail["loc"]
+            message = f"{'.'.join(map(str, loc))}: {detail['msg']}" if loc else detail["msg"]
+            failed.setdefault(index, []).append(message)
+    errors.update((records[index][0], messages) for index, messages in failed.items())
+    valid = [record for index, (_, record) in enumerate(records) if index not in failed]
+    return adapter.validate_python(valid), _line_errors(errors)
+
+
+def _line_errors(errors: dict[int, list[str]]) -> list[LineError]:
+    return [LineError(line=line, errors=messages) for line, messages in sorted(errors.items())]
@@ -0,0 +1,87 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi.security import OAuth2PasswordRequestForm
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from easy_booking.auth.password import AsyncPasswordHelper, build_password_hash
+from easy_booking.daos.user import UserDao
+from easy_booking.schemas.user import UserCreate
+from easy_booking.services.user import UserService
+from easy_booking.settings import PasswordAlgorithm, settings
+from tests.utils.fake_data_generator import FakeDataGenerator
+
+
+class TestBuildPasswordHash:
+    def test_configured_algorithm_hashes(self):
+        argon2 = build_password_hash(settings.model_copy(update={"password_hash_algorithm": PasswordAlgorithm.ARGON2}))
+        bcrypt = build_password_hash(settings.model_copy(update={"password_hash_algorithm": PasswordAlgorithm.BCRYPT}))
+
+        assert isinstance(argon2.current_hasher, Argon2Hasher)
+        assert isinstance(bcrypt.current_hasher, BcryptHasher)
+
+    def test_cost_change_needs_rehash(self):
+        cheap = build_password_hash(settings.model_copy(update={"password_bcrypt_rounds": 4, "password_hash_algorithm": PasswordAlgorithm.BCRYPT}))
+        costly = build_password_hash(settings.model_copy(update={"password_bcrypt_rounds": 5, "password_hash_algorithm": PasswordAlgorithm.BCRYPT}))
+
+        verified, updated_hash = costly.verify_and_update("secret", cheap.hash("secret"))
+
+        assert verified
+        assert updated_hash is not None and updated_hash.startswith("$2b$05$")
+
+
+@pytest.mark.asyncio
+class TestAsyncPasswordHelper:
+    async def test_hashing_runs_off_the_event_loop(self):
+        helper = AsyncPasswordHelper(workers=1)
+        threads = []
+
+        def hash_password(password):
+            threads.append(threading.current_thread().name)
+            return "hashed"
+
+        with patch.object(helper, "hash", side_effect=hash_password):
+            assert await helper.hash_async("secret") == "hashed"
+
+        assert threads[0].startswith("password-hash")
+        assert threads[0] != threading.main_thread().name
+
+    async def test_verify_and_update_async(self):
+        helper = AsyncPasswordHelper(workers=1)
+        hashed = await helper.hash_async("secret")
+
+        assert await helper.verify_and_update_async("secret", hashed) == (True, None)
+        assert (await helper.verify_and_update_async("wrong", hashed))[0] is False
+
+
+@pytest.mark.asyncio
+class TestUserServicePasswords:
+    async def test_create_and_authenticate(self, test_session):
+        service = UserService(UserDao(test_session).user_db)
+        user_data = FakeDataGenerator.fake_user()
+        created_user = await service.create(
+            UserCreate(first_name=user_data["first_name"], last_name=user_data["last_name"], email=user_data["email"], password="password123")
+        )
+
+        assert created_user.hashed_password.startswith("$argon2")
+        assert await service.authenticate(OAuth2PasswordRequestForm(username=user_data["email"], password="password123")) == created_user
+        assert await service.authenticate(OAuth2PasswordRequestForm(username=user_data["email"], password="wrong")) is None
+        assert await service.authenticate(OAuth2PasswordRequestForm(username="unknown@example.com", password="password123")) is None
+
+        await UserDao(test_session).delete_by_id(created_user.id)
+
+    async def test_legacy_hash_is_rehashed_on_login(self, test_session):
+        user_data = FakeDataGenerator.fake_user()
+        user_data["hashed_password"] = BcryptHasher(rounds=4).hash("password123")
+        created_user = await UserDao(test_session).create(user_data)
+        service = UserService(UserDao(test_session).user_db)
+
+        authenticated = await service.authenticate(OAuth2PasswordRequestForm(username=user_data["email"], password="password123"))
+
+        assert authenticated.id == created_user.id
+        assert authenticated.hashed_password.startswith("$argon2")
+        assert await service.authenticate(OAuth2PasswordRequestForm(username=user_data["email"], password="password123")) is not None
+
+        await UserDao(test_session).delete_by_id(created_user.id)
@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+from easy_booking.cache import Cache
+
+
+class TestCache:
+    def test_get_and_set(self):
+        cache = Cache(maxsize=2)
+
+        assert cache.get("a") is None
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert "a" in cache
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = Cache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert len(cache) == 2
+
+    def test_entries_expire_after_ttl(self):
+        cache = Cache(ttl=10)
+        with patch("easy_booking.cache.monotonic", return_value=100):
+            cache.set("a", 1)
+        with patch("easy_booking.cache.monotonic", return_value=109):
+            assert cache.get("a") == 1
+        with patch("easy_booking.cache.monotonic", return_value=110):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_invalidate_tag(self):
+        cache = Cache()
+        cache.set(("room", 1), "x", tag="room")
+        cache.set(("room", 2), "y", tag="room")
+        cache.set("other", "z", tag="other")
+
+        cache.invalidate_tag("room")
+
+        assert ("room", 1) not in cache
+        assert ("room", 2) not in cache
+        assert cache.get("other") == "z"
+
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_set_is_skipped_after_invalidation(self):
+        cache = Cache()
+        generation = cache.generation("room")
+        cache.invalidate_tag("room")
+        cache.set("a", "stale", tag="room", generation=generation)
+        assert "a" not in cache
+
+        generation = cache.generation("room")
+        cache.clear()
+        cache.set("a", "stale", tag="room", generation=generation)
+        assert "a" not in cache
+
+        generation = cache.generation("room")
+        cache.invalidate_tag("other")
+        cache.set("a", "fresh", tag="room", generation=generation)
+        assert cache.get("a") == "fresh"
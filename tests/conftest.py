@@ -7,7 +7,7 @@ import pytest_asyncio
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 from httpx import ASGITransport, AsyncClient
-from easy_booking.db import get_session
+from easy_booking.db import get_read_session, get_session
 from easy_booking.main import app
 from easy_booking.models.base import Base
 import logging
@@ -77,6 +77,7 @@ async def test_client(test_app):
 @pytest.fixture(scope="session")
 def test_app(override_get_session):
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
     yield app
     app.dependency_overrides = {}
 
@@ -1,7 +1,9 @@
-from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 import uuid
 
 import pytest
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -9,6 +11,9 @@ from easy_booking.daos.booking import BookingDao
 from easy_booking.daos.room import RoomDao
 from easy_booking.daos.user import UserDao
 from easy_booking.exceptions.booking import BookingLinkedToAnotherObject
+from easy_booking.exceptions.page import InvalidCursor
+from easy_booking.exceptions.room import RoomUnavailable
+from easy_booking.models.booking import BookingStatus
 from tests.utils.fake_data_generator import FakeDataGenerator
 
 
@@ -149,3 +154,142 @@ class TestBookingDao:
             retrieved_booking = await booking_dao.get_by_id(booking.id)
             assert retrieved_booking is None
 
+    async def test_check_overlapping_bookings(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        booking_dao = BookingDao(test_session)
+
+        start_time = datetime.now(timezone.utc) + timedelta(days=30)
+        end_time = start_time + timedelta(hours=2)
+        created_booking = await booking_dao.create(
+            FakeDataGenerator.fake_booking_data(
+                user_id=created_user.id,
+                room_id=created_room.id,
+                override={"start_time": start_time, "end_time": end_time},
+            )
+        )
+
+        assert await booking_dao.check_overlapping_bookings(
+            created_room.id, start_time + timedelta(hours=1), end_time + timedelta(hours=1)
+        )
+        # Touching intervals don't overlap
+        assert not await booking_dao.check_overlapping_bookings(
+            created_room.id, end_time, end_time + timedelta(hours=1)
+        )
+        assert not await booking_dao.check_overlapping_bookings(uuid.uuid4(), start_time, end_time)
+        assert not await booking_dao.check_overlapping_bookings(
+            created_room.id, start_time, end_time, exclude_id=created_booking.id
+        )
+
+        created_booking.status = BookingStatus.CANCELLED
+        await booking_dao.commit()
+        assert not await booking_dao.check_overlapping_bookings(created_room.id, start_time, end_time)
+
+        await booking_dao.delete_by_id(created_booking.id)
+
+    async def test_booking_dao_commit_maps_exclusion_violation(self, test_session: AsyncSession):
+        booking_dao = BookingDao(test_session)
+
+        class ExclusionViolation(Exception):
+            sqlstate = "23P01"
+
+        with patch.object(test_session, "commit") as mock_commit:
+            mock_commit.side_effect = IntegrityError(
+                statement="INSERT INTO bookings",
+                params={},
+                orig=ExclusionViolation('conflicting key value violates exclusion constraint "bookings_no_overlap"'),
+            )
+            with pytest.raises(RoomUnavailable):
+                await booking_dao.commit()
+
+        with patch.object(test_session, "commit") as mock_commit:
+            mock_commit.side_effect = IntegrityError(
+                statement="INSERT INTO bookings",
+                params={},
+                orig=Exception("FOREIGN KEY constraint failed"),
+            )
+            with pytest.raises(IntegrityError):
+                await booking_dao.commit()
+
+    async def test_booking_dao_get_all_with_cursor(self, test_session: AsyncSession):
+        booking_dao = BookingDao(test_session)
+        await booking_dao.delete_all()
+
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        created_at = datetime.now(timezone.utc)
+        for i in range(4):
+            await booking_dao.create(
+                FakeDataGenerator.fake_booking_data(
+                    user_id=created_user.id,
+                    room_id=created_room.id,
+                    # Two bookings share created_at so the id breaks the tie
+                    override={"created_at": created_at + timedelta(seconds=i // 2)},
+                )
+            )
+
+        first_page = await booking_dao.get_all(offset=0, limit=3)
+        cursor = booking_dao.encode_cursor(first_page[-1])
+        second_page = await booking_dao.get_all(offset=0, limit=3, cursor=cursor)
+
+        assert len(first_page) == 3
+        assert len(second_page) == 1
+        all_ids = [booking.id for booking in await booking_dao.get_all(offset=0, limit=10)]
+        assert [booking.id for booking in first_page + second_page] == all_ids
+
+        with pytest.raises(InvalidCursor):
+            await booking_dao.get_all(offset=0, limit=3, cursor="not-a-cursor")
+
+        await booking_dao.delete_all()
+
+    async def test_booking_dao_complete_ended(self, test_session: AsyncSession):
+        booking_dao = BookingDao(test_session)
+        await booking_dao.delete_all()
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        now = datetime.now(timezone.utc)
+        bookings = {}
+        for i, (name, status, ends_in) in enumerate(
+            (
+                ("ended", BookingStatus.SCHEDULED, -1),
+                ("ended too", BookingStatus.SCHEDULED, -2),
+                ("running", BookingStatus.SCHEDULED, 1),
+                ("cancelled", BookingStatus.CANCELLED, -1),
+            )
+        ):
+            bookings[name] = await booking_dao.create(
+                FakeDataGenerator.fake_booking_data(
+                    user_id=created_user.id,
+                    room_id=created_room.id,
+                    override={
+                        "status": status,
+                        "start_time": now + timedelta(days=i, hours=ends_in - 1),
+                        "end_time": now + timedelta(days=i, hours=ends_in),
+                    },
+                )
+            )
+
+        assert await booking_dao.complete_ended(limit=1, ended_before=now + timedelta(days=2)) == 1
+        assert await booking_dao.complete_ended(limit=10, ended_before=now + timedelta(days=2)) == 1
+        assert await booking_dao.complete_ended(limit=10, ended_before=now + timedelta(days=2)) == 0
+
+        statuses = {name: (await booking_dao.get_by_id(_booking.id)).status for name, _booking in bookings.items()}
+        assert statuses == {
+            "ended": BookingStatus.COMPLETED,
+            "ended too": BookingStatus.COMPLETED,
+            "running": BookingStatus.SCHEDULED,
+            "cancelled": BookingStatus.CANCELLED,
+        }
+
+        await booking_dao.delete_all()
+
+    async def test_booking_dao_complete_ended_skips_locked_rows(self):
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=MagicMock())
+        session.commit = AsyncMock()
+
+        await BookingDao(session).complete_ended(limit=100)
+
+        sql = str(session.execute.await_args.kwargs["statement"].compile(dialect=postgresql.dialect()))
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert "now()" in sql
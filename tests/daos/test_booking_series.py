@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from easy_booking.daos.booking import BookingDao
+from easy_booking.daos.booking_series import BookingSeriesDao
+from easy_booking.daos.room import RoomDao
+from easy_booking.daos.user import UserDao
+from easy_booking.models.booking import BookingStatus
+from easy_booking.models.room import RoomStatus
+from easy_booking.recurrence import occurrences, series_end
+from tests.utils.fake_data_generator import FakeDataGenerator
+
+START = datetime(2032, 1, 5, 9, tzinfo=timezone.utc)
+
+
+async def create_series(test_session: AsyncSession, user_id, room_id, **override):
+    series_in = FakeDataGenerator.fake_series_in(
+        override={"room_id": room_id, "start_time": START, "end_time": START + timedelta(hours=1), "count": 10, **override}
+    )
+    series_data = series_in.model_dump()
+    series_data.update(user_id=user_id, ends_at=series_end(series_in))
+    return await BookingSeriesDao(test_session).create(series_data)
+
+
+@pytest.mark.asyncio
+class TestBookingSeriesDao:
+    async def test_booking_series_dao_crud(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        series_dao = BookingSeriesDao(test_session)
+
+        created_series = await create_series(test_session, created_user.id, created_room.id)
+        assert created_series.id is not None
+        assert created_series.status == BookingStatus.SCHEDULED
+
+        retrieved_series = await series_dao.get_by_id(created_series.id)
+        assert retrieved_series.id == created_series.id
+
+        all_series, total = await series_dao.get_page(offset=0, limit=10, user_id=created_user.id)
+        assert [_series.id for _series in all_series] == [created_series.id]
+        assert total == 1
+
+        deleted_series = await series_dao.delete_by_id(created_series.id)
+        assert deleted_series.id == created_series.id
+        assert await series_dao.get_by_id(created_series.id) is None
+        assert await series_dao.delete_by_id(created_series.id) is None
+
+    async def test_get_busy_intervals(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        series_dao = BookingSeriesDao(test_session)
+        created_series = await create_series(test_session, created_user.id, created_room.id)
+
+        busy = await series_dao.get_busy_intervals(
+            START + timedelta(weeks=3), START + timedelta(weeks=5), room_ids=(created_room.id,)
+        )
+        assert busy == {
+            created_room.id: [
+                (START + timedelta(weeks=3), START + timedelta(weeks=3, hours=1)),
+                (START + timedelta(weeks=4), START + timedelta(weeks=4, hours=1)),
+            ]
+        }
+        # Inside the series span but between two occurrences
+        assert await series_dao.get_busy_intervals(
+            START + timedelta(days=1), START + timedelta(days=2), room_ids=(created_room.id,)
+        ) == {}
+        # After the last occurrence
+        assert await series_dao.get_busy_intervals(
+            START + timedelta(weeks=10), START + timedelta(weeks=11), room_ids=(created_room.id,)
+        ) == {}
+
+        created_series.status = BookingStatus.CANCELLED
+        await test_session.commit()
+        assert not await series_dao.has_overlapping_occurrence(
+            created_room.id, START, START + timedelta(hours=1)
+        )
+
+        await series_dao.delete_by_id(created_series.id)
+
+    async def test_booking_dao_accounts_for_occurrences(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        booking_dao = BookingDao(test_session)
+        created_series = await create_series(test_session, created_user.id, created_room.id)
+        created_booking = await booking_dao.create(
+            FakeDataGenerator.fake_booking_data(
+                user_id=created_user.id,
+                room_id=created_room.id,
+                override={"start_time": START + timedelta(hours=2), "end_time": START + timedelta(hours=3)},
+            )
+        )
+
+        assert await booking_dao.check_overlapping_bookings(
+            created_room.id, START + timedelta(weeks=2, minutes=30), START + timedelta(weeks=2, hours=2)
+        )
+        assert not await booking_dao.check_overlapping_bookings(
+            created_room.id, START + timedelta(weeks=2, hours=1), START + timedelta(weeks=2, hours=2)
+        )
+        assert not await booking_dao.check_overlapping_bookings(uuid.uuid4(), START, START + timedelta(hours=1))
+
+        busy = await booking_dao.get_busy_intervals(created_room.id, START, START + timedelta(days=8))
+        assert busy == [
+            (START, START + timedelta(hours=1)),
+            (START + timedelta(hours=2), START + timedelta(hours=3)),
+            (START + timedelta(weeks=1), START + timedelta(weeks=1, hours=1)),
+        ]
+
+        await booking_dao.delete_by_id(created_booking.id)
+        await BookingSeriesDao(test_session).delete_by_id(created_series.id)
+
+    async def test_room_dao_get_available_excludes_rooms_with_occurrences(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        room_dao = RoomDao(test_session)
+        busy_room = await room_dao.create(FakeDataGenerator.fake_room(override={"capacity": 1000}))
+        free_room = await room_dao.create(FakeDataGenerator.fake_room(override={"capacity": 1000}))
+        created_series = await create_series(test_session, created_user.id, busy_room.id)
+
+        rooms, _ = await room_dao.get_available(
+            START + timedelta(weeks=6), START + timedelta(weeks=6, hours=2), min_capacity=1000, limit=100
+        )
+        room_ids = {_room.id for _room in rooms}
+        assert free_room.id in room_ids
+        assert busy_room.id not in room_ids
+
+        rooms, _ = await room_dao.get_available(
+            START + timedelta(weeks=6, hours=1), START + timedelta(weeks=6, hours=2), min_capacity=1000, limit=100
+        )
+        assert busy_room.id in {_room.id for _room in rooms}
+
+        await BookingSeriesDao(test_session).delete_by_id(created_series.id)
+        await room_dao.delete_by_id(busy_room.id)
+        await room_dao.delete_by_id(free_room.id)
+
+    async def test_room_dao_get_available_only_expands_candidate_rooms(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        room_dao = RoomDao(test_session)
+        busy_room = await room_dao.create(FakeDataGenerator.fake_room(override={"capacity": 2000}))
+        closed_room = await room_dao.create(
+            FakeDataGenerator.fake_room(override={"capacity": 2000, "status": RoomStatus.MAINTENANCE})
+        )
+        small_room = await room_dao.create(FakeDataGenerator.fake_room(override={"capacity": 1}))
+        all_series = [
+            await create_series(test_session, created_user.id, _room.id)
+            for _room in (busy_room, closed_room, small_room)
+        ]
+
+        with patch("easy_booking.daos.booking_series.occurrences", wraps=occurrences) as expand:
+            rooms, _ = await room_dao.get_available(
+                START + timedelta(weeks=6), START + timedelta(weeks=6, hours=2), min_capacity=2000, limit=100
+            )
+        assert busy_room.id not in {_room.id for _room in rooms}
+        assert [call.args[0].room_id for call in expand.call_args_list] == [busy_room.id]
+
+        for _series in all_series:
+            await BookingSeriesDao(test_session).delete_by_id(_series.id)
+        for _room in (busy_room, closed_room, small_room):
+            await room_dao.delete_by_id(_room.id)
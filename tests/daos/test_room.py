@@ -1,11 +1,16 @@
-from unittest.mock import patch
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from easy_booking.daos.room import RoomDao
+from easy_booking.daos.room import RoomDao, advisory_lock_key
 from easy_booking.exceptions.room import RoomLinkedToAnotherObject
+from easy_booking.schemas.page import TotalMode
+from easy_booking.schemas.room import RoomFilter, RoomSort, RoomStatus
+from easy_booking.settings import RoomLock
 from tests.utils.fake_data_generator import FakeDataGenerator
 
 
@@ -89,3 +94,92 @@ class TestRoomDao:
             retrieved_room = await room_dao.get_by_id(room.id)
             assert retrieved_room is None
 
+    async def test_room_dao_lock_is_a_no_op_without_postgresql(self, test_session: AsyncSession):
+        assert not await RoomDao(test_session).lock((uuid.uuid4(),), RoomLock.ADVISORY)
+        assert not await RoomDao(test_session).lock((uuid.uuid4(),), RoomLock.ROW)
+
+    async def test_room_dao_lock_on_postgresql(self):
+        session = MagicMock()
+        session.get_bind.return_value.dialect.name = "postgresql"
+        session.execute = AsyncMock()
+        room_ids = [uuid.uuid4() for _ in range(3)]
+
+        assert await RoomDao(session).lock(room_ids + room_ids[:1], RoomLock.ADVISORY)
+        statements = [call.kwargs["statement"] for call in session.execute.await_args_list]
+        assert len(statements) == 3
+        assert all("pg_advisory_xact_lock" in str(statement) for statement in statements)
+        # Always the same order, whatever the order of the batch
+        keys = [list(statement.compile().params.values()) for statement in statements]
+        assert keys == [[advisory_lock_key(room_id)] for room_id in sorted(room_ids)]
+
+        session.execute.reset_mock()
+        assert await RoomDao(session).lock(room_ids, RoomLock.ROW)
+        statement = session.execute.await_args.kwargs["statement"]
+        assert "FOR UPDATE" in str(statement.compile(dialect=postgresql.dialect()))
+
+        session.execute.reset_mock()
+        assert not await RoomDao(session).lock(room_ids, RoomLock.NONE)
+        session.execute.assert_not_awaited()
+
+    async def test_room_dao_get_page_filters(self, test_session: AsyncSession):
+        room_dao = RoomDao(test_session)
+        await room_dao.delete_all()
+        rooms = [
+            await room_dao.create(FakeDataGenerator.fake_room(override))
+            for override in (
+                {"name": "Ada", "address": "12 Main Street", "capacity": 4, "description": "Projector"},
+                {"name": "Babbage", "address": "12 main street", "capacity": 12, "description": None},
+                {"name": "Curie", "address": "3 Side Road", "capacity": 30, "description": "Sea view"},
+                {"name": "Dijkstra", "address": "12% Off Avenue", "capacity": 12, "status": "maintenance"},
+            )
+        ]
+
+        async def names(**filters):
+            items, total = await room_dao.get_page(0, 10, filters=RoomFilter(**filters))
+            assert total == len(items)
+            return [room.name for room in items]
+
+        assert await names(capacity__gte=10, capacity__lte=20) == ["Babbage", "Dijkstra"]
+        assert await names(status=RoomStatus.MAINTENANCE) == ["Dijkstra"]
+        assert await names(address_prefix="12 MAIN") == ["Ada", "Babbage"]
+        # LIKE wildcards are matched literally
+        assert await names(address_prefix="12%") == ["Dijkstra"]
+        assert await names(search="sea") == ["Curie"]
+        assert await names(search="bbag") == ["Babbage"]
+        assert await names(search="view", capacity__lte=20) == []
+
+        for room in rooms:
+            await room_dao.delete_by_id(room.id)
+
+    async def test_room_dao_get_page_sorts(self, test_session: AsyncSession):
+        await RoomDao(test_session).delete_all()
+        for capacity in (8, 2, 8, 5):
+            await RoomDao(test_session).create(FakeDataGenerator.fake_room({"capacity": capacity}))
+
+        room_dao = RoomDao(test_session, sort=RoomSort.CAPACITY_DESC)
+        first_page, _ = await room_dao.get_page(0, 2)
+        second_page, _ = await room_dao.get_page(
+            0, 2, cursor=room_dao.encode_cursor(first_page[-1]), total=TotalMode.NONE
+        )
+        by_name, _ = await RoomDao(test_session, sort=RoomSort.NAME_DESC).get_page(0, 10)
+
+        assert [room.capacity for room in first_page + second_page] == [8, 8, 5, 2]
+        assert [room.name for room in by_name] == sorted((room.name for room in by_name), reverse=True)
+
+        await RoomDao(test_session).delete_all()
+
+    async def test_room_dao_search_on_postgresql_uses_word_similarity(self):
+        session = MagicMock()
+        session.get_bind.return_value.dialect.name = "postgresql"
+
+        condition = RoomDao(session).matches("confrence")
+
+        sql = str(condition.compile(dialect=postgresql.dialect()))
+        assert "rooms.name ILIKE" in sql
+        assert "rooms.name %%> " in sql
+
+    async def test_advisory_lock_key(self):
+        room_id = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+        assert advisory_lock_key(room_id) == 0x1234567812345678
+        assert -(2**63) <= advisory_lock_key(uuid.UUID(int=2**128 - 1)) < 2**63
@@ -0,0 +1,52 @@
+import pytest
+
+from easy_booking.db import build_engine, engine, get_connect_args
+from easy_booking.settings import get_settings
+
+
+class TestEngineFactory:
+    def test_default_engine_does_not_echo(self):
+        assert engine.echo is False
+
+    @pytest.mark.asyncio
+    async def test_build_engine_pool_settings(self):
+        config = get_settings().model_copy(
+            update={
+                "database_pool_size": 7,
+                "database_max_overflow": 3,
+                "database_pool_timeout": 5,
+                "database_pool_recycle": 600,
+                "database_pool_pre_ping": False,
+            }
+        )
+        _engine = build_engine(config=config)
+
+        assert _engine.pool.size() == 7
+        assert _engine.pool._max_overflow == 3
+        assert _engine.pool._timeout == 5
+        assert _engine.pool._recycle == 600
+        assert _engine.pool._pre_ping is False
+        await _engine.dispose()
+
+    def test_connect_args(self):
+        config = get_settings().model_copy(
+            update={
+                "database_statement_cache_size": 50,
+                "database_command_timeout": 10,
+                "database_server_settings": {"application_name": "easy_booking"},
+            }
+        )
+        connect_args = get_connect_args(config)
+
+        assert connect_args["statement_cache_size"] == 50
+        assert connect_args["command_timeout"] == 10
+        assert connect_args["server_settings"] == {"application_name": "easy_booking"}
+        assert "prepared_statement_cache_size" not in connect_args
+
+    def test_pgbouncer_connect_args_disable_prepared_statements(self):
+        config = get_settings().model_copy(update={"database_pgbouncer": True})
+        connect_args = get_connect_args(config)
+
+        assert connect_args["statement_cache_size"] == 0
+        assert connect_args["prepared_statement_cache_size"] == 0
+        assert connect_args["prepared_statement_name_func"]() != connect_args["prepared_statement_name_func"]()
@@ -0,0 +1,108 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from easy_booking.db import ReplicaSet, build_session_factory
+from easy_booking.models.base import Base
+from easy_booking.models.room import Room
+from tests.utils.fake_data_generator import FakeDataGenerator
+
+
+async def sqlite_engine(path):
+    _engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with _engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return _engine
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path):
+    """A primary and two replicas, each file holding a room named after it"""
+    engines = {}
+    for name in ("primary", "replica_a", "replica_b"):
+        engines[name] = await sqlite_engine(tmp_path / f"{name}.db")
+        async with engines[name].begin() as conn:
+            await conn.execute(insert(Room).values(**FakeDataGenerator.fake_room(override={"name": name})))
+    yield engines
+    for _engine in engines.values():
+        await _engine.dispose()
+
+
+async def read_room_name(session) -> str:
+    return await session.scalar(select(Room.name))
+
+
+@pytest.mark.asyncio
+class TestReadReplicas:
+    async def test_read_only_sessions_round_robin_over_replicas(self, databases):
+        factory = build_session_factory(databases["primary"], ReplicaSet([databases["replica_a"], databases["replica_b"]]))
+
+        names = []
+        for _ in range(4):
+            async with factory(info={"read_only": True}) as session:
+                names.append(await read_room_name(session))
+        async with factory() as session:
+            primary_name = await read_room_name(session)
+
+        assert names == ["replica_a", "replica_b", "replica_a", "replica_b"]
+        assert primary_name == "primary"
+
+    async def test_writes_and_later_reads_go_to_primary(self, databases):
+        factory = build_session_factory(databases["primary"], ReplicaSet([databases["replica_a"]]))
+
+        async with factory(info={"read_only": True}) as session:
+            before = await read_room_name(session)
+            await session.execute(update(Room).values(capacity=99))
+            after = await read_room_name(session)
+            await session.commit()
+
+        assert before == "replica_a"
+        assert after == "primary"
+        async with databases["primary"].connect() as conn:
+            assert await conn.scalar(select(Room.capacity)) == 99
+
+    async def test_flush_moves_session_to_primary(self, databases):
+        factory = build_session_factory(databases["primary"], ReplicaSet([databases["replica_a"]]))
+
+        async with factory(info={"read_only": True}) as session:
+            session.add(Room(**FakeDataGenerator.fake_room(override={"name": "new"})))
+            await session.flush()
+            names = set((await session.scalars(select(Room.name))).all())
+            await session.rollback()
+
+        assert names == {"primary", "new"}
+
+    async def test_down_replica_is_skipped(self, databases, tmp_path):
+        broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db")
+        replica_set = ReplicaSet([broken, databases["replica_a"]])
+        factory = build_session_factory(databases["primary"], replica_set)
+
+        with pytest.raises(OperationalError):
+            async with factory(info={"read_only": True}) as session:
+                await read_room_name(session)
+        names = []
+        for _ in range(2):
+            async with factory(info={"read_only": True}) as session:
+                names.append(await read_room_name(session))
+
+        assert not replica_set.is_up(broken)
+        assert names == ["replica_a", "replica_a"]
+        await broken.dispose()
+
+    async def test_check_puts_replicas_back(self, databases, tmp_path):
+        missing = tmp_path / "later"
+        late = create_async_engine(f"sqlite+aiosqlite:///{missing}/replica.db")
+        replica_set = ReplicaSet([late])
+        factory = build_session_factory(databases["primary"], replica_set)
+
+        await replica_set.check()
+        async with factory(info={"read_only": True}) as session:
+            fallback = await read_room_name(session)
+        missing.mkdir()
+        await replica_set.check()
+
+        assert fallback == "primary"
+        assert replica_set.choose() is late
+        await late.dispose()
@@ -0,0 +1,178 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from easy_booking import events
+from easy_booking.cache import Cache, slot_cache, user_cache
+from easy_booking.daos.room import RoomDao
+from easy_booking.daos.user import UserDao
+from easy_booking.events import ALL, MAX_PAYLOAD, ChangeBatch, ChangeEvent, MemoryBus, PostgresBus, evict_caches, publish
+from tests.utils.fake_data_generator import FakeDataGenerator
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """This worker and another one, each with its own slot cache"""
+    hub = []
+    local, remote = MemoryBus(hub), MemoryBus(hub)
+    local.subscribe(evict_caches)
+    remote_slots = Cache()
+    remote.subscribe(lambda change: remote_slots.invalidate_tag(change.room_id) if change.room_id else remote_slots.clear())
+    monkeypatch.setattr(events, "bus", local)
+    return local, remote, remote_slots
+
+
+@pytest_asyncio.fixture
+async def session(test_session_factory, test_db):
+    async with test_session_factory() as session:
+        yield session
+
+
+@pytest.mark.asyncio
+class TestChangeEvents:
+    async def test_room_writes_evict_every_worker(self, workers, session):
+        _, remote, remote_slots = workers
+        _room = await RoomDao(session).create(FakeDataGenerator.fake_room())
+        slot_cache.set("local", [], tag=_room.id)
+        remote_slots.set("remote", [], tag=_room.id)
+        remote_slots.set("other room", [], tag=uuid.uuid4())
+
+        await RoomDao(session).delete_by_id(_room.id)
+
+        assert "local" not in slot_cache
+        assert "remote" not in remote_slots
+        assert "other room" in remote_slots
+
+    async def test_user_writes_evict_the_user(self, workers, session):
+        _user = await UserDao(session).create(FakeDataGenerator.fake_user())
+        user_cache.set(_user.id, {}, tag=_user.id)
+
+        await UserDao(session).delete_by_id(_user.id)
+
+        assert _user.id not in user_cache
+
+    async def test_events_dispatched_once_committed(self, workers, session):
+        local, remote, _ = workers
+        received = []
+        local.subscribe(received.append)
+        remote.subscribe(received.append)
+        change = ChangeEvent(table="rooms", id=uuid.uuid4())
+
+        publish(session, change)
+        assert received == []
+        await session.commit()
+        await session.commit()
+
+        assert received == [change, change]
+
+    async def test_rolled_back_events_are_dropped(self, workers, session):
+        local, remote, _ = workers
+        received = []
+        local.subscribe(received.append)
+        remote.subscribe(received.append)
+
+        await session.connection()
+        publish(session, ChangeEvent(table="rooms", id=uuid.uuid4()))
+        await session.rollback()
+        await session.commit()
+
+        assert received == []
+
+
+class TestEvictCaches:
+    def test_table_without_id_clears_its_cache(self):
+        slot_cache.set("slots", [], tag=uuid.uuid4())
+        user_cache.set("user", {}, tag=uuid.uuid4())
+
+        evict_caches(ChangeEvent(table="bookings"))
+
+        assert "slots" not in slot_cache
+        assert "user" in user_cache
+
+    def test_all_clears_every_cache(self):
+        slot_cache.set("slots", [], tag=uuid.uuid4())
+        user_cache.set("user", {}, tag=uuid.uuid4())
+
+        evict_caches(ChangeEvent(table=ALL))
+
+        assert len(slot_cache) == len(user_cache) == 0
+
+
+class TestPostgresBus:
+    def test_payload_round_trips(self):
+        batch = ChangeBatch(events=[ChangeEvent(table="bookings", id=uuid.uuid4(), room_id=uuid.uuid4())])
+
+        assert [ChangeBatch.model_validate_json(payload) for payload in PostgresBus.payloads(batch)] == [batch]
+
+    def test_large_batch_is_split(self):
+        batch = ChangeBatch(
+            events=[ChangeEvent(table="bookings", id=uuid.uuid4(), room_id=uuid.uuid4()) for _ in range(500)]
+        )
+
+        payloads = PostgresBus.payloads(batch)
+
+        assert len(payloads) > 1
+        assert all(len(payload.encode()) <= MAX_PAYLOAD for payload in payloads)
+        notified = [ChangeBatch.model_validate_json(payload) for payload in payloads]
+        assert {notified_batch.origin for notified_batch in notified} == {batch.origin}
+        # Every event in order, no flush
+        assert [change for notified_batch in notified for change in notified_batch.events] == batch.events
+
+    def test_oversized_event_becomes_a_flush(self):
+        before, after = ChangeEvent(table="rooms", id=uuid.uuid4()), ChangeEvent(table="rooms", id=uuid.uuid4())
+        oversized = ChangeEvent(table="bookings", id=uuid.uuid4(), data={"note": "x" * MAX_PAYLOAD})
+        batch = ChangeBatch(events=[before, oversized, after])
+
+        payloads = PostgresBus.payloads(batch)
+
+        assert all(len(payload.encode()) <= MAX_PAYLOAD for payload in payloads)
+        events = [change for payload in payloads for change in ChangeBatch.model_validate_json(payload).events]
+        assert events == [before, ChangeEvent(table=ALL), after]
+
+    def test_malformed_notification_is_skipped(self):
+        bus = PostgresBus()
+        received = []
+        bus.subscribe(received.append)
+
+        bus._on_notification(None, 1, bus.channel, "not json")
+        bus._on_notification(None, 1, bus.channel, '{"origin": "other", "events": [{"id": "not a uuid"}]}')
+
+        assert received == []
+
+    def test_notifications_of_this_worker_are_skipped(self):
+        bus = PostgresBus()
+        received = []
+        bus.subscribe(received.append)
+        change = ChangeEvent(table="users", id=uuid.uuid4())
+
+        bus._on_notification(None, 1, bus.channel, ChangeBatch(events=[change]).model_dump_json())
+        bus._on_notification(None, 1, bus.channel, ChangeBatch(origin="other", events=[change]).model_dump_json())
+
+        assert received == [change]
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not os.getenv("PERF_DATABASE_URI"), reason="PERF_DATABASE_URI is not set")
+    async def test_listen_dispatches_other_workers_notifications(self):
+        engine = create_async_engine(os.environ["PERF_DATABASE_URI"])
+        bus = PostgresBus(channel=f"test_{uuid.uuid4().hex}")
+        received = asyncio.Queue()
+        bus.subscribe(received.put_nowait)
+        change = ChangeEvent(table="rooms", id=uuid.uuid4())
+        listener = asyncio.create_task(bus.listen(engine))
+        try:
+            # Every cache is flushed once listening
+            assert await asyncio.wait_for(received.get(), 5) == ChangeEvent(table=ALL)
+            async with engine.begin() as conn:
+                payload = ChangeBatch(origin="other", events=[change]).model_dump_json()
+                await conn.execute(select(func.pg_notify(bus.channel, payload)))
+
+            assert await asyncio.wait_for(received.get(), 5) == change
+        finally:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+            await engine.dispose()
@@ -1,7 +1,7 @@
 import pytest
 
-from easy_booking.exceptions.base import Conflict, NotFound
-from easy_booking.exceptions.booking import BookingLinkedToAnotherObject, BookingNotFound
+from easy_booking.exceptions.base import BadRequest, Conflict, NotFound
+from easy_booking.exceptions.booking import BookingLinkedToAnotherObject, BookingNotFound, InvalidPeriod, UnknownField
 
 
 class TestBookingExceptions:
@@ -37,6 +37,20 @@ class TestBookingExceptions:
         assert not issubclass(NotFound, Conflict)
         assert not issubclass(Conflict, NotFound)
 
+    def test_invalid_period_exception(self):
+        exception = InvalidPeriod()
+
+        assert isinstance(exception, BadRequest)
+
+        assert exception.detail == "The end of the period must be after its start"
+
+    def test_unknown_field_exception(self):
+        exception = UnknownField("color")
+
+        assert isinstance(exception, BadRequest)
+
+        assert exception.detail == "Unknown booking field or relationship: color"
+
 
 class TestExceptionMessaging:
     def test_booking_not_found_repr(self):
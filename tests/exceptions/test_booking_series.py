@@ -0,0 +1,26 @@
+import pytest
+
+from easy_booking.exceptions.base import BadRequest, NotFound
+from easy_booking.exceptions.booking_series import UNBOUNDED, BookingSeriesNotFound, InvalidRecurrence
+
+
+class TestBookingSeriesExceptions:
+    def test_booking_series_not_found_exception(self):
+        exception = BookingSeriesNotFound()
+
+        assert isinstance(exception, NotFound)
+
+        assert exception.detail == "Booking series with the given id doesn't exist"
+
+        with pytest.raises(BookingSeriesNotFound) as excinfo:
+            raise BookingSeriesNotFound()
+
+        assert str(excinfo.value) == "404: Booking series with the given id doesn't exist"
+
+    def test_invalid_recurrence_exception(self):
+        exception = InvalidRecurrence(UNBOUNDED)
+
+        assert isinstance(exception, BadRequest)
+
+        assert exception.detail == UNBOUNDED
+        assert InvalidRecurrence().detail == "The recurrence rule is invalid"
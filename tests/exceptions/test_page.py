@@ -0,0 +1,18 @@
+import pytest
+
+from easy_booking.exceptions.base import BadRequest
+from easy_booking.exceptions.page import InvalidCursor
+
+
+class TestPageExceptions:
+    def test_invalid_cursor_exception(self):
+        exception = InvalidCursor()
+
+        assert isinstance(exception, BadRequest)
+
+        assert exception.detail == "The given pagination cursor is invalid"
+
+        with pytest.raises(InvalidCursor) as excinfo:
+            raise InvalidCursor()
+
+        assert str(excinfo.value) == "400: The given pagination cursor is invalid"
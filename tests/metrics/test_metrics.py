@@ -0,0 +1,155 @@
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from easy_booking.metrics import (
+    Histogram,
+    Metrics,
+    RequestTimings,
+    TimingMiddleware,
+    log_queries,
+    metrics,
+    normalize_statement,
+    track_queries,
+)
+from easy_booking.settings import settings
+from easy_booking.services.room import RoomService
+
+
+class TestHistogram:
+    def test_small_values_are_exact(self):
+        histogram = Histogram(precision=3)
+        for micros in (1, 2, 3, 8):
+            histogram.record(micros / 1_000_000)
+
+        assert histogram.count == 4
+        assert histogram.quantile(0.5) == 3 / 1_000_000
+        assert histogram.quantile(1) == 9 / 1_000_000
+
+    def test_relative_error_is_bounded(self):
+        for seconds in (0.0123, 0.456, 1.789, 42.0):
+            histogram = Histogram(precision=3)
+            histogram.record(seconds)
+
+            assert seconds <= histogram.quantile(1) <= seconds * (1 + 1 / 8)
+
+    def test_cumulative_counts(self):
+        histogram = Histogram()
+        for seconds in (0.0005, 0.002, 0.002, 0.3, 20):
+            histogram.record(seconds)
+
+        assert histogram.cumulative_counts([0.001, 0.01, 1, 10]) == [1, 3, 4, 4]
+        assert histogram.sum == pytest.approx(20.3045)
+
+
+class TestMetrics:
+    def test_render(self):
+        registry = Metrics(buckets=[0.01, 0.1], prefix="test")
+        timings = RequestTimings()
+        timings.db = 0.002
+        timings.queries = 3
+        registry.observe("GET", "/room/{id}", 200, 0.05, timings)
+        registry.observe("GET", "/room/{id}", 404, 0.005, RequestTimings())
+
+        text = registry.render()
+
+        assert "# TYPE test_http_request_duration_seconds histogram" in text
+        assert 'test_http_request_duration_seconds_bucket{method="GET",route="/room/{id}",le="0.01"} 1' in text
+        assert 'test_http_request_duration_seconds_bucket{method="GET",route="/room/{id}",le="0.1"} 2' in text
+        assert 'test_http_request_duration_seconds_bucket{method="GET",route="/room/{id}",le="+Inf"} 2' in text
+        assert 'test_http_request_db_duration_seconds_count{method="GET",route="/room/{id}"} 2' in text
+        assert 'test_http_requests_total{method="GET",route="/room/{id}",status="404"} 1' in text
+        assert 'test_db_queries_total{method="GET",route="/room/{id}"} 3' in text
+
+    def test_server_timing(self):
+        timings = RequestTimings()
+        timings.db = 0.0015
+        timings.queries = 2
+
+        assert timings.server_timing(0.01) == 'total;dur=10.00, db;dur=1.50;desc="2 queries", serialization;dur=0.00'
+
+
+@pytest.mark.asyncio
+class TestTimingMiddleware:
+    async def test_request_is_timed(self, test_session, test_client, test_engine):
+        # The listeners do nothing outside of a request, they can stay on the shared engine
+        track_queries(test_engine)
+        await RoomService.delete_all(test_session)
+        metrics.clear()
+
+        response = await test_client.get("/room/")
+        exposition = await test_client.get("/metrics")
+
+        assert response.status_code == 200
+        server_timing = dict(entry.split(";", 1) for entry in response.headers["server-timing"].split(", "))
+        assert set(server_timing) == {"total", "db", "serialization"}
+        assert '"2 queries"' in server_timing["db"]
+        assert exposition.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'easy_booking_http_requests_total{method="GET",route="/room/",status="200"} 1' in exposition.text
+        assert 'easy_booking_db_queries_total{method="GET",route="/room/"} 2' in exposition.text
+
+    async def test_unmatched_route(self, test_client):
+        metrics.clear()
+
+        response = await test_client.get("/no/such/route")
+
+        assert response.status_code == 404
+        assert ("GET", "<unmatched>") in metrics.routes
+
+
+@pytest.fixture
+def warnings_logged():
+    messages = []
+    handler_id = logger.add(lambda message: messages.append(message.record["message"]), level="WARNING")
+    yield messages
+    logger.remove(handler_id)
+
+
+@pytest_asyncio.fixture
+async def logged_engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    log_queries(engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+class TestQueryLog:
+    async def test_normalize_statement(self):
+        assert normalize_statement("SELECT *\n  FROM rooms WHERE id IN (?, ?, ?)") == "SELECT * FROM rooms WHERE id IN (?)"
+        assert normalize_statement("SELECT * FROM rooms WHERE id IN ($1,$2)") == "SELECT * FROM rooms WHERE id IN (?)"
+
+    async def test_slow_query_is_logged_without_parameters(self, logged_engine, warnings_logged, monkeypatch):
+        monkeypatch.setattr(settings, "query_log_slow_ms", 0)
+
+        async with logged_engine.connect() as conn:
+            await conn.execute(text("SELECT :secret"), {"secret": "hunter2"})
+
+        assert len(warnings_logged) == 1
+        assert "Slow query" in warnings_logged[0]
+        assert "SELECT ? [parameters redacted]" in warnings_logged[0]
+        assert "hunter2" not in warnings_logged[0]
+
+    async def test_repeated_statements_are_flagged(self, logged_engine, warnings_logged):
+        app = FastAPI()
+        app.add_middleware(TimingMiddleware, registry=Metrics(), query_log=True)
+
+        @app.get("/rooms/{count}")
+        async def select_rooms(count: int):
+            async with logged_engine.connect() as conn:
+                for room_id in range(count):
+                    await conn.execute(text("SELECT :room_id"), {"room_id": room_id})
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            await client.get(f"/rooms/{settings.query_log_similar_statements}")
+            assert warnings_logged == []
+            await client.get(f"/rooms/{settings.query_log_similar_statements + 1}")
+
+        assert warnings_logged == [
+            f"Possible N+1 during GET /rooms/{settings.query_log_similar_statements + 1}: "
+            f"{settings.query_log_similar_statements + 1} similar statements: SELECT ?"
+        ]
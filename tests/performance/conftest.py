@@ -0,0 +1,107 @@
+"""
+Fixtures shared by the pytest-benchmark suites.
+"""
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from easy_booking.models.base import Base
+
+
+@pytest.fixture(scope="function")
+def perf_event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="function")
+def perf_engine(perf_event_loop):
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+        echo=False,
+    )
+    
+    async def setup_db():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    
+    perf_event_loop.run_until_complete(setup_db())
+    yield engine
+    
+    async def teardown_db():
+        await engine.dispose()
+    
+    perf_event_loop.run_until_complete(teardown_db())
+
+
+class RoundTripCounter:
+    """Count the statements and commits sent through an engine."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_round_trip)
+        event.listen(engine, "commit", self._on_round_trip)
+
+    def _on_round_trip(self, *args, **kwargs):
+        self.count += 1
+
+    def measure(self, func):
+        self.count = 0
+        result = func()
+        return result, self.count
+
+
+@pytest.fixture(scope="function")
+def round_trips(perf_engine):
+    return RoundTripCounter(perf_engine.sync_engine)
+
+
+@pytest.fixture(scope="function")
+def perf_session_factory(perf_engine):
+    return async_sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=perf_engine,
+        expire_on_commit=False,
+    )
+
+
+@pytest.fixture(scope="function")
+def pg_engine(perf_event_loop):
+    """
+    Engine on the scratch PostgreSQL database of PERF_DATABASE_URI.
+
+    The tables are created for the test and dropped afterwards, the pool
+    holds one connection per client of PERF_CLIENTS.
+    """
+    database_uri = os.getenv("PERF_DATABASE_URI")
+    if not database_uri:
+        pytest.skip("PERF_DATABASE_URI is not set")
+    engine = create_async_engine(database_uri, pool_size=int(os.getenv("PERF_CLIENTS", "16")), max_overflow=0)
+
+    async def setup_db():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    perf_event_loop.run_until_complete(setup_db())
+    yield engine
+
+    async def teardown_db():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+    perf_event_loop.run_until_complete(teardown_db())
+
+
+@pytest.fixture(scope="function")
+def pg_session_factory(pg_engine):
+    return async_sessionmaker(autoflush=False, bind=pg_engine, expire_on_commit=False)
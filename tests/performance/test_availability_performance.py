@@ -0,0 +1,226 @@
+"""
+Performance tests for the room availability search.
+
+The dataset size can be raised to production scale with the PERF_ROOMS and
+PERF_BOOKINGS environment variables.
+
+The PostgreSQL variant runs against the scratch database of PERF_DATABASE_URI
+with the bookings_no_overlap exclusion constraint, at the 10k rooms / 5M
+bookings target by default (PERF_PG_ROOMS, PERF_PG_BOOKINGS_PER_ROOM), and
+fails when the p50 is above PERF_AVAILABILITY_P50_MS (10ms by default).
+
+Run with:
+    pytest tests/performance/test_availability_performance.py --benchmark-only -v
+"""
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from easy_booking.models.booking import Booking, BookingStatus
+from easy_booking.models.room import Room
+from easy_booking.models.user import User
+from easy_booking.schemas.page import TotalMode
+from easy_booking.services.room import RoomService
+from tests.utils.fake_data_generator import FakeDataGenerator
+
+PERF_ROOMS = int(os.getenv("PERF_ROOMS", "1000"))
+PERF_BOOKINGS = int(os.getenv("PERF_BOOKINGS", "50000"))
+PERF_PG_ROOMS = int(os.getenv("PERF_PG_ROOMS", "10000"))
+PERF_PG_BOOKINGS_PER_ROOM = int(os.getenv("PERF_PG_BOOKINGS_PER_ROOM", "500"))
+PERF_AVAILABILITY_P50_MS = float(os.getenv("PERF_AVAILABILITY_P50_MS", "10"))
+
+
+class TestRoomAvailabilityPerformance:
+
+    def test_get_available_rooms_performance(self, benchmark, perf_event_loop, perf_engine, perf_session_factory):
+        """
+        Benchmark the available rooms search over PERF_ROOMS rooms and PERF_BOOKINGS bookings.
+
+        Also checks that each room is probed through the bookings index
+        instead of scanning the whole table.
+        """
+        origin = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        random.seed(42)
+
+        async def setup_dataset():
+            user = FakeDataGenerator.fake_user()
+            room_ids = [uuid.uuid4() for _ in range(PERF_ROOMS)]
+            async with perf_engine.begin() as conn:
+                await conn.execute(insert(User), [user])
+                await conn.execute(
+                    insert(Room),
+                    [
+                        {"id": room_id, "name": f"Room {i}", "address": "1 rue de la Paix", "capacity": random.randint(1, 50)}
+                        for i, room_id in enumerate(room_ids)
+                    ],
+                )
+                bookings = []
+                for _ in range(PERF_BOOKINGS):
+                    start_time = origin + timedelta(hours=random.randint(0, 24 * 365))
+                    bookings.append(
+                        {
+                            "id": uuid.uuid4(),
+                            "user_id": user["id"],
+                            "room_id": random.choice(room_ids),
+                            "start_time": start_time,
+                            "end_time": start_time + timedelta(hours=1),
+                            "status": BookingStatus.SCHEDULED,
+                            "created_at": origin,
+                        }
+                    )
+                await conn.execute(insert(Booking), bookings)
+
+        perf_event_loop.run_until_complete(setup_dataset())
+
+        start_time = origin + timedelta(days=180, hours=9)
+        end_time = start_time + timedelta(hours=2)
+
+        async def get_available_rooms():
+            async with perf_session_factory() as session:
+                return await RoomService.get_available_rooms(
+                    start_time, end_time, session, min_capacity=10, limit=20, total=TotalMode.NONE
+                )
+
+        def run_get_available_rooms():
+            return perf_event_loop.run_until_complete(get_available_rooms())
+
+        result = benchmark(run_get_available_rooms)
+        benchmark.extra_info["rooms"] = PERF_ROOMS
+        benchmark.extra_info["bookings"] = PERF_BOOKINGS
+        assert len(result.items) == 20
+        assert all(room.capacity >= 10 for room in result.items)
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(perf_engine.sync_engine, "before_cursor_execute", capture)
+        run_get_available_rooms()
+        event.remove(perf_engine.sync_engine, "before_cursor_execute", capture)
+
+        async def explain(statement, parameters):
+            async with perf_engine.connect() as conn:
+                result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                return " ".join(row[-1] for row in result.all())
+
+        # Rooms busy with a series occurrence are resolved first, then the rooms page
+        series_statement, rooms_statement = statements
+        plan = perf_event_loop.run_until_complete(explain(*series_statement))
+        assert "USING INDEX ix_booking_series_room_id_start_time_ends_at" in plan
+        plan = perf_event_loop.run_until_complete(explain(*rooms_statement))
+        assert "USING INDEX ix_bookings_room_id_start_time" in plan
+
+
+@pytest.mark.skipif(not os.getenv("PERF_DATABASE_URI"), reason="PERF_DATABASE_URI is not set")
+class TestRoomAvailabilityPostgresPerformance:
+
+    def test_get_available_rooms_postgres_performance(self, benchmark, perf_event_loop, pg_engine, pg_session_factory):
+        """
+        Benchmark the available rooms search on PostgreSQL at the production target.
+
+        The dataset is generated server side, then the exclusion constraint of
+        the booking_overlap_exclusion migration is built on top of it. Checks
+        that the overlap probe goes through its GiST index and that the p50
+        stays under PERF_AVAILABILITY_P50_MS.
+        """
+        origin = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+        async def setup_dataset():
+            user = FakeDataGenerator.fake_user()
+            async with pg_engine.begin() as conn:
+                await conn.execute(insert(User), [user])
+                await conn.execute(
+                    text(
+                        """
+                        INSERT INTO rooms (id, name, address, capacity, status)
+                        SELECT gen_random_uuid(), 'Room ' || i, '1 rue de la Paix', 1 + i % 50, 'available'
+                        FROM generate_series(1, :rooms) AS i
+                        """
+                    ),
+                    {"rooms": PERF_PG_ROOMS},
+                )
+                # One hour bookings every three hours, shifted per room so the
+                # rooms are not all busy at the same time
+                await conn.execute(
+                    text(
+                        """
+                        INSERT INTO bookings (id, user_id, room_id, start_time, end_time, status, created_at)
+                        SELECT gen_random_uuid(), CAST(:user_id AS uuid), r.id,
+                               CAST(:origin AS timestamptz) + (3 * i + r.n % 3) * interval '1 hour',
+                               CAST(:origin AS timestamptz) + (3 * i + r.n % 3 + 1) * interval '1 hour',
+                               'scheduled', CAST(:origin AS timestamptz)
+                        FROM (SELECT id, row_number() OVER (ORDER BY id) AS n FROM rooms) AS r
+                        CROSS JOIN generate_series(0, :per_room - 1) AS i
+                        """
+                    ),
+                    {"user_id": user["id"], "origin": origin, "per_room": PERF_PG_BOOKINGS_PER_ROOM},
+                )
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+                await conn.execute(
+                    text(
+                        """
+                        ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+                        EXCLUDE USING gist (
+                            room_id WITH =,
+                            tstzrange(start_time, end_time) WITH &&
+                        ) WHERE (status <> 'cancelled')
+                        """
+                    )
+                )
+                await conn.execute(text("ANALYZE rooms"))
+                await conn.execute(text("ANALYZE bookings"))
+
+        perf_event_loop.run_until_complete(setup_dataset())
+
+        start_time = origin + timedelta(days=30, hours=9)
+        end_time = start_time + timedelta(hours=2)
+
+        async def get_available_rooms():
+            async with pg_session_factory() as session:
+                return await RoomService.get_available_rooms(
+                    start_time, end_time, session, min_capacity=10, limit=20, total=TotalMode.NONE
+                )
+
+        def run_get_available_rooms():
+            return perf_event_loop.run_until_complete(get_available_rooms())
+
+        result = benchmark(run_get_available_rooms)
+        assert len(result.items) == 20
+        assert all(room.capacity >= 10 for room in result.items)
+
+        # Timed by hand as well so the target is checked with --benchmark-disable too
+        durations = []
+        for _ in range(50):
+            started = time.perf_counter()
+            run_get_available_rooms()
+            durations.append((time.perf_counter() - started) * 1000)
+        p50 = statistics.median(durations)
+        benchmark.extra_info["rooms"] = PERF_PG_ROOMS
+        benchmark.extra_info["bookings"] = PERF_PG_ROOMS * PERF_PG_BOOKINGS_PER_ROOM
+        benchmark.extra_info["p50_ms"] = round(p50, 3)
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(pg_engine.sync_engine, "before_cursor_execute", capture)
+        run_get_available_rooms()
+        event.remove(pg_engine.sync_engine, "before_cursor_execute", capture)
+
+        async def explain(statement, parameters):
+            async with pg_engine.connect() as conn:
+                result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+                return " ".join(row[0] for row in result.all())
+
+        # The rooms page is the last statement, after the series lookup
+        plan = perf_event_loop.run_until_complete(explain(*statements[-1]))
+        assert "bookings_no_overlap" in plan
+        assert p50 < PERF_AVAILABILITY_P50_MS
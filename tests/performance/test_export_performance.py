@@ -0,0 +1,85 @@
+"""
+Memory benchmark of the streaming booking export.
+
+PERF_EXPORT_ROWS bookings (100k by default, 1M for the target) are exported
+as NDJSON and the process RSS is sampled while the chunks are consumed. It
+must stay flat once the first partitions are out: the growth after them is
+recorded in benchmark.extra_info and bounded by PERF_EXPORT_RSS_MB.
+
+Run with:
+    PERF_EXPORT_ROWS=1000000 pytest tests/performance/test_export_performance.py --benchmark-only -v
+"""
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from easy_booking.models.booking import Booking, BookingStatus
+from easy_booking.models.room import Room
+from easy_booking.models.user import User
+from easy_booking.schemas.page import ExportFormat
+from easy_booking.services.booking import BookingService
+from tests.utils.fake_data_generator import FakeDataGenerator
+
+PERF_EXPORT_ROWS = int(os.getenv("PERF_EXPORT_ROWS", "100000"))
+PERF_EXPORT_RSS_MB = float(os.getenv("PERF_EXPORT_RSS_MB", "32"))
+STATM = "/proc/self/statm"
+
+
+def rss() -> int:
+    with open(STATM) as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+@pytest.mark.skipif(not os.path.exists(STATM), reason="RSS is read from /proc")
+class TestBookingExportPerformance:
+
+    def test_export_bookings_memory(self, benchmark, perf_event_loop, perf_engine, perf_session_factory):
+        origin = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        user = FakeDataGenerator.fake_user()
+        room = FakeDataGenerator.fake_room()
+
+        async def setup_dataset():
+            async with perf_engine.begin() as conn:
+                await conn.execute(insert(User), [user])
+                await conn.execute(insert(Room), [room])
+                for offset in range(0, PERF_EXPORT_ROWS, 50000):
+                    await conn.execute(
+                        insert(Booking),
+                        [
+                            {
+                                "id": uuid.uuid4(),
+                                "user_id": user["id"],
+                                "room_id": room["id"],
+                                "start_time": origin + timedelta(hours=i),
+                                "end_time": origin + timedelta(hours=i, minutes=30),
+                                "status": BookingStatus.SCHEDULED,
+                                "created_at": origin + timedelta(hours=i),
+                            }
+                            for i in range(offset, min(offset + 50000, PERF_EXPORT_ROWS))
+                        ],
+                    )
+
+        perf_event_loop.run_until_complete(setup_dataset())
+
+        async def export():
+            samples = []
+            exported = 0
+            async with perf_session_factory() as session:
+                async for chunk in BookingService.export_bookings(session, ExportFormat.NDJSON):
+                    exported += chunk.count(b"\n")
+                    samples.append(rss())
+            return exported, samples
+
+        exported, samples = benchmark.pedantic(lambda: perf_event_loop.run_until_complete(export()), rounds=1)
+
+        # The first partitions warm up the validators and the cursor
+        baseline = samples[min(10, len(samples) - 1)]
+        growth = (max(samples) - baseline) / 2**20
+        benchmark.extra_info["rows"] = exported
+        benchmark.extra_info["rss_mb"] = round(baseline / 2**20, 1)
+        benchmark.extra_info["rss_growth_mb"] = round(growth, 1)
+        assert exported == PERF_EXPORT_ROWS
+        assert growth < PERF_EXPORT_RSS_MB
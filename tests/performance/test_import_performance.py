@@ -0,0 +1,63 @@
+"""
+Throughput benchmark of the bulk room import.
+
+PERF_IMPORT_ROWS rooms are parsed from CSV, validated and loaded, the rate
+is recorded in benchmark.extra_info. PostgreSQL (see PERF_DATABASE_URI)
+loads them with COPY and must stay above PERF_IMPORT_ROWS_PER_S. SQLite
+goes through the multi-row INSERT path on the aiosqlite worker thread,
+PERF_SQLITE_IMPORT_ROWS_PER_S only guards it against regressions.
+
+Run with:
+    pytest tests/performance/test_import_performance.py --benchmark-only -v
+"""
+import os
+import time
+
+from sqlalchemy import delete, func, select
+
+from easy_booking.models.room import Room
+from easy_booking.schemas.page import ExportFormat
+from easy_booking.services.room import RoomService
+
+PERF_IMPORT_ROWS = int(os.getenv("PERF_IMPORT_ROWS", "100000"))
+PERF_IMPORT_ROWS_PER_S = float(os.getenv("PERF_IMPORT_ROWS_PER_S", "50000"))
+PERF_SQLITE_IMPORT_ROWS_PER_S = float(os.getenv("PERF_SQLITE_IMPORT_ROWS_PER_S", "15000"))
+
+
+def room_lines(count: int) -> list[str]:
+    statuses = ("available", "unavailable", "maintenance", "")
+    lines = ["name,address,capacity,description,status\n"]
+    lines.extend(
+        f"Room {i},{i} Main Street,{i % 50 + 1},Floor {i % 10},{statuses[i % 4]}\n" for i in range(count)
+    )
+    return lines
+
+
+class TestRoomImportPerformance:
+
+    def _measure(self, benchmark, perf_event_loop, session_factory, min_rate):
+        lines = room_lines(PERF_IMPORT_ROWS)
+
+        async def import_rooms():
+            async with session_factory() as session:
+                await session.execute(delete(Room))
+                await session.commit()
+                started = time.perf_counter()
+                report = await RoomService.import_rooms(session, lines, ExportFormat.CSV)
+                elapsed = time.perf_counter() - started
+                return report, elapsed, await session.scalar(select(func.count()).select_from(Room))
+
+        report, elapsed, count = benchmark.pedantic(lambda: perf_event_loop.run_until_complete(import_rooms()), rounds=1)
+
+        rate = report.imported / elapsed
+        benchmark.extra_info["rows"] = report.imported
+        benchmark.extra_info["rows_per_s"] = round(rate)
+        assert report.errors == []
+        assert report.imported == count == PERF_IMPORT_ROWS
+        assert rate > min_rate
+
+    def test_import_rooms_throughput(self, benchmark, perf_event_loop, perf_session_factory):
+        self._measure(benchmark, perf_event_loop, perf_session_factory, PERF_SQLITE_IMPORT_ROWS_PER_S)
+
+    def test_import_rooms_throughput_postgres(self, benchmark, perf_event_loop, pg_session_factory):
+        self._measure(benchmark, perf_event_loop, pg_session_factory, PERF_IMPORT_ROWS_PER_S)
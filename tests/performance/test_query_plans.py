@@ -0,0 +1,154 @@
+"""
+Query plan checks for the DAO queries.
+
+Every statement the DAOs send for common reads and writes is captured on a
+seeded SQLite database and run through EXPLAIN QUERY PLAN. The test fails
+when a large table is read with a full table scan instead of an index.
+
+Run with:
+    pytest tests/performance/test_query_plans.py -v
+"""
+import random
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, insert, text
+
+from easy_booking.daos.booking import BookingDao
+from easy_booking.daos.booking_series import BookingSeriesDao
+from easy_booking.daos.room import RoomDao
+from easy_booking.daos.user import UserDao
+from easy_booking.models.booking import Booking, BookingStatus
+from easy_booking.models.booking_series import BookingSeries, Frequency
+from easy_booking.models.room import Room
+from easy_booking.models.user import User
+from easy_booking.schemas.page import TotalMode
+from easy_booking.schemas.room import RoomFilter, RoomSort
+from tests.utils.fake_data_generator import FakeDataGenerator
+
+USERS = 500
+ROOMS = 200
+BOOKINGS = 20000
+SERIES = 200
+LARGE_TABLES = ("bookings", "booking_series", "rooms", "users")
+# A bare "SCAN <table>" reads the whole table, "SCAN <table> USING INDEX" walks an index in order
+FULL_SCAN = re.compile(rf"^SCAN ({'|'.join(LARGE_TABLES)})$")
+
+
+class TestQueryPlans:
+
+    def test_dao_queries_do_not_scan_large_tables(self, perf_event_loop, perf_engine, perf_session_factory):
+        origin = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        random.seed(42)
+        users = [FakeDataGenerator.fake_user() for _ in range(USERS)]
+        room_ids = [uuid.uuid4() for _ in range(ROOMS)]
+        bookings = []
+        for _ in range(BOOKINGS):
+            start_time = origin + timedelta(hours=random.randint(0, 24 * 365))
+            bookings.append(
+                {
+                    "id": uuid.uuid4(),
+                    "user_id": random.choice(users)["id"],
+                    "room_id": random.choice(room_ids),
+                    "start_time": start_time,
+                    "end_time": start_time + timedelta(hours=1),
+                    "status": BookingStatus.SCHEDULED,
+                    "created_at": start_time,
+                }
+            )
+
+        async def setup_dataset():
+            async with perf_engine.begin() as conn:
+                await conn.execute(insert(User), users)
+                await conn.execute(
+                    insert(Room),
+                    [
+                        {"id": room_id, "name": f"Room {i}", "address": "1 rue de la Paix", "capacity": random.randint(1, 50)}
+                        for i, room_id in enumerate(room_ids)
+                    ],
+                )
+                await conn.execute(insert(Booking), bookings)
+                await conn.execute(
+                    insert(BookingSeries),
+                    [
+                        {
+                            "id": uuid.uuid4(),
+                            "user_id": random.choice(users)["id"],
+                            "room_id": random.choice(room_ids),
+                            "start_time": origin + timedelta(days=i, hours=8),
+                            "end_time": origin + timedelta(days=i, hours=9),
+                            "frequency": Frequency.WEEKLY,
+                            "interval": 1,
+                            "count": 10,
+                            "ends_at": origin + timedelta(days=i + 63, hours=9),
+                            "status": BookingStatus.SCHEDULED,
+                            "created_at": origin + timedelta(days=i),
+                        }
+                        for i in range(SERIES)
+                    ],
+                )
+                await conn.execute(text("ANALYZE"))
+
+        perf_event_loop.run_until_complete(setup_dataset())
+
+        user = users[0]
+        booking = bookings[0]
+        start_time = origin + timedelta(days=180, hours=9)
+        end_time = start_time + timedelta(hours=2)
+
+        async def run_dao_queries():
+            async with perf_session_factory() as session:
+                user_dao = UserDao(session)
+                await user_dao.get_by_id(user["id"])
+                await user_dao.user_db.get_by_email(user["email"].upper())
+                items, _ = await user_dao.get_page(0, 10)
+                await user_dao.get_page(0, 10, cursor=user_dao.encode_cursor(items[-1]), total=TotalMode.NONE)
+
+                room_dao = RoomDao(session)
+                await room_dao.get_by_id(booking["room_id"])
+                await room_dao.get_by_ids(room_ids[:5])
+                await room_dao.get_page(0, 10)
+                await RoomDao(session, sort=RoomSort.CAPACITY_DESC).get_page(
+                    0, 10, filters=RoomFilter(capacity__gte=10, capacity__lte=20), total=TotalMode.NONE
+                )
+                await room_dao.get_available(start_time, end_time, min_capacity=10, total=TotalMode.NONE)
+
+                booking_dao = BookingDao(session)
+                await booking_dao.get_by_id(booking["id"])
+                items, _ = await booking_dao.get_page(0, 10, user_id=user["id"])
+                await booking_dao.get_page(0, 10, total=TotalMode.NONE)
+                await booking_dao.get_busy_intervals(booking["room_id"], start_time, end_time)
+                await booking_dao.get_in_window(start_time, end_time, room_id=booking["room_id"], limit=10)
+                await booking_dao.get_in_window(start_time, end_time, user_id=user["id"], limit=10)
+                await booking_dao.get_busy_intervals_by_room({room_id: (start_time, end_time) for room_id in room_ids[:5]})
+                await booking_dao.check_overlapping_bookings(booking["room_id"], start_time, end_time)
+                await booking_dao.update_by_id(booking["id"], {"status": BookingStatus.CONFIRMED})
+                await booking_dao.delete_by_id(bookings[1]["id"])
+
+                series_dao = BookingSeriesDao(session)
+                await series_dao.get_page(0, 10, user_id=user["id"])
+                await series_dao.get_overlapping(start_time, end_time, user_id=user["id"])
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if not statement.lstrip().upper().startswith("INSERT"):
+                statements.append((statement, parameters))
+
+        event.listen(perf_engine.sync_engine, "before_cursor_execute", capture)
+        perf_event_loop.run_until_complete(run_dao_queries())
+        event.remove(perf_engine.sync_engine, "before_cursor_execute", capture)
+
+        async def explain(statement, parameters):
+            async with perf_engine.connect() as conn:
+                result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                return [row[-1] for row in result.all()]
+
+        full_scans = {}
+        for statement, parameters in statements:
+            for step in perf_event_loop.run_until_complete(explain(statement, parameters)):
+                if FULL_SCAN.match(step):
+                    full_scans.setdefault(step, []).append(statement)
+        assert len(statements) > 20
+        assert not full_scans, full_scans
@@ -0,0 +1,168 @@
+"""
+Performance tests for the room listing filters, sorts and text search.
+
+PERF_SEARCH_ROOMS rooms (100k by default) are loaded, then a filtered page
+sorted by capacity is benchmarked on SQLite, which must walk
+ix_rooms_capacity_id instead of sorting the table.
+
+The PostgreSQL variant runs against the scratch database of PERF_DATABASE_URI
+with the pg_trgm GIN indexes of the room_search_indexes migration. It searches
+a misspelled room name, checks the trigram indexes serve it and fails when the
+p50 is above PERF_ROOM_SEARCH_P50_MS (20ms by default).
+
+Run with:
+    pytest tests/performance/test_room_search_performance.py --benchmark-only -v
+"""
+import hashlib
+import os
+import statistics
+import time
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from easy_booking.models.room import Room
+from easy_booking.schemas.page import TotalMode
+from easy_booking.schemas.room import RoomFilter, RoomSort, RoomStatus
+from easy_booking.services.room import RoomService
+
+PERF_SEARCH_ROOMS = int(os.getenv("PERF_SEARCH_ROOMS", "100000"))
+PERF_ROOM_SEARCH_P50_MS = float(os.getenv("PERF_ROOM_SEARCH_P50_MS", "20"))
+STATUSES = ("available", "unavailable", "maintenance")
+
+
+def room_word(i: int) -> str:
+    return hashlib.md5(str(i).encode()).hexdigest()[:10]
+
+
+def capture_statements(engine, run) -> list:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    return statements
+
+
+class TestRoomSearchPerformance:
+
+    def test_filtered_sorted_page_performance(self, benchmark, perf_event_loop, perf_engine, perf_session_factory):
+        async def setup_dataset():
+            async with perf_engine.begin() as conn:
+                await conn.execute(
+                    insert(Room),
+                    [
+                        {
+                            "name": f"Room {room_word(i)}",
+                            "address": f"{i % 500} Main Street",
+                            "capacity": 1 + i % 200,
+                            "status": STATUSES[i % 3],
+                        }
+                        for i in range(PERF_SEARCH_ROOMS)
+                    ],
+                )
+                await conn.execute(text("ANALYZE"))
+
+        perf_event_loop.run_until_complete(setup_dataset())
+        filters = RoomFilter(status=RoomStatus.AVAILABLE, capacity__gte=50, capacity__lte=60)
+
+        async def get_page():
+            async with perf_session_factory() as session:
+                return await RoomService.get_all_room(
+                    0, 20, session, total=TotalMode.NONE, filters=filters, sort=RoomSort.CAPACITY_DESC
+                )
+
+        def run_get_page():
+            return perf_event_loop.run_until_complete(get_page())
+
+        result = benchmark(run_get_page)
+        benchmark.extra_info["rooms"] = PERF_SEARCH_ROOMS
+        assert len(result.items) == 20
+        assert all(room.capacity == 60 and room.status == RoomStatus.AVAILABLE for room in result.items)
+
+        statement, parameters = capture_statements(perf_engine, run_get_page)[-1]
+
+        async def explain():
+            async with perf_engine.connect() as conn:
+                result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                return " ".join(row[-1] for row in result.all())
+
+        plan = perf_event_loop.run_until_complete(explain())
+        # Read in index order, no sort of the matching rooms
+        assert "USING INDEX ix_rooms_capacity_id" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.skipif(not os.getenv("PERF_DATABASE_URI"), reason="PERF_DATABASE_URI is not set")
+class TestRoomSearchPostgresPerformance:
+
+    def test_search_postgres_performance(self, benchmark, perf_event_loop, pg_engine, pg_session_factory):
+        """
+        Benchmark a misspelled name search over PERF_SEARCH_ROOMS rooms on PostgreSQL.
+
+        The rooms are generated server side, then the indexes of the
+        room_search_indexes migration are built on top of them.
+        """
+        async def setup_dataset():
+            async with pg_engine.begin() as conn:
+                await conn.execute(
+                    text(
+                        """
+                        INSERT INTO rooms (id, name, description, address, capacity, status)
+                        SELECT gen_random_uuid(), 'Room ' || left(md5(i::text), 10), 'Floor ' || i % 20,
+                               i % 500 || ' Main Street', 1 + i % 200, 'available'
+                        FROM generate_series(0, :rooms - 1) AS i
+                        """
+                    ),
+                    {"rooms": PERF_SEARCH_ROOMS},
+                )
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                for column in ("name", "description", "address"):
+                    await conn.execute(
+                        text(f"CREATE INDEX ix_rooms_{column}_trgm ON rooms USING gin ({column} gin_trgm_ops)")
+                    )
+                await conn.execute(text("ANALYZE rooms"))
+
+        perf_event_loop.run_until_complete(setup_dataset())
+        target = room_word(PERF_SEARCH_ROOMS // 2)
+        # One character dropped in the middle, no longer a substring of the name
+        misspelled = target[:5] + target[6:]
+
+        async def search():
+            async with pg_session_factory() as session:
+                return await RoomService.get_all_room(
+                    0, 20, session, total=TotalMode.NONE, filters=RoomFilter(search=misspelled)
+                )
+
+        def run_search():
+            return perf_event_loop.run_until_complete(search())
+
+        result = benchmark(run_search)
+        assert f"Room {target}" in [room.name for room in result.items]
+
+        # Timed by hand as well so the target is checked with --benchmark-disable too
+        durations = []
+        for _ in range(50):
+            started = time.perf_counter()
+            run_search()
+            durations.append((time.perf_counter() - started) * 1000)
+        p50 = statistics.median(durations)
+        benchmark.extra_info["rooms"] = PERF_SEARCH_ROOMS
+        benchmark.extra_info["p50_ms"] = round(p50, 3)
+
+        statement, parameters = capture_statements(pg_engine, run_search)[-1]
+
+        async def explain():
+            async with pg_engine.connect() as conn:
+                result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+                return " ".join(row[0] for row in result.all())
+
+        plan = perf_event_loop.run_until_complete(explain())
+        assert "ix_rooms_name_trgm" in plan
+        assert "Seq Scan" not in plan
+        assert p50 < PERF_ROOM_SEARCH_P50_MS
@@ -7,67 +7,48 @@ event_loop.run_until_complete() to execute async functions within benchmarks.
 Run with:
     pytest tests/performance/test_services_performance.py --benchmark-only -v
 
+Create benchmarks also record the number of database round trips
+(statements + commit) of one operation in benchmark.extra_info["round_trips"].
+
+The 1,000 bookings page serialization is benchmarked twice in the
+"bookings-page" group: "legacy" validates each row then the page again and
+goes through jsonable_encoder + json.dumps, "response_model" is the path
+FastAPI takes for Page.from_rows.
+
+The login benchmark records logins/sec per hashing thread, capped at the
+number of cores, in benchmark.extra_info["logins_per_second_per_core"].
+
 Note: pytest-benchmark should NOT be run with pytest-xdist (-n auto) as
 benchmarks need to run serially for accurate timing measurements.
 """
+
 import asyncio
+import json
+import os
+import time
+
 import pytest
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.pool import StaticPool
+from fastapi.encoders import jsonable_encoder
+from fastapi.security import OAuth2PasswordRequestForm
+from pydantic import TypeAdapter
 
+from easy_booking.auth.password import password_helper
+from easy_booking.schemas.user import UserCreate
 from easy_booking.services.user import UserService
 from easy_booking.services.room import RoomService
 from easy_booking.services.booking import BookingService
 from easy_booking.daos.user import UserDao
 from easy_booking.daos.room import RoomDao
 from easy_booking.daos.booking import BookingDao
-from easy_booking.models.base import Base
+from easy_booking.schemas.booking import BookingBulkIn, BookingOut
+from easy_booking.schemas.page import Page, TotalMode
 from datetime import datetime, timedelta, timezone
 from tests.utils.fake_data_generator import FakeDataGenerator
 
 
-@pytest.fixture(scope="function")
-def perf_event_loop():
-    loop = asyncio.new_event_loop()
-    yield loop
-    loop.close()
-
-
-@pytest.fixture(scope="function")
-def perf_engine(perf_event_loop):
-    engine = create_async_engine(
-        "sqlite+aiosqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-        echo=False,
-    )
-    
-    async def setup_db():
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-    
-    perf_event_loop.run_until_complete(setup_db())
-    yield engine
-    
-    async def teardown_db():
-        await engine.dispose()
-    
-    perf_event_loop.run_until_complete(teardown_db())
-
-
-@pytest.fixture(scope="function")
-def perf_session_factory(perf_engine):
-    return async_sessionmaker(
-        autocommit=False,
-        autoflush=False,
-        bind=perf_engine,
-        expire_on_commit=False,
-    )
-
-
 class TestUserServicePerformance:
 
-    def test_create_user_performance(self, benchmark, perf_event_loop, perf_session_factory):
+    def test_create_user_performance(self, benchmark, perf_event_loop, perf_session_factory, round_trips):
         """
         Benchmark the time it takes to create a single user.
         
@@ -90,6 +71,10 @@ class TestUserServicePerformance:
         assert result is not None
         assert result.id is not None
 
+        _, trips = round_trips.measure(run_create_user)
+        benchmark.extra_info["round_trips"] = trips
+        assert trips == 2
+
     def test_get_all_users_performance(self, benchmark, perf_event_loop, perf_session_factory):
         """
         Benchmark retrieving a page of users (10 users from a set of 50).
@@ -235,10 +220,56 @@ class TestUserServiceBulkPerformance:
         result = benchmark(run_pagination)
         assert len(result) == 5
 
+    def test_login_throughput_performance(self, benchmark, perf_event_loop, perf_session_factory):
+        """
+        Benchmark concurrent logins, 4 per password hashing thread.
+
+        Each login looks the user up and verifies the password in the
+        hashing pool, so the event loop stays free while they run.
+        """
+        logins = 4 * password_helper.workers
+        user_data = FakeDataGenerator.fake_user()
+
+        async def setup_user():
+            async with perf_session_factory() as session:
+                await UserService(UserDao(session).user_db).create(
+                    UserCreate(
+                        first_name=user_data["first_name"],
+                        last_name=user_data["last_name"],
+                        email=user_data["email"],
+                        password="password123",
+                    )
+                )
+
+        perf_event_loop.run_until_complete(setup_user())
+
+        async def login():
+            async with perf_session_factory() as session:
+                return await UserService(UserDao(session).user_db).authenticate(
+                    OAuth2PasswordRequestForm(username=user_data["email"], password="password123")
+                )
+
+        async def login_many():
+            return await asyncio.gather(*(login() for _ in range(logins)))
+
+        def run_login_many():
+            return perf_event_loop.run_until_complete(login_many())
+
+        result = benchmark(run_login_many)
+        assert all(user is not None for user in result)
+
+        started = time.perf_counter()
+        run_login_many()
+        logins_per_second = logins / (time.perf_counter() - started)
+        benchmark.extra_info["logins_per_second"] = round(logins_per_second, 1)
+        benchmark.extra_info["logins_per_second_per_core"] = round(
+            logins_per_second / min(password_helper.workers, os.cpu_count() or 1), 1
+        )
+
 
 class TestRoomServicePerformance:
 
-    def test_create_room_performance(self, benchmark, perf_event_loop, perf_session_factory):
+    def test_create_room_performance(self, benchmark, perf_event_loop, perf_session_factory, round_trips):
         """
         Benchmark the time it takes to create a single room.
         """
@@ -256,6 +287,10 @@ class TestRoomServicePerformance:
         assert result is not None
         assert result.id is not None
 
+        _, trips = round_trips.measure(run_create_room)
+        benchmark.extra_info["round_trips"] = trips
+        assert trips == 2
+
     def test_get_all_rooms_performance(self, benchmark, perf_event_loop, perf_session_factory):
         """
         Benchmark retrieving a page of rooms (10 rooms from a set of 50).
@@ -388,11 +423,38 @@ class TestRoomServiceBulkPerformance:
         result = benchmark(run_pagination)
         assert len(result) == 5
 
+    def test_get_all_rooms_window_total_performance(self, benchmark, perf_event_loop, perf_session_factory, round_trips):
+        """
+        Benchmark retrieving a page of rooms with the total counted in the page query.
+        """
+        async def setup_rooms():
+            async with perf_session_factory() as session:
+                room_dao = RoomDao(session)
+                for _ in range(50):
+                    await room_dao.create(FakeDataGenerator.fake_room())
+
+        perf_event_loop.run_until_complete(setup_rooms())
+
+        async def get_rooms():
+            async with perf_session_factory() as session:
+                return await RoomService.get_all_room(0, 10, session, total=TotalMode.WINDOW)
+
+        def run_get_rooms():
+            return perf_event_loop.run_until_complete(get_rooms())
+
+        result = benchmark(run_get_rooms)
+        assert result.total == 50
+        assert len(result.items) == 10
+
+        _, trips = round_trips.measure(run_get_rooms)
+        benchmark.extra_info["round_trips"] = trips
+        assert trips == 1
+
 # BOOKING SERVICE PERFORMANCE TESTS
 
 class TestBookingServicePerformance:
 
-    def test_create_booking_performance(self, benchmark, perf_event_loop, perf_session_factory):
+    def test_create_booking_performance(self, benchmark, perf_event_loop, perf_session_factory, round_trips):
         """
         Benchmark the time it takes to create a single booking.
         
@@ -432,6 +494,11 @@ class TestBookingServicePerformance:
         assert result is not None
         assert result.id is not None
 
+        # room lookup, overlap check, series lookup, INSERT ... RETURNING, joined reload, commit
+        _, trips = round_trips.measure(run_create_booking)
+        benchmark.extra_info["round_trips"] = trips
+        assert trips == 6
+
     def test_get_all_bookings_performance(self, benchmark, perf_event_loop, perf_session_factory):
         """
         Benchmark retrieving a page of bookings (10 bookings from a set of 50).
@@ -470,6 +537,38 @@ class TestBookingServicePerformance:
         assert result.total == 50
         assert len(result.items) == 10
 
+    def test_get_sparse_bookings_performance(self, benchmark, perf_event_loop, perf_session_factory, round_trips):
+        """
+        Benchmark a calendar page: ids and times only, no relationship, no total.
+
+        It must be a single query on the bookings columns it needs.
+        """
+        async def setup_bookings():
+            async with perf_session_factory() as session:
+                user = await UserDao(session).create(FakeDataGenerator.fake_user())
+                room = await RoomDao(session).create(FakeDataGenerator.fake_room())
+                await BookingDao(session).create_many(
+                    [FakeDataGenerator.fake_booking_data(user.id, room.id) for _ in range(50)]
+                )
+
+        perf_event_loop.run_until_complete(setup_bookings())
+
+        async def get_bookings():
+            async with perf_session_factory() as session:
+                return await BookingService.get_all_booking(
+                    0, 10, session, total=TotalMode.NONE, fields=["id", "start_time", "end_time"], expand=[]
+                )
+
+        def run_get_bookings():
+            return perf_event_loop.run_until_complete(get_bookings())
+
+        result = benchmark(run_get_bookings)
+        assert len(result.items) == 10
+
+        _, trips = round_trips.measure(run_get_bookings)
+        benchmark.extra_info["round_trips"] = trips
+        assert trips == 1
+
     def test_get_booking_by_id_performance(self, benchmark, perf_event_loop, perf_session_factory):
         """
         Benchmark retrieving a single booking by ID (includes eager loading of user and room).
@@ -547,6 +646,46 @@ class TestBookingServicePerformance:
         benchmark.pedantic(run_delete_booking, iterations=1, rounds=50)
 
 
+class TestBookingPageSerializationPerformance:
+
+    @pytest.mark.parametrize("path", ["legacy", "response_model"])
+    def test_serialize_bookings_page_performance(self, benchmark, perf_event_loop, perf_session_factory, path):
+        """
+        Benchmark turning a 1,000 bookings page into the JSON response body.
+
+        Both paths start from the same ORM rows and produce the same JSON.
+        """
+        benchmark.group = "bookings-page"
+
+        async def get_bookings():
+            async with perf_session_factory() as session:
+                user = await UserDao(session).create(FakeDataGenerator.fake_user())
+                rooms = [await RoomDao(session).create(FakeDataGenerator.fake_room()) for _ in range(10)]
+                booking_dao = BookingDao(session)
+                await booking_dao.create_many(
+                    [FakeDataGenerator.fake_booking_data(user.id, rooms[i % 10].id) for i in range(1000)]
+                )
+                bookings, _ = await booking_dao.get_page(0, 1000, total=TotalMode.NONE)
+                return bookings
+
+        bookings = perf_event_loop.run_until_complete(get_bookings())
+        response_model = TypeAdapter(Page[BookingOut])
+
+        def serialize_legacy():
+            page = Page(items=[BookingOut.model_validate(_booking) for _booking in bookings], offset=0, limit=1000)
+            page = response_model.validate_python(page)
+            return json.dumps(jsonable_encoder(page)).encode()
+
+        def serialize_response_model():
+            page = Page[BookingOut].from_rows(bookings, offset=0, limit=1000)
+            return response_model.dump_json(response_model.validate_python(page))
+
+        serialize = serialize_legacy if path == "legacy" else serialize_response_model
+        result = benchmark(serialize)
+        assert len(json.loads(result)["items"]) == 1000
+        assert json.loads(result) == json.loads(serialize_legacy())
+
+
 class TestBookingServiceBulkPerformance:
 
     def test_create_multiple_bookings_performance(self, benchmark, perf_event_loop, perf_session_factory):
@@ -589,6 +728,48 @@ class TestBookingServiceBulkPerformance:
         result = benchmark(run_create_multiple)
         assert len(result) == 10
 
+    def test_create_bulk_bookings_performance(self, benchmark, perf_event_loop, perf_session_factory, round_trips):
+        """
+        Benchmark creating 10 bookings over 10 rooms with one bulk call.
+        """
+        user_id = None
+        room_ids = []
+
+        async def setup_dependencies():
+            nonlocal user_id
+            async with perf_session_factory() as session:
+                user_id = (await UserDao(session).create(FakeDataGenerator.fake_user())).id
+                for _ in range(10):
+                    room = await RoomDao(session).create(FakeDataGenerator.fake_room())
+                    room_ids.append(room.id)
+
+        perf_event_loop.run_until_complete(setup_dependencies())
+
+        booking_cpt = [0]
+        async def create_bulk_bookings():
+            booking_cpt[0] += 1
+            async with perf_session_factory() as session:
+                bulk = BookingBulkIn(items=[
+                    FakeDataGenerator.fake_booking_in({
+                        "room_id": room_id,
+                        "start_time": datetime.now(timezone.utc) + timedelta(days=booking_cpt[0]),
+                        "end_time": datetime.now(timezone.utc) + timedelta(days=booking_cpt[0], hours=2)
+                    })
+                    for room_id in room_ids
+                ])
+                return await BookingService.add_bookings(bulk, session, user_id)
+
+        def run_create_bulk():
+            return perf_event_loop.run_until_complete(create_bulk_bookings())
+
+        result = benchmark(run_create_bulk)
+        assert result.created == 10
+
+        # rooms lookup, busy intervals, series lookup, multi-row INSERT, joined reload, commit
+        _, trips = round_trips.measure(run_create_bulk)
+        benchmark.extra_info["round_trips"] = trips
+        assert trips == 6
+
     def test_get_all_bookings_pagination_performance(self, benchmark, perf_event_loop, perf_session_factory):
         """
         Benchmark pagination through a larger dataset of bookings.
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from easy_booking.models.booking_series import Frequency
+from easy_booking.recurrence import add_months, occurrence_total, occurrences, series_end
+
+START = datetime(2030, 1, 6, 9, tzinfo=timezone.utc)
+
+
+def series(
+    frequency=Frequency.WEEKLY, interval=1, until=None, count=None, start_time=START, hours=1, time_zone="UTC"
+):
+    return SimpleNamespace(
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=hours),
+        frequency=frequency,
+        interval=interval,
+        time_zone=time_zone,
+        until=until,
+        count=count,
+    )
+
+
+class TestRecurrence:
+    def test_add_months_clamps_to_month_end(self):
+        moment = datetime(2030, 1, 31, 9, tzinfo=timezone.utc)
+
+        assert add_months(moment, 1) == datetime(2030, 2, 28, 9, tzinfo=timezone.utc)
+        assert add_months(moment, 2) == datetime(2030, 3, 31, 9, tzinfo=timezone.utc)
+        assert add_months(moment, 12) == datetime(2031, 1, 31, 9, tzinfo=timezone.utc)
+
+    def test_occurrence_total(self):
+        assert occurrence_total(series(count=10)) == 10
+        assert occurrence_total(series(until=START + timedelta(weeks=4))) == 5
+        assert occurrence_total(series(until=START + timedelta(weeks=4), count=3)) == 3
+        assert occurrence_total(series(until=START - timedelta(days=1))) == 0
+        assert occurrence_total(series(Frequency.MONTHLY, until=datetime(2030, 12, 31, tzinfo=timezone.utc))) == 12
+        assert occurrence_total(series(Frequency.DAILY, interval=2, until=START + timedelta(days=9))) == 5
+        with pytest.raises(ValueError):
+            occurrence_total(series())
+
+    def test_series_end(self):
+        assert series_end(series(count=3)) == START + timedelta(weeks=2, hours=1)
+        assert series_end(series(until=START - timedelta(days=1))) is None
+
+    def test_occurrences_in_window(self):
+        weekly = series(count=520)
+        window_start = START + timedelta(weeks=300, hours=-1)
+
+        found = list(occurrences(weekly, window_start, window_start + timedelta(weeks=2)))
+
+        assert found == [
+            (START + timedelta(weeks=300), START + timedelta(weeks=300, hours=1)),
+            (START + timedelta(weeks=301), START + timedelta(weeks=301, hours=1)),
+        ]
+
+    def test_occurrences_partially_overlapping_window(self):
+        daily = series(Frequency.DAILY, count=5, hours=2)
+
+        found = list(occurrences(daily, START + timedelta(hours=1), START + timedelta(days=1, minutes=1)))
+
+        assert [start for start, _ in found] == [START, START + timedelta(days=1)]
+
+    def test_occurrences_stop_at_count(self):
+        monthly = series(Frequency.MONTHLY, count=3, start_time=datetime(2030, 1, 31, 9, tzinfo=timezone.utc))
+
+        found = list(occurrences(monthly, datetime(2030, 1, 1, tzinfo=timezone.utc), datetime(2031, 1, 1, tzinfo=timezone.utc)))
+
+        assert [start.date().isoformat() for start, _ in found] == ["2030-01-31", "2030-02-28", "2030-03-31"]
+
+    def test_naive_datetimes_are_taken_as_utc(self):
+        naive = series(count=2, start_time=START.replace(tzinfo=None))
+
+        found = list(occurrences(naive, START, START + timedelta(weeks=2)))
+
+        assert found[0] == (START, START + timedelta(hours=1))
+
+    def test_occurrences_keep_local_wall_time_across_dst(self):
+        paris = ZoneInfo("Europe/Paris")
+        # 09:00 in Paris, before the switch to summer time on 2030-03-31
+        standup = series(count=52, start_time=datetime(2030, 3, 18, 9, tzinfo=paris), time_zone="Europe/Paris")
+
+        found = list(occurrences(standup, datetime(2030, 3, 18, tzinfo=timezone.utc), datetime(2030, 4, 8, tzinfo=timezone.utc)))
+
+        assert [start.astimezone(paris).hour for start, _ in found] == [9, 9, 9]
+        assert [start.hour for start, _ in found] == [8, 8, 7]
+        assert all(end - start == timedelta(hours=1) for start, end in found)
+
+        # Far from the start and back to winter time
+        found = list(occurrences(standup, datetime(2030, 11, 1, tzinfo=timezone.utc), datetime(2030, 11, 8, tzinfo=timezone.utc)))
+        assert found == [(datetime(2030, 11, 4, 8, tzinfo=timezone.utc), datetime(2030, 11, 4, 9, tzinfo=timezone.utc))]
+
+    def test_occurrence_total_across_dst(self):
+        paris = ZoneInfo("Europe/Paris")
+        standup = series(
+            start_time=datetime(2030, 3, 18, 9, tzinfo=paris),
+            until=datetime(2030, 4, 1, 9, tzinfo=paris),
+            time_zone="Europe/Paris",
+        )
+
+        assert occurrence_total(standup) == 3
+        assert series_end(standup) == datetime(2030, 4, 1, 10, tzinfo=paris)
@@ -12,11 +12,45 @@ from easy_booking.schemas.booking import BookingIn
 from easy_booking.services.booking import BookingService
 from easy_booking.services.room import RoomService
 from tests.utils.fake_data_generator import FakeDataGenerator
+from tests.utils.queries import assert_max_queries
 
 
 @pytest.mark.asyncio
 class TestBookingRouter:
 
+    async def test_get_all_booking_query_count(self, test_session, test_client, test_engine):
+        await BookingService.delete_all(test_session)
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        rooms = [await RoomDao(test_session).create(FakeDataGenerator.fake_room()) for _ in range(5)]
+        for i, room in enumerate(rooms):
+            await BookingService.add_booking(
+                FakeDataGenerator.fake_booking_in(
+                    override={
+                        "room_id": room.id,
+                        "start_time": datetime.now(timezone.utc) + timedelta(days=i),
+                        "end_time": datetime.now(timezone.utc) + timedelta(days=i, hours=1),
+                    }
+                ),
+                test_session,
+                created_user.id,
+            )
+
+        app.dependency_overrides[current_active_user] = lambda: created_user
+        try:
+            with assert_max_queries(test_engine, 2):
+                plain_response = await test_client.get("/booking/?expand=")
+            with assert_max_queries(test_engine, 4) as statements:
+                response = await test_client.get("/booking/")
+        finally:
+            del app.dependency_overrides[current_active_user]
+
+        assert plain_response.status_code == 200
+        assert len(response.json()["items"]) == 5
+        # The rooms of all the bookings are loaded at once, whatever the page size
+        assert sum("FROM rooms" in statement for statement in statements) == 1
+
+        await BookingService.delete_all(test_session)
+
     async def test_get_all_booking(self, test_session, test_client):
         await BookingService.delete_all(test_session)
         
@@ -66,6 +100,79 @@ class TestBookingRouter:
 
         await BookingService.delete_all(test_session)
 
+    async def test_get_all_booking_sparse(self, test_session, test_client):
+        await BookingService.delete_all(test_session)
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        created_booking = await BookingService.add_booking(
+            FakeDataGenerator.fake_booking_in(override={"room_id": created_room.id}), test_session, created_user.id
+        )
+
+        app.dependency_overrides[current_active_user] = lambda: created_user
+        try:
+            response = await test_client.get("/booking/?fields=id,start_time,end_time&expand=")
+            invalid_response = await test_client.get("/booking/?expand=user,owner")
+        finally:
+            del app.dependency_overrides[current_active_user]
+        single_response = await test_client.get(f"/booking/{created_booking.id}?fields=status&expand=room")
+
+        assert response.status_code == 200
+        assert response.json()["items"] == [
+            {
+                "id": str(created_booking.id),
+                "start_time": created_booking.start_time.isoformat().replace("+00:00", "Z"),
+                "end_time": created_booking.end_time.isoformat().replace("+00:00", "Z"),
+            }
+        ]
+        assert invalid_response.status_code == 400
+        assert single_response.status_code == 200
+        assert single_response.json().keys() == {"status", "room"}
+        assert single_response.json()["room"]["id"] == str(created_room.id)
+
+        await BookingService.delete_all(test_session)
+
+    async def test_export_booking(self, test_session, test_client):
+        await BookingService.delete_all(test_session)
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        created_booking = await BookingService.add_booking(
+            FakeDataGenerator.fake_booking_in(override={"room_id": created_room.id}), test_session, created_user.id
+        )
+
+        app.dependency_overrides[current_active_user] = lambda: created_user
+        try:
+            csv_response = await test_client.get(f"/booking/export?format=csv&room_id={created_room.id}")
+            ndjson_response = await test_client.get("/booking/export")
+            # A naive bound is taken as UTC, next to an aware one
+            now = datetime.now(timezone.utc)
+            mixed_response = await test_client.get(
+                "/booking/export",
+                params={
+                    "start": (now - timedelta(days=1)).isoformat(),
+                    "end": (now + timedelta(days=2)).replace(tzinfo=None).isoformat(),
+                },
+            )
+            reversed_response = await test_client.get(
+                "/booking/export",
+                params={"start": (now + timedelta(days=1)).replace(tzinfo=None).isoformat(), "end": now.isoformat()},
+            )
+        finally:
+            del app.dependency_overrides[current_active_user]
+
+        assert csv_response.status_code == 200
+        assert csv_response.headers["content-type"].startswith("text/csv")
+        assert csv_response.headers["content-disposition"] == 'attachment; filename="bookings.csv"'
+        lines = csv_response.text.splitlines()
+        assert lines[0] == "room_id,start_time,end_time,id,user_id,status,created_at"
+        assert lines[1].startswith(str(created_room.id))
+        assert ndjson_response.headers["content-type"] == "application/x-ndjson"
+        assert ndjson_response.json()["id"] == str(created_booking.id)
+        assert mixed_response.status_code == 200
+        assert mixed_response.json()["id"] == str(created_booking.id)
+        assert reversed_response.status_code == 400
+
+        await BookingService.delete_all(test_session)
+
     async def test_get_all_booking_filtering(self, test_session, test_client):
         await BookingService.delete_all(test_session)
         
@@ -108,6 +215,39 @@ class TestBookingRouter:
         # Cleanup
         await BookingService.delete_all(test_session)
 
+    async def test_get_all_booking_total_modes(self, test_session, test_client):
+        await BookingService.delete_all(test_session)
+
+        user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        for i in range(3):
+            await BookingService.add_booking(
+                FakeDataGenerator.fake_booking_in(
+                    override={
+                        "room_id": room.id,
+                        "start_time": datetime.now(timezone.utc) + timedelta(days=i),
+                        "end_time": datetime.now(timezone.utc) + timedelta(days=i, hours=2),
+                    }
+                ),
+                test_session,
+                user.id,
+            )
+
+        app.dependency_overrides[current_active_user] = lambda: user
+        try:
+            window_response = await test_client.get("/booking/?limit=2&total_mode=window")
+            no_total_response = await test_client.get("/booking/?limit=2&with_total=false")
+        finally:
+            del app.dependency_overrides[current_active_user]
+
+        assert window_response.status_code == 200
+        assert window_response.json()["total"] == 3
+        assert len(window_response.json()["items"]) == 2
+        assert no_total_response.status_code == 200
+        assert no_total_response.json()["total"] is None
+
+        await BookingService.delete_all(test_session)
+
     async def test_get_booking_by_id(self, test_session, test_client):
         user_dao = UserDao(test_session)
         room_dao = RoomDao(test_session)
@@ -170,6 +310,58 @@ class TestBookingRouter:
 
         assert await BookingDao(test_session).get_by_id(created_booking.id) is None
 
+    async def test_add_bookings(self, test_session, test_client):
+        await BookingService.delete_all(test_session)
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        start_time = datetime(2031, 5, 1, 9, tzinfo=timezone.utc)
+        payload = {
+            "items": [
+                {
+                    "room_id": str(created_room.id),
+                    "start_time": (start_time + timedelta(hours=i)).isoformat(),
+                    "end_time": (start_time + timedelta(hours=i + 1)).isoformat(),
+                }
+                for i in (0, 1, 0)
+            ]
+        }
+
+        app.dependency_overrides[current_active_user] = lambda: created_user
+        try:
+            response = await test_client.post("/booking/bulk", json=payload)
+            invalid = await test_client.post("/booking/bulk", json={"items": []})
+        finally:
+            del app.dependency_overrides[current_active_user]
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result["created"] == 2
+        assert [item["status_code"] for item in result["results"]] == [201, 201, 400]
+        assert result["results"][0]["booking"]["user_id"] == str(created_user.id)
+        assert result["results"][2]["booking"] is None
+        assert invalid.status_code == 422
+
+        await BookingService.delete_all(test_session)
+
+    async def test_add_booking_reversed_period(self, test_session, test_client):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        start_time = datetime(2031, 5, 2, 9, tzinfo=timezone.utc)
+        payload = {
+            "room_id": str(created_room.id),
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time - timedelta(hours=1)).isoformat(),
+        }
+
+        app.dependency_overrides[current_active_user] = lambda: created_user
+        try:
+            response = await test_client.post("/booking/", json=payload)
+        finally:
+            del app.dependency_overrides[current_active_user]
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "The end of the period must be after its start"
+
     async def test_patch_booking_by_id(self, test_session, test_client):
         user_dao = UserDao(test_session)
         room_dao = RoomDao(test_session)
@@ -0,0 +1,73 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from easy_booking.api.v1.booking import current_active_user as booking_active_user
+from easy_booking.api.v1.booking_series import current_active_user
+from easy_booking.daos.room import RoomDao
+from easy_booking.daos.user import UserDao
+from easy_booking.main import app
+from easy_booking.services.booking_series import BookingSeriesService
+from tests.utils.fake_data_generator import FakeDataGenerator
+
+START = datetime(2034, 1, 2, 9, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+class TestBookingSeriesRouter:
+
+    async def test_booking_series_workflow(self, test_session, test_client):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        payload = {
+            "room_id": str(created_room.id),
+            "start_time": START.isoformat(),
+            "end_time": (START + timedelta(hours=1)).isoformat(),
+            "frequency": "weekly",
+            "count": 10,
+        }
+
+        app.dependency_overrides[current_active_user] = lambda: created_user
+        app.dependency_overrides[booking_active_user] = lambda: created_user
+        try:
+            response = await test_client.post("/series/", json=payload)
+            conflict = await test_client.post("/series/", json=payload)
+            unbounded = await test_client.post("/series/", json={**payload, "count": None})
+            page = await test_client.get("/series/?limit=10")
+            occurrences = await test_client.get(
+                "/booking/occurrences",
+                params={
+                    "start": (START + timedelta(weeks=2)).isoformat(),
+                    "end": (START + timedelta(weeks=4)).isoformat(),
+                    "room_id": str(created_room.id),
+                },
+            )
+        finally:
+            del app.dependency_overrides[current_active_user]
+            del app.dependency_overrides[booking_active_user]
+
+        assert response.status_code == 200
+        series_id = response.json()["id"]
+        assert conflict.status_code == 400
+        assert unbounded.status_code == 400
+        assert page.status_code == 200
+        assert series_id in [item["id"] for item in page.json()["items"]]
+        assert occurrences.status_code == 200
+        assert [item["series_id"] for item in occurrences.json()] == [series_id, series_id]
+
+        response = await test_client.get(f"/series/{series_id}")
+        assert response.status_code == 200
+        assert response.json()["frequency"] == "weekly"
+
+        response = await test_client.delete(f"/series/{series_id}")
+        assert response.status_code == 200
+        response = await test_client.get(f"/series/{series_id}")
+        assert response.status_code == 404
+
+        await BookingSeriesService.delete_all(test_session)
+
+    async def test_get_series_by_id_not_found(self, test_client):
+        response = await test_client.get(f"/series/{uuid.uuid4()}")
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Booking series with the given id doesn't exist"
@@ -1,11 +1,20 @@
+import csv
+import inspect
+import io
+import json
 import uuid
 
 import pytest
 
+from easy_booking.api.v1.room import current_active_user, get_room, list_room
 from easy_booking.daos.room import RoomDao
+from easy_booking.daos.user import UserDao
+from easy_booking.db import get_session
+from easy_booking.main import app
 from easy_booking.schemas.room import RoomIn
 from easy_booking.services.room import RoomService
 from tests.utils.fake_data_generator import FakeDataGenerator
+from tests.utils.queries import assert_max_queries
 
 
 @pytest.mark.asyncio
@@ -69,6 +78,69 @@ class TestRoomRouter:
 
         await RoomService.delete_all(test_session)
 
+    async def test_export_room(self, test_session, test_client):
+        await RoomService.delete_all(test_session)
+        rooms = [
+            await RoomDao(test_session).create(FakeDataGenerator.fake_room(override={"name": f"Room {i}", "capacity": 10 * (i + 1)}))
+            for i in range(3)
+        ]
+
+        response = await test_client.get("/room/export?min_capacity=20")
+        csv_response = await test_client.get("/room/export?format=csv")
+
+        assert response.status_code == 200
+        assert [json.loads(line)["id"] for line in response.text.splitlines()] == [str(room.id) for room in rooms[1:]]
+        assert csv_response.headers["content-type"].startswith("text/csv")
+        assert [row["name"] for row in csv.DictReader(io.StringIO(csv_response.text))] == ["Room 0", "Room 1", "Room 2"]
+
+        await RoomService.delete_all(test_session)
+
+    async def test_import_room(self, test_session, test_client):
+        await RoomService.delete_all(test_session)
+        content = "name,address,capacity\nRoom A,1 Main St,10\nRoom B,2 Main St,-\n"
+
+        response = await test_client.post("/room/import", files={"file": ("rooms.csv", content, "text/csv")})
+        ndjson_response = await test_client.post(
+            "/room/import",
+            files={"file": ("rooms.txt", '{"name": "Room C", "address": "3 Main St", "capacity": 5}\n')},
+            params={"format": "ndjson"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["imported"] == 1
+        assert [error["line"] for error in response.json()["errors"]] == [3]
+        assert ndjson_response.json() == {"imported": 1, "errors": []}
+        assert await RoomDao(test_session).count() == 2
+
+        await RoomService.delete_all(test_session)
+
+    async def test_import_room_undecodable_file(self, test_session, test_client):
+        await RoomService.delete_all(test_session)
+        content = "name,address,capacity\nRoom A,1 Main St,10\nSalle \u00e9t\u00e9,2 Main St,20\n".encode("latin-1")
+
+        response = await test_client.post("/room/import", files={"file": ("rooms.csv", content, "text/csv")})
+
+        assert response.status_code == 200
+        assert response.json()["imported"] == 1
+        assert [error["line"] for error in response.json()["errors"]] == [3]
+        assert response.json()["errors"][0]["errors"][0].startswith("Invalid utf-8 text")
+
+        await RoomService.delete_all(test_session)
+
+    async def test_import_room_invalid_csv(self, test_session, test_client):
+        await RoomService.delete_all(test_session)
+        # A field over the csv module limit raises csv.Error
+        content = f"name,address,capacity\nRoom A,{'x' * (csv.field_size_limit() + 1)},10\nRoom B,2 Main St,20\n"
+
+        response = await test_client.post("/room/import", files={"file": ("rooms.csv", content, "text/csv")})
+
+        assert response.status_code == 200
+        assert response.json()["imported"] == 1
+        assert [error["line"] for error in response.json()["errors"]] == [2]
+        assert response.json()["errors"][0]["errors"][0].startswith("Invalid CSV")
+
+        await RoomService.delete_all(test_session)
+
     async def test_get_room_by_id(self, test_session, test_client):
         fake_room_data = FakeDataGenerator.fake_room()
         room_data = {
@@ -183,3 +255,123 @@ class TestRoomRouter:
 
         assert response.status_code == 404
 
+    async def test_room_listing_not_modified(self, test_session, test_client, test_engine):
+        await RoomService.delete_all(test_session)
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+
+        response = await test_client.get("/room/")
+        room_response = await test_client.get(f"/room/{created_room.id}")
+        with assert_max_queries(test_engine, 0):
+            not_modified = await test_client.get("/room/", headers={"If-None-Match": response.headers["etag"]})
+            room_not_modified = await test_client.get(
+                f"/room/{created_room.id}", headers={"If-None-Match": f'W/{room_response.headers["etag"]}'}
+            )
+
+        assert response.status_code == room_response.status_code == 200
+        assert response.json()["items"][0]["id"] == str(created_room.id)
+        assert not_modified.status_code == room_not_modified.status_code == 304
+        assert not_modified.headers["etag"] == response.headers["etag"]
+        assert not_modified.content == b""
+
+        await test_client.patch(f"/room/{created_room.id}", json={"capacity": 99})
+        modified = await test_client.get("/room/", headers={"If-None-Match": response.headers["etag"]})
+
+        assert modified.status_code == 200
+        assert modified.headers["etag"] != response.headers["etag"]
+        assert modified.json()["items"][0]["capacity"] == 99
+
+        await RoomService.delete_all(test_session)
+
+    async def test_cached_room_routes_read_the_primary(self):
+        # A replica behind the last room write would cache and serve its old rows until the next write
+        for endpoint in (list_room, get_room):
+            assert inspect.signature(endpoint).parameters["session"].default.dependency is get_session
+
+    async def test_get_all_room_filtered_and_sorted(self, test_session, test_client):
+        await RoomService.delete_all(test_session)
+        for name, capacity in (("Small meeting room", 4), ("Large meeting room", 40), ("Auditorium", 200)):
+            await RoomDao(test_session).create(FakeDataGenerator.fake_room({"name": name, "capacity": capacity}))
+
+        response = await test_client.get(
+            "/room/", params={"search": "meeting", "capacity__gte": 2, "sort": "-capacity"}
+        )
+        invalid_sort = await test_client.get("/room/", params={"sort": "address"})
+
+        assert response.status_code == 200
+        assert [room["name"] for room in response.json()["items"]] == ["Large meeting room", "Small meeting room"]
+        assert response.json()["total"] == 2
+        assert invalid_sort.status_code == 422
+
+        await RoomService.delete_all(test_session)
+
+    async def test_get_all_room_invalid_cursor(self, test_client):
+        response = await test_client.get("/room/?limit=10&cursor=not-a-cursor")
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "The given pagination cursor is invalid"
+
+    async def test_list_available_room(self, test_session, test_client):
+        await RoomService.delete_all(test_session)
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room({"capacity": 8}))
+
+        response = await test_client.get(
+            "/room/available",
+            params={"start": "2030-01-01T09:00:00Z", "end": "2030-01-01T10:00:00Z", "min_capacity": 8},
+        )
+
+        assert response.status_code == 200
+        assert [room["id"] for room in response.json()["items"]] == [str(created_room.id)]
+
+        response = await test_client.get(
+            "/room/available",
+            params={"start": "2030-01-01T10:00:00Z", "end": "2030-01-01T09:00:00Z"},
+        )
+        assert response.status_code == 400
+
+        # A naive bound is taken as UTC, next to an aware one
+        response = await test_client.get(
+            "/room/available",
+            params={"start": "2030-01-01T09:00:00Z", "end": "2030-01-01T10:00:00", "min_capacity": 8},
+        )
+        assert response.status_code == 200
+        assert [room["id"] for room in response.json()["items"]] == [str(created_room.id)]
+        response = await test_client.get(
+            "/room/available",
+            params={"start": "2030-01-01T10:00:00", "end": "2030-01-01T11:00:00+02:00"},
+        )
+        assert response.status_code == 400
+
+        await RoomService.delete_all(test_session)
+
+    async def test_get_room_slots(self, test_session, test_client):
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+
+        response = await test_client.get(
+            f"/room/{created_room.id}/slots",
+            params={"start": "2030-01-01T09:00:00Z", "end": "2030-01-01T10:00:00Z", "min_minutes": 30},
+        )
+
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        assert response.json()[0]["end_time"].startswith("2030-01-01T10:00:00")
+
+        response = await test_client.get(
+            f"/room/{uuid.uuid4()}/slots",
+            params={"start": "2030-01-01T09:00:00Z", "end": "2030-01-01T10:00:00Z"},
+        )
+        assert response.status_code == 404
+
+        await RoomDao(test_session).delete_by_id(created_room.id)
+
+    async def test_room_events_require_existing_room(self, test_session, test_client):
+        response = await test_client.get(f"/room/{uuid.uuid4()}/events")
+        assert response.status_code == 401
+
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        app.dependency_overrides[current_active_user] = lambda: created_user
+        try:
+            response = await test_client.get(f"/room/{uuid.uuid4()}/events")
+        finally:
+            del app.dependency_overrides[current_active_user]
+
+        assert response.status_code == 404
@@ -74,3 +74,8 @@ class TestUserRouter:
 
         assert response.status_code == 404
 
+
+    async def test_get_user_cache_stats_requires_superuser(self, test_client):
+        response = await test_client.get("/user/cache")
+
+        assert response.status_code == 401
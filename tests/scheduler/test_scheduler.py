@@ -0,0 +1,194 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from easy_booking import events
+from easy_booking.cache import Cache
+from easy_booking.daos.booking import BookingDao
+from easy_booking.daos.room import RoomDao
+from easy_booking.daos.user import UserDao
+from easy_booking.events import ALL, ChangeEvent, MemoryBus, evict_caches
+from easy_booking.models.base import Base
+from easy_booking.models.booking import Booking, BookingStatus
+from easy_booking.scheduler import BookingCompleter
+from easy_booking.settings import settings
+from easy_booking.streams import RESYNC, BookingBroadcaster
+from tests.utils.fake_data_generator import FakeDataGenerator
+
+
+async def add_ended_bookings(session_factory, count: int) -> None:
+    async with session_factory() as session:
+        _user = await UserDao(session).create(FakeDataGenerator.fake_user())
+        _room = await RoomDao(session).create(FakeDataGenerator.fake_room())
+        ended = datetime.now(timezone.utc) - timedelta(days=1)
+        await session.execute(
+            insert(Booking),
+            [
+                FakeDataGenerator.fake_booking_data(
+                    user_id=_user.id,
+                    room_id=_room.id,
+                    override={"start_time": ended - timedelta(hours=i + 1), "end_time": ended - timedelta(hours=i)},
+                )
+                for i in range(count)
+            ],
+        )
+        await session.commit()
+
+
+@pytest_asyncio.fixture
+async def session_factory(test_session_factory, test_db):
+    async with test_session_factory() as session:
+        await BookingDao(session).delete_all()
+    yield test_session_factory
+    async with test_session_factory() as session:
+        await BookingDao(session).delete_all()
+
+
+@pytest.mark.asyncio
+class TestBookingCompleter:
+    async def test_run_completes_in_batches(self, session_factory):
+        await add_ended_bookings(session_factory, 5)
+        completer = BookingCompleter(interval=60, batch_size=2)
+
+        assert await completer.run_once(session_factory) == 5
+        assert await completer.run_once(session_factory) == 0
+
+        async with session_factory() as session:
+            statuses = (await session.scalars(select(Booking.status))).all()
+        assert statuses == [BookingStatus.COMPLETED] * 5
+        assert (completer.runs, completer.failures, completer.completed) == (2, 0, 5)
+        assert (completer.last_completed, completer.last_batches) == (0, 1)
+        assert completer.last_success == completer.last_run > 0
+
+    async def test_completions_are_streamed(self, session_factory, monkeypatch):
+        broadcaster = BookingBroadcaster(queue_size=10, keepalive=5)
+        monkeypatch.setattr(events.bus, "subscribers", [broadcaster.publish])
+        await add_ended_bookings(session_factory, 1)
+        stream = broadcaster.stream()
+        await anext(stream)
+
+        await BookingCompleter(batch_size=10).run_once(session_factory)
+
+        message = await asyncio.wait_for(anext(stream), 1)
+        await stream.aclose()
+        assert message.startswith("event: updated\n")
+        assert '"status":"completed"' in message
+
+    async def test_full_batch_reaches_other_workers_without_flush(self, session_factory, monkeypatch):
+        """A default size batch is notified event by event, the other workers keep their caches and streams"""
+        hub = []
+        local, remote = MemoryBus(hub), MemoryBus(hub)
+        local.subscribe(evict_caches)
+        received = []
+        remote.subscribe(received.append)
+        remote_slots = Cache()
+        remote.subscribe(lambda change: remote_slots.clear() if change.table == ALL else None)
+        broadcaster = BookingBroadcaster(queue_size=settings.booking_completion_batch_size + 1, keepalive=5)
+        remote.subscribe(broadcaster.publish)
+        monkeypatch.setattr(events, "bus", local)
+        await add_ended_bookings(session_factory, settings.booking_completion_batch_size)
+        received.clear()
+        remote_slots.set("slots", [])
+        stream = broadcaster.stream()
+        await anext(stream)
+
+        completed = await BookingCompleter().run_once(session_factory)
+
+        messages = [await anext(stream) for _ in range(completed)]
+        await stream.aclose()
+        assert completed == settings.booking_completion_batch_size
+        assert ChangeEvent(table=ALL) not in received
+        assert len(received) == completed
+        assert "slots" in remote_slots
+        assert RESYNC not in messages
+        assert all(message.startswith("event: updated\n") for message in messages)
+
+    async def test_failed_run_is_counted(self):
+        def broken_session_factory():
+            raise ConnectionRefusedError("database is down")
+
+        completer = BookingCompleter()
+
+        with pytest.raises(ConnectionRefusedError):
+            await completer.run_once(broken_session_factory)
+
+        assert (completer.runs, completer.failures, completer.last_success) == (1, 1, 0)
+        assert "easy_booking_booking_completion_failures_total 1\n" in completer.render()
+
+    async def test_run_retries_after_failure(self, session_factory):
+        await add_ended_bookings(session_factory, 1)
+        attempts = []
+
+        def flaky_session_factory():
+            attempts.append(None)
+            if len(attempts) == 1:
+                raise ConnectionRefusedError("database is down")
+            return session_factory()
+
+        completer = BookingCompleter(interval=0.01)
+        task = asyncio.create_task(completer.run(flaky_session_factory))
+        try:
+            for _ in range(100):
+                if completer.completed:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        assert completer.failures == 1
+        assert completer.completed == 1
+
+    async def test_render(self):
+        completer = BookingCompleter()
+        completer.runs, completer.completed, completer.last_run = 3, 42, 1760000000.5
+
+        exposition = completer.render()
+
+        assert "# TYPE easy_booking_booking_completion_runs_total counter\n" in exposition
+        assert "easy_booking_booking_completion_bookings_total 42\n" in exposition
+        assert "easy_booking_booking_completion_last_run_timestamp_seconds 1760000000.5\n" in exposition
+
+    async def test_metrics_endpoint(self, test_client):
+        response = await test_client.get("/metrics")
+
+        assert "easy_booking_booking_completion_last_run_bookings" in response.text
+
+
+@pytest_asyncio.fixture
+async def pg_session_factory():
+    """Sessions of the scratch PostgreSQL database of PERF_DATABASE_URI, with its tables created for the test"""
+    engine = create_async_engine(os.environ["PERF_DATABASE_URI"])
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("PERF_DATABASE_URI"), reason="PERF_DATABASE_URI is not set")
+class TestBookingCompleterPostgres:
+    async def test_nodes_skip_each_others_batches(self, pg_session_factory):
+        """A batch locked by another node is skipped, neither waited for nor completed twice"""
+        await add_ended_bookings(pg_session_factory, 6)
+
+        async with pg_session_factory() as other_node:
+            locked = (
+                await other_node.scalars(select(Booking.id).order_by(Booking.end_time).limit(2).with_for_update())
+            ).all()
+
+            completed = await asyncio.wait_for(BookingCompleter(batch_size=2).run_once(pg_session_factory), 5)
+            await other_node.rollback()
+
+        assert completed == 4
+        async with pg_session_factory() as session:
+            scheduled = (await session.scalars(select(Booking.id).where(Booking.status == BookingStatus.SCHEDULED))).all()
+        assert sorted(scheduled) == sorted(locked)
@@ -1,15 +1,25 @@
+import csv
+import json
 import uuid
 from datetime import datetime, timedelta, timezone
 
+from unittest.mock import patch
+
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from easy_booking.daos.booking import BookingDao
 from easy_booking.daos.room import RoomDao
 from easy_booking.daos.user import UserDao
-from easy_booking.exceptions.booking import BookingNotFound
-from easy_booking.schemas.page import Page
+from easy_booking.cache import slot_cache
+from easy_booking.exceptions.booking import BATCHREJECTED, BookingNotFound, InvalidPeriod, UnknownField
+from easy_booking.exceptions.room import ALREADYBOOKED, RoomNotFound, RoomUnavailable
+from easy_booking.models.booking import BookingStatus
+from easy_booking.models.room import RoomStatus
+from easy_booking.schemas.booking import BookingBulkIn, BookingIn, BookingPatch
+from easy_booking.schemas.page import ExportFormat, Page
 from easy_booking.services.booking import BookingService
+from easy_booking.settings import settings
 from tests.utils.fake_data_generator import FakeDataGenerator
 
 
@@ -46,6 +56,21 @@ class TestBookingService:
 
         await BookingDao(test_session).delete_by_id(created_booking.id)
 
+    async def test_add_booking_without_precheck(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        booking_in = FakeDataGenerator.fake_booking_in(override={"room_id": created_room.id})
+
+        with patch.object(settings, "booking_overlap_precheck", False), patch.object(
+            BookingDao, "check_overlapping_bookings"
+        ) as mock_check:
+            created_booking = await BookingService.add_booking(booking_in, test_session, created_user.id)
+
+        mock_check.assert_not_called()
+        assert created_booking.room_id == created_room.id
+
+        await BookingDao(test_session).delete_by_id(created_booking.id)
+
     async def test_get_all_booking(self, test_session: AsyncSession):
         await BookingService.delete_all(test_session)
 
@@ -89,6 +114,240 @@ class TestBookingService:
 
         await BookingService.delete_all(test_session)
 
+    async def test_get_all_booking_sparse(self, test_session: AsyncSession):
+        await BookingService.delete_all(test_session)
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        created_booking = await BookingService.add_booking(
+            FakeDataGenerator.fake_booking_in(override={"room_id": created_room.id}), test_session, created_user.id
+        )
+
+        page_result = await BookingService.get_all_booking(
+            0, 10, test_session, fields=["id", "start_time", "end_time"], expand=[]
+        )
+        assert page_result.total == 1
+        assert page_result.items[0].model_dump().keys() == {"id", "start_time", "end_time"}
+        assert page_result.items[0].id == created_booking.id
+
+        page_result = await BookingService.get_all_booking(0, 10, test_session, fields=["status"], expand=["room"])
+        assert page_result.items[0].model_dump().keys() == {"status", "room"}
+        assert page_result.items[0].room.id == created_room.id
+
+        retrieved_booking = await BookingService.get_by_id(created_booking.id, test_session, fields=["room_id"], expand=[])
+        assert retrieved_booking.model_dump() == {"room_id": created_room.id}
+
+        with pytest.raises(UnknownField):
+            await BookingService.get_all_booking(0, 10, test_session, fields=["color"])
+        with pytest.raises(UnknownField):
+            await BookingService.get_by_id(created_booking.id, test_session, expand=["owner"])
+
+        await BookingService.delete_all(test_session)
+
+    async def test_export_bookings(self, test_session: AsyncSession):
+        await BookingService.delete_all(test_session)
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        rooms = [await RoomDao(test_session).create(FakeDataGenerator.fake_room()) for _ in range(2)]
+        day = datetime(2031, 5, 5, 8, tzinfo=timezone.utc)
+        bookings = [
+            await BookingDao(test_session).create(
+                FakeDataGenerator.fake_booking_data(
+                    created_user.id,
+                    rooms[i % 2].id,
+                    {"start_time": day + timedelta(days=i), "end_time": day + timedelta(days=i, hours=1), "created_at": day + timedelta(days=i)},
+                )
+            )
+            for i in range(4)
+        ]
+
+        async def export(export_format=ExportFormat.NDJSON, **filters):
+            return b"".join([chunk async for chunk in BookingService.export_bookings(test_session, export_format, **filters)])
+
+        lines = (await export()).decode().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [str(_booking.id) for _booking in bookings]
+        assert "user" not in json.loads(lines[0])
+
+        rows = list(csv.DictReader((await export(ExportFormat.CSV, room_id=rooms[0].id)).decode().splitlines()))
+        assert [row["id"] for row in rows] == [str(bookings[0].id), str(bookings[2].id)]
+        assert rows[0]["status"] == "scheduled"
+
+        lines = (await export(start_time=day + timedelta(days=1), end_time=day + timedelta(days=2, hours=1))).decode().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [str(bookings[1].id), str(bookings[2].id)]
+        assert await export(status=BookingStatus.CANCELLED) == b""
+
+        with pytest.raises(InvalidPeriod):
+            BookingService.export_bookings(test_session, start_time=day, end_time=day)
+
+        await BookingService.delete_all(test_session)
+
+    async def test_get_free_slots(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        day = datetime(2031, 3, 3, 8, tzinfo=timezone.utc)
+
+        bookings = (
+            (9, 10, BookingStatus.SCHEDULED),
+            (9, 11, BookingStatus.CONFIRMED),
+            (13, 14, BookingStatus.CANCELLED),
+            (15, 17, BookingStatus.SCHEDULED),
+        )
+        for start_hour, end_hour, status in bookings:
+            await BookingDao(test_session).create(
+                FakeDataGenerator.fake_booking_data(
+                    user_id=created_user.id,
+                    room_id=created_room.id,
+                    override={
+                        "start_time": day.replace(hour=start_hour),
+                        "end_time": day.replace(hour=end_hour),
+                        "status": status,
+                    },
+                )
+            )
+
+        slots = await BookingService.get_free_slots(
+            created_room.id, day, day.replace(hour=18), test_session
+        )
+        assert [(slot.start_time.hour, slot.end_time.hour) for slot in slots] == [(8, 9), (11, 15), (17, 18)]
+
+        slots = await BookingService.get_free_slots(
+            created_room.id, day, day.replace(hour=18), test_session, min_length=timedelta(hours=2)
+        )
+        assert [(slot.start_time.hour, slot.end_time.hour) for slot in slots] == [(11, 15)]
+
+        with pytest.raises(InvalidPeriod):
+            await BookingService.get_free_slots(created_room.id, day, day, test_session)
+        with pytest.raises(RoomNotFound):
+            await BookingService.get_free_slots(uuid.uuid4(), day, day.replace(hour=18), test_session)
+
+        await BookingService.delete_all(test_session)
+
+    async def test_get_free_slots_cache_invalidation(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        day = datetime(2031, 3, 4, 8, tzinfo=timezone.utc)
+
+        slots = await BookingService.get_free_slots(created_room.id, day, day.replace(hour=18), test_session)
+        assert len(slots) == 1
+
+        hits = slot_cache.hits
+        assert await BookingService.get_free_slots(created_room.id, day, day.replace(hour=18), test_session) == slots
+        assert slot_cache.hits == hits + 1
+
+        created_booking = await BookingService.add_booking(
+            FakeDataGenerator.fake_booking_in(
+                override={"room_id": created_room.id, "start_time": day.replace(hour=12), "end_time": day.replace(hour=13)}
+            ),
+            test_session,
+            created_user.id,
+        )
+        slots = await BookingService.get_free_slots(created_room.id, day, day.replace(hour=18), test_session)
+        assert len(slots) == 2
+
+        await BookingService.update_by_id(
+            created_booking.id, BookingPatch(status=BookingStatus.CANCELLED), test_session
+        )
+        slots = await BookingService.get_free_slots(created_room.id, day, day.replace(hour=18), test_session)
+        assert len(slots) == 1
+
+        await BookingService.delete_by_id(created_booking.id, test_session)
+
+    async def test_add_bookings(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        other_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        closed_room = await RoomDao(test_session).create(
+            FakeDataGenerator.fake_room(override={"status": RoomStatus.MAINTENANCE})
+        )
+        day = datetime(2031, 4, 1, 8, tzinfo=timezone.utc)
+        await BookingDao(test_session).create(
+            FakeDataGenerator.fake_booking_data(
+                user_id=created_user.id,
+                room_id=created_room.id,
+                override={"start_time": day.replace(hour=9), "end_time": day.replace(hour=10)},
+            )
+        )
+
+        def item(room_id, start_hour, end_hour):
+            return BookingIn(
+                room_id=room_id, start_time=day.replace(hour=start_hour), end_time=day.replace(hour=end_hour)
+            )
+
+        bulk = BookingBulkIn(
+            items=[
+                item(created_room.id, 10, 11),
+                item(created_room.id, 9, 10),
+                item(created_room.id, 10, 12),
+                item(other_room.id, 10, 12),
+                item(closed_room.id, 10, 12),
+                item(uuid.uuid4(), 10, 12),
+                item(other_room.id, 14, 13),
+            ]
+        )
+        result = await BookingService.add_bookings(bulk, test_session, created_user.id)
+
+        assert result.created == 2
+        assert [item.status_code for item in result.results] == [201, 400, 400, 201, 400, 404, 400]
+        assert result.results[1].detail == RoomUnavailable(ALREADYBOOKED).detail
+        assert result.results[2].detail == RoomUnavailable(ALREADYBOOKED).detail
+        assert result.results[4].detail == RoomUnavailable(RoomStatus.MAINTENANCE.value).detail
+        assert result.results[6].detail == InvalidPeriod().detail
+        assert result.results[0].booking.room_id == created_room.id
+        assert result.results[0].booking.user_id == created_user.id
+        assert result.results[0].booking.room is not None
+        assert result.results[3].booking.room_id == other_room.id
+        assert await BookingDao(test_session).get_by_id(result.results[3].booking.id) is not None
+
+        await BookingService.delete_all(test_session)
+
+    async def test_add_bookings_atomic(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        day = datetime(2031, 4, 2, 8, tzinfo=timezone.utc)
+        items = [
+            BookingIn(room_id=created_room.id, start_time=day.replace(hour=9), end_time=day.replace(hour=11)),
+            BookingIn(room_id=created_room.id, start_time=day.replace(hour=10), end_time=day.replace(hour=12)),
+        ]
+
+        result = await BookingService.add_bookings(
+            BookingBulkIn(items=items, atomic=True), test_session, created_user.id
+        )
+        assert result.created == 0
+        assert [item.status_code for item in result.results] == [409, 400]
+        assert result.results[0].detail == BATCHREJECTED
+        assert await BookingDao(test_session).count() == 0
+
+        result = await BookingService.add_bookings(
+            BookingBulkIn(items=items[:1], atomic=True), test_session, created_user.id
+        )
+        assert result.created == 1
+        assert await BookingDao(test_session).count() == 1
+
+        await BookingService.delete_all(test_session)
+
+    async def test_get_free_slots_write_during_read_is_not_cached(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        day = datetime(2031, 3, 5, 8, tzinfo=timezone.utc)
+        get_busy_intervals = BookingDao.get_busy_intervals
+
+        async def read_then_concurrent_write(self, *args, **kwargs):
+            busy = await get_busy_intervals(self, *args, **kwargs)
+            # Another request books the room before the reader resumes
+            await BookingService.add_booking(
+                BookingIn(room_id=created_room.id, start_time=day.replace(hour=12), end_time=day.replace(hour=13)),
+                test_session,
+                created_user.id,
+            )
+            return busy
+
+        with patch.object(BookingDao, "get_busy_intervals", read_then_concurrent_write):
+            stale = await BookingService.get_free_slots(created_room.id, day, day.replace(hour=18), test_session)
+        assert len(stale) == 1
+
+        slots = await BookingService.get_free_slots(created_room.id, day, day.replace(hour=18), test_session)
+        assert len(slots) == 2
+
+        await BookingService.delete_all(test_session)
+
     async def test_get_booking_by_id(self, test_session: AsyncSession):
         user_dao = UserDao(test_session)
         room_dao = RoomDao(test_session)
@@ -168,6 +427,78 @@ class TestBookingService:
 
         await BookingDao(test_session).delete_by_id(created_booking.id)
 
+    async def test_update_by_id_checks_conflicts(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        day = datetime(2031, 6, 2, 8, tzinfo=timezone.utc)
+        bookings = [
+            await BookingService.add_booking(
+                BookingIn(room_id=created_room.id, start_time=day.replace(hour=hour), end_time=day.replace(hour=hour + 1)),
+                test_session,
+                created_user.id,
+            )
+            for hour in (9, 11)
+        ]
+
+        with pytest.raises(RoomUnavailable) as excinfo:
+            await BookingService.update_by_id(
+                bookings[1].id, BookingPatch(start_time=day.replace(hour=9, minute=30)), test_session
+            )
+        assert excinfo.value.detail == RoomUnavailable(ALREADYBOOKED).detail
+        with pytest.raises(RoomNotFound):
+            await BookingService.update_by_id(bookings[1].id, BookingPatch(room_id=uuid.uuid4()), test_session)
+
+        # Moving within its own slot and confirming don't conflict with itself
+        await BookingService.update_by_id(
+            bookings[1].id, BookingPatch(start_time=day.replace(hour=10), status=BookingStatus.CONFIRMED), test_session
+        )
+        await BookingService.update_by_id(bookings[0].id, BookingPatch(status=BookingStatus.CANCELLED), test_session)
+        await BookingService.add_booking(
+            BookingIn(room_id=created_room.id, start_time=day.replace(hour=9), end_time=day.replace(hour=10)),
+            test_session,
+            created_user.id,
+        )
+        # Reactivating the cancelled booking would double book the room
+        with pytest.raises(RoomUnavailable):
+            await BookingService.update_by_id(bookings[0].id, BookingPatch(status=BookingStatus.SCHEDULED), test_session)
+
+        await BookingService.delete_all(test_session)
+
+    async def test_reversed_period_is_rejected(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        day = datetime(2031, 6, 3, 8, tzinfo=timezone.utc)
+
+        with pytest.raises(InvalidPeriod):
+            await BookingService.add_booking(
+                BookingIn(room_id=created_room.id, start_time=day.replace(hour=10), end_time=day.replace(hour=9)),
+                test_session,
+                created_user.id,
+            )
+        with pytest.raises(InvalidPeriod):
+            await BookingService.add_booking(
+                BookingIn(room_id=created_room.id, start_time=day, end_time=day), test_session, created_user.id
+            )
+
+        created_booking = await BookingService.add_booking(
+            BookingIn(room_id=created_room.id, start_time=day.replace(hour=9), end_time=day.replace(hour=10)),
+            test_session,
+            created_user.id,
+        )
+        # Moving a single bound past the other one
+        with pytest.raises(InvalidPeriod):
+            await BookingService.update_by_id(
+                created_booking.id, BookingPatch(end_time=day.replace(hour=8)), test_session
+            )
+        with pytest.raises(InvalidPeriod):
+            await BookingService.update_by_id(
+                created_booking.id,
+                BookingPatch(start_time=day.replace(hour=11), status=BookingStatus.CANCELLED),
+                test_session,
+            )
+
+        await BookingService.delete_all(test_session)
+
     async def test_update_by_id_not_found(self, test_session: AsyncSession):
         non_existent_id = uuid.uuid4()
         from easy_booking.schemas.booking import BookingPatch
@@ -0,0 +1,181 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from easy_booking.daos.booking import BookingDao
+from easy_booking.daos.room import RoomDao
+from easy_booking.daos.user import UserDao
+from easy_booking.exceptions.booking import InvalidPeriod
+from easy_booking.exceptions.booking_series import (
+    EMPTYSERIES,
+    UNBOUNDED,
+    UNKNOWNTIMEZONE,
+    BookingSeriesNotFound,
+    InvalidRecurrence,
+)
+from easy_booking.exceptions.room import ALREADYBOOKED, RoomNotFound, RoomUnavailable
+from easy_booking.models.room import RoomStatus
+from easy_booking.schemas.booking_series import Frequency
+from easy_booking.services.booking import BookingService
+from easy_booking.services.booking_series import BookingSeriesService
+from easy_booking.settings import settings
+from tests.utils.fake_data_generator import FakeDataGenerator
+
+START = datetime(2033, 1, 3, 9, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+class TestBookingSeriesService:
+    async def test_add_series(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        series_in = FakeDataGenerator.fake_series_in(
+            override={"room_id": created_room.id, "start_time": START, "end_time": START + timedelta(hours=1), "count": 4}
+        )
+
+        created_series = await BookingSeriesService.add_series(series_in, test_session, created_user.id)
+        assert created_series.user_id == created_user.id
+        assert created_series.ends_at.replace(tzinfo=timezone.utc) == START + timedelta(weeks=3, hours=1)
+
+        # Booking on top of an occurrence is refused, next to it accepted
+        with pytest.raises(RoomUnavailable):
+            await BookingService.add_booking(
+                FakeDataGenerator.fake_booking_in(
+                    override={"room_id": created_room.id, "start_time": START + timedelta(weeks=2), "end_time": START + timedelta(weeks=2, hours=2)}
+                ),
+                test_session,
+                created_user.id,
+            )
+        created_booking = await BookingService.add_booking(
+            FakeDataGenerator.fake_booking_in(
+                override={"room_id": created_room.id, "start_time": START + timedelta(days=1), "end_time": START + timedelta(days=1, hours=2)}
+            ),
+            test_session,
+            created_user.id,
+        )
+
+        # A daily series meets both the weekly occurrences and the booking
+        with pytest.raises(RoomUnavailable) as excinfo:
+            await BookingSeriesService.add_series(
+                series_in.model_copy(update={"frequency": Frequency.DAILY, "start_time": START + timedelta(hours=1, minutes=30), "end_time": START + timedelta(hours=2)}),
+                test_session,
+                created_user.id,
+            )
+        assert excinfo.value.detail == RoomUnavailable(ALREADYBOOKED).detail
+
+        await BookingDao(test_session).delete_by_id(created_booking.id)
+        await BookingSeriesService.delete_by_id(created_series.id, test_session)
+        with pytest.raises(BookingSeriesNotFound):
+            await BookingSeriesService.get_by_id(created_series.id, test_session)
+
+    async def test_add_series_validation(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        closed_room = await RoomDao(test_session).create(
+            FakeDataGenerator.fake_room(override={"status": RoomStatus.MAINTENANCE})
+        )
+        series_in = FakeDataGenerator.fake_series_in(override={"room_id": created_room.id, "start_time": START, "end_time": START + timedelta(hours=1)})
+
+        with pytest.raises(InvalidPeriod):
+            await BookingSeriesService.add_series(series_in.model_copy(update={"end_time": START}), test_session, created_user.id)
+        with pytest.raises(InvalidRecurrence) as excinfo:
+            await BookingSeriesService.add_series(series_in.model_copy(update={"count": None}), test_session, created_user.id)
+        assert excinfo.value.detail == UNBOUNDED
+        with pytest.raises(InvalidRecurrence) as excinfo:
+            await BookingSeriesService.add_series(
+                series_in.model_copy(update={"count": None, "until": START - timedelta(days=1)}), test_session, created_user.id
+            )
+        assert excinfo.value.detail == EMPTYSERIES
+        with pytest.raises(InvalidRecurrence):
+            await BookingSeriesService.add_series(
+                series_in.model_copy(update={"count": settings.booking_series_max_occurrences + 1}), test_session, created_user.id
+            )
+        with pytest.raises(InvalidRecurrence) as excinfo:
+            await BookingSeriesService.add_series(series_in.model_copy(update={"time_zone": "Mars/Olympus"}), test_session, created_user.id)
+        assert excinfo.value.detail == UNKNOWNTIMEZONE
+        with pytest.raises(RoomNotFound):
+            await BookingSeriesService.add_series(series_in.model_copy(update={"room_id": uuid.uuid4()}), test_session, created_user.id)
+        with pytest.raises(RoomUnavailable):
+            await BookingSeriesService.add_series(series_in.model_copy(update={"room_id": closed_room.id}), test_session, created_user.id)
+
+    async def test_add_series_follows_local_time(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        paris = ZoneInfo("Europe/Paris")
+        first = datetime(2030, 3, 18, 9, tzinfo=paris)
+        created_series = await BookingSeriesService.add_series(
+            FakeDataGenerator.fake_series_in(
+                override={
+                    "room_id": created_room.id,
+                    "start_time": first,
+                    "end_time": first + timedelta(hours=1),
+                    "time_zone": "Europe/Paris",
+                    "count": 4,
+                }
+            ),
+            test_session,
+            created_user.id,
+        )
+
+        # After the DST change the standup is at 07:00 UTC, the 08:00 UTC slot is free
+        with pytest.raises(RoomUnavailable):
+            await BookingService.add_booking(
+                FakeDataGenerator.fake_booking_in(
+                    override={"room_id": created_room.id, "start_time": datetime(2030, 4, 1, 7, tzinfo=timezone.utc), "end_time": datetime(2030, 4, 1, 7, 30, tzinfo=timezone.utc)}
+                ),
+                test_session,
+                created_user.id,
+            )
+        created_booking = await BookingService.add_booking(
+            FakeDataGenerator.fake_booking_in(
+                override={"room_id": created_room.id, "start_time": datetime(2030, 4, 1, 8, tzinfo=timezone.utc), "end_time": datetime(2030, 4, 1, 9, tzinfo=timezone.utc)}
+            ),
+            test_session,
+            created_user.id,
+        )
+
+        await BookingDao(test_session).delete_by_id(created_booking.id)
+        await BookingSeriesService.delete_by_id(created_series.id, test_session)
+
+    async def test_get_occurrences(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        created_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room())
+        created_series = await BookingSeriesService.add_series(
+            FakeDataGenerator.fake_series_in(
+                override={"room_id": created_room.id, "start_time": START, "end_time": START + timedelta(hours=1), "count": 52}
+            ),
+            test_session,
+            created_user.id,
+        )
+        created_booking = await BookingService.add_booking(
+            FakeDataGenerator.fake_booking_in(
+                override={"room_id": created_room.id, "start_time": START + timedelta(weeks=10, days=1), "end_time": START + timedelta(weeks=10, days=1, hours=1)}
+            ),
+            test_session,
+            created_user.id,
+        )
+
+        found = await BookingService.get_occurrences(
+            START + timedelta(weeks=10), START + timedelta(weeks=12), test_session, room_id=created_room.id
+        )
+        assert [occurrence.start_time for occurrence in found] == [
+            START + timedelta(weeks=10),
+            START + timedelta(weeks=10, days=1),
+            START + timedelta(weeks=11),
+        ]
+        assert [occurrence.series_id for occurrence in found] == [created_series.id, None, created_series.id]
+        assert found[1].booking_id == created_booking.id
+
+        found = await BookingService.get_occurrences(
+            START, START + timedelta(weeks=52), test_session, room_id=created_room.id, limit=3
+        )
+        assert len(found) == 3
+
+        with pytest.raises(InvalidPeriod):
+            await BookingService.get_occurrences(START, START, test_session)
+
+        await BookingDao(test_session).delete_by_id(created_booking.id)
+        await BookingSeriesService.delete_by_id(created_series.id, test_session)
@@ -1,12 +1,19 @@
 import uuid
+from datetime import datetime, timedelta, timezone
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from easy_booking.daos.booking import BookingDao
 from easy_booking.daos.room import RoomDao
+from easy_booking.daos.user import UserDao
+from easy_booking.exceptions.booking import InvalidPeriod
 from easy_booking.exceptions.room import RoomNotFound
-from easy_booking.schemas.page import Page
+from easy_booking.models.booking import BookingStatus
+from easy_booking.models.room import RoomStatus
+from easy_booking.schemas.page import ExportFormat, Page, TotalMode
 from easy_booking.services.room import RoomService
+from easy_booking.utils import decode_lines
 from tests.utils.fake_data_generator import FakeDataGenerator
 
 
@@ -51,6 +58,89 @@ class TestRoomService:
 
         await RoomService.delete_all(test_session)
 
+    async def test_get_all_room_with_cursor(self, test_session: AsyncSession):
+        await RoomService.delete_all(test_session)
+
+        for _ in range(5):
+            await RoomService.add_room(FakeDataGenerator.fake_room_in(), test_session)
+
+        first_page = await RoomService.get_all_room(0, 2, test_session)
+        second_page = await RoomService.get_all_room(0, 2, test_session, cursor=first_page.next_cursor)
+        last_page = await RoomService.get_all_room(0, 2, test_session, cursor=second_page.next_cursor)
+
+        assert last_page.next_cursor is None
+        walked = [room.id for page in (first_page, second_page, last_page) for room in page.items]
+        offset_page = await RoomService.get_all_room(0, 5, test_session)
+        assert walked == [room.id for room in offset_page.items]
+        assert [room.name for room in offset_page.items] == sorted(room.name for room in offset_page.items)
+
+        await RoomService.delete_all(test_session)
+
+    async def test_get_all_room_total_modes(self, test_session: AsyncSession):
+        await RoomService.delete_all(test_session)
+
+        for _ in range(3):
+            await RoomService.add_room(FakeDataGenerator.fake_room_in(), test_session)
+
+        window_page = await RoomService.get_all_room(0, 2, test_session, total=TotalMode.WINDOW)
+        assert window_page.total == 3
+        assert len(window_page.items) == 2
+
+        # Past the last row the window has nothing to count
+        empty_page = await RoomService.get_all_room(10, 2, test_session, total=TotalMode.WINDOW)
+        assert empty_page.total == 3
+        assert empty_page.items == []
+
+        # No planner statistics on SQLite, the exact count is used
+        estimated_page = await RoomService.get_all_room(0, 2, test_session, total=TotalMode.ESTIMATED)
+        assert estimated_page.total == 3
+
+        no_total_page = await RoomService.get_all_room(0, 2, test_session, total=TotalMode.NONE)
+        assert no_total_page.total is None
+        assert len(no_total_page.items) == 2
+
+        await RoomService.delete_all(test_session)
+
+    async def test_get_available_rooms(self, test_session: AsyncSession):
+        await BookingDao(test_session).delete_all()
+        await RoomService.delete_all(test_session)
+
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        free_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room({"capacity": 10}))
+        booked_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room({"capacity": 10}))
+        cancelled_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room({"capacity": 10}))
+        small_room = await RoomDao(test_session).create(FakeDataGenerator.fake_room({"capacity": 2}))
+        await RoomDao(test_session).create(FakeDataGenerator.fake_room({"capacity": 10, "status": RoomStatus.MAINTENANCE}))
+
+        start_time = datetime.now(timezone.utc) + timedelta(days=1)
+        end_time = start_time + timedelta(hours=2)
+        for _room, status in ((booked_room, BookingStatus.SCHEDULED), (cancelled_room, BookingStatus.CANCELLED)):
+            await BookingDao(test_session).create(
+                FakeDataGenerator.fake_booking_data(
+                    user_id=created_user.id,
+                    room_id=_room.id,
+                    override={
+                        "start_time": start_time + timedelta(hours=1),
+                        "end_time": end_time + timedelta(hours=1),
+                        "status": status,
+                    },
+                )
+            )
+
+        page_result = await RoomService.get_available_rooms(start_time, end_time, test_session, min_capacity=5)
+
+        assert page_result.total == 2
+        assert {_room.id for _room in page_result.items} == {free_room.id, cancelled_room.id}
+
+        page_result = await RoomService.get_available_rooms(start_time, end_time, test_session)
+        assert small_room.id in {_room.id for _room in page_result.items}
+
+        with pytest.raises(InvalidPeriod):
+            await RoomService.get_available_rooms(end_time, start_time, test_session)
+
+        await BookingDao(test_session).delete_all()
+        await RoomService.delete_all(test_session)
+
     async def test_get_room_by_id(self, test_session: AsyncSession):
         fake_room_data = FakeDataGenerator.fake_room_in()
         created_room = await RoomService.add_room(fake_room_data, test_session)
@@ -70,6 +160,71 @@ class TestRoomService:
         with pytest.raises(RoomNotFound):
             await RoomService.get_by_id(non_existent_id, test_session)
 
+    async def test_import_rooms(self, test_session: AsyncSession):
+        await RoomService.delete_all(test_session)
+        lines = [
+            "name,address,capacity,description,status\n",
+            "Room A,1 Main St,10,,\n",
+            "Room B,2 Main St,many,,\n",
+            'Room C,"3 Main St\n',
+            'Floor 2",20,Corner,maintenance\n',
+            "Room D,4 Main St,30,,closed\n",
+            "Room E,5 Main St,40,,unavailable\n",
+        ]
+
+        report = await RoomService.import_rooms(test_session, lines, ExportFormat.CSV, chunk_size=2)
+
+        rooms = (await RoomService.get_all_room(offset=0, limit=10, session=test_session)).items
+        assert report.imported == 3
+        assert [(error.line, len(error.errors)) for error in report.errors] == [(3, 1), (6, 1)]
+        assert report.errors[0].errors[0].startswith("capacity: ")
+        assert [(room.name, room.status) for room in rooms] == [
+            ("Room A", RoomStatus.AVAILABLE),
+            ("Room C", RoomStatus.MAINTENANCE),
+            ("Room E", RoomStatus.UNAVAILABLE),
+        ]
+        assert rooms[1].address == "3 Main St\nFloor 2"
+        assert rooms[0].description is None
+
+        await RoomService.delete_all(test_session)
+
+    async def test_import_rooms_ndjson(self, test_session: AsyncSession):
+        await RoomService.delete_all(test_session)
+        lines = [
+            '{"name": "Room A", "address": "1 Main St", "capacity": 10}\n',
+            "\n",
+            '{"name": "Room B", "address": \n',
+            '{"name": "Room C"}\n',
+        ]
+
+        report = await RoomService.import_rooms(test_session, lines, ExportFormat.NDJSON)
+
+        assert report.imported == 1
+        assert [error.line for error in report.errors] == [3, 4]
+        assert report.errors[0].errors[0].startswith("Invalid JSON")
+        assert sorted(report.errors[1].errors) == ["address: Field required", "capacity: Field required"]
+        assert await RoomDao(test_session).count() == 1
+
+        await RoomService.delete_all(test_session)
+
+    async def test_import_rooms_decoded_lines(self, test_session: AsyncSession):
+        await RoomService.delete_all(test_session)
+        raw_lines = [
+            '\ufeff{"name": "Room A", "address": "1 Main St", "capacity": 10}\n'.encode(),
+            '{"name": "Salle \u00e9t\u00e9", "address": "2 Main St", "capacity": 20}\n'.encode("latin-1"),
+            '{"name": "Room C", "address": "3 Main St", "capacity": 30}\n'.encode(),
+        ]
+
+        report = await RoomService.import_rooms(test_session, decode_lines(raw_lines), ExportFormat.NDJSON)
+
+        # The byte order mark is dropped, the import stops at the undecodable line
+        assert report.imported == 1
+        assert [error.line for error in report.errors] == [2]
+        assert report.errors[0].errors[0].startswith("Invalid utf-8 text, the rest of the file is skipped")
+        assert await RoomDao(test_session).count() == 1
+
+        await RoomService.delete_all(test_session)
+
     async def test_update_by_id(self, test_session: AsyncSession):
         fake_room_data = FakeDataGenerator.fake_room_in()
         created_room = await RoomService.add_room(fake_room_data, test_session)
@@ -1,11 +1,15 @@
 import uuid
+from unittest.mock import patch
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from easy_booking.cache import user_cache
 from easy_booking.daos.user import UserDao
 from easy_booking.exceptions.user import UserNotFound
+from easy_booking.models.user import User
 from easy_booking.schemas.page import Page
+from easy_booking.schemas.user import UserCreate
 from easy_booking.services.user import UserService
 from tests.utils.fake_data_generator import FakeDataGenerator
 
@@ -158,4 +162,34 @@ class TestUserService:
         for user in created_users:
             assert user.id in user_ids
 
-        await UserService.delete_all(test_session)
\ No newline at end of file
+        await UserService.delete_all(test_session)
+
+    async def test_get_is_cached_until_update(self, test_session: AsyncSession):
+        created_user = await UserDao(test_session).create(FakeDataGenerator.fake_user())
+        user_cache.clear()
+        service = UserService(UserDao(test_session).user_db)
+
+        hits = user_cache.hits
+
+        with patch.object(service.user_db, "get", wraps=service.user_db.get) as get:
+            first = await service.get(created_user.id)
+            second = await service.get(created_user.id)
+
+            assert get.await_count == 1
+            assert isinstance(second, User)
+            assert second.id == first.id
+            assert second.email == created_user.email
+            assert second in test_session
+            assert user_cache.hits == hits + 1
+
+            user_patch = UserCreate(
+                first_name="Cached", last_name=created_user.last_name, email=created_user.email, password="password123"
+            )
+            await UserService.update_by_id(created_user.id, user_patch, test_session)
+            updated = await service.get(created_user.id)
+
+            assert get.await_count == 2
+            assert updated.first_name == "Cached"
+
+        await UserService.delete_by_id(created_user.id, test_session)
+        assert created_user.id not in user_cache
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+
+from easy_booking.api.v1.booking import booking_events
+from easy_booking.daos.room import RoomDao
+from easy_booking.daos.user import UserDao
+from easy_booking.events import ALL, ChangeAction, ChangeBatch, ChangeEvent, PostgresBus
+from easy_booking.schemas.booking import BookingPatch, BookingStatus
+from easy_booking.services.booking import BookingService
+from easy_booking.streams import DROPPED, KEEPALIVE, RESYNC, BookingBroadcaster, booking_broadcaster
+from easy_booking.utils import as_utc
+from tests.utils.fake_data_generator import FakeDataGenerator
+
+
+def booking_change(action=ChangeAction.CREATED, room_id=None, user_id=None, status=BookingStatus.SCHEDULED):
+    room_id = room_id or uuid.uuid4()
+    start_time = datetime.now(timezone.utc) + timedelta(days=1)
+    return ChangeEvent(
+        table="bookings",
+        id=uuid.uuid4(),
+        room_id=room_id,
+        action=action,
+        data={
+            "room_id": room_id,
+            "user_id": user_id or uuid.uuid4(),
+            "start_time": start_time,
+            "end_time": start_time + timedelta(hours=1),
+            "status": status,
+        },
+    )
+
+
+def parse(message: str) -> tuple[str, dict]:
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+@pytest_asyncio.fixture
+async def session(test_session_factory, test_db):
+    async with test_session_factory() as session:
+        yield session
+
+
+@pytest.mark.asyncio
+class TestBookingBroadcaster:
+    async def test_deltas_fan_out_to_every_stream(self):
+        broadcaster = BookingBroadcaster(queue_size=10, keepalive=5)
+        streams = [broadcaster.stream(), broadcaster.stream()]
+        assert [await anext(stream) for stream in streams] == [KEEPALIVE, KEEPALIVE]
+        change = booking_change()
+
+        broadcaster.publish(change)
+
+        for stream in streams:
+            event, delta = parse(await anext(stream))
+            assert event == "created"
+            assert delta["id"] == str(change.id)
+            assert delta["room_id"] == str(change.room_id)
+            await stream.aclose()
+        assert broadcaster.subscriptions == set()
+
+    async def test_cancelled_bookings_are_named(self):
+        change = booking_change(ChangeAction.UPDATED, status=BookingStatus.CANCELLED)
+
+        assert parse(BookingBroadcaster.format(change))[0] == "cancelled"
+        assert parse(BookingBroadcaster.format(booking_change(ChangeAction.DELETED)))[0] == "deleted"
+
+    async def test_streams_filter_on_room_and_user(self):
+        broadcaster = BookingBroadcaster(queue_size=10, keepalive=5)
+        room_id, user_id = uuid.uuid4(), uuid.uuid4()
+        room_stream = broadcaster.stream(room_id=room_id)
+        user_stream = broadcaster.stream(user_id=user_id)
+        await anext(room_stream)
+        await anext(user_stream)
+        room_change, user_change = booking_change(room_id=room_id), booking_change(user_id=user_id)
+
+        for change in (booking_change(), room_change, user_change):
+            broadcaster.publish(change)
+
+        assert parse(await anext(room_stream))[1]["id"] == str(room_change.id)
+        assert parse(await anext(user_stream))[1]["id"] == str(user_change.id)
+        assert [subscription.queue.qsize() for subscription in broadcaster.subscriptions] == [0, 0]
+
+    async def test_bulk_changes_ask_for_resync(self):
+        broadcaster = BookingBroadcaster(queue_size=10, keepalive=5)
+        stream = broadcaster.stream(room_id=uuid.uuid4())
+        await anext(stream)
+
+        broadcaster.publish(ChangeEvent(table="bookings"))
+        broadcaster.publish(ChangeEvent(table=ALL))
+        broadcaster.publish(ChangeEvent(table="rooms", id=uuid.uuid4()))
+
+        assert [await anext(stream), await anext(stream)] == [RESYNC, RESYNC]
+
+    async def test_slow_consumer_is_dropped(self):
+        broadcaster = BookingBroadcaster(queue_size=2, keepalive=5)
+        slow, fast = broadcaster.stream(), broadcaster.stream()
+        await anext(slow)
+        await anext(fast)
+
+        for _ in range(2):
+            broadcaster.publish(booking_change())
+            await anext(fast)
+        broadcaster.publish(booking_change())
+
+        assert broadcaster.dropped == 1
+        assert len(broadcaster.subscriptions) == 1
+        # The queued deltas are dropped, the stream ends with a resync
+        assert await anext(slow) == DROPPED
+        with pytest.raises(StopAsyncIteration):
+            await anext(slow)
+        assert parse(await anext(fast))[0] == "created"
+
+    async def test_idle_stream_sends_keepalive(self):
+        broadcaster = BookingBroadcaster(queue_size=10, keepalive=0.01)
+        stream = broadcaster.stream()
+
+        assert [await anext(stream), await anext(stream)] == [KEEPALIVE, KEEPALIVE]
+
+    async def test_notified_change_streams_the_same_delta(self):
+        change = booking_change(ChangeAction.UPDATED)
+        batch = ChangeBatch(origin="other", events=[change])
+
+        notified = ChangeBatch.model_validate_json(PostgresBus.payloads(batch)[0]).events[0]
+
+        assert parse(BookingBroadcaster.format(notified)) == parse(BookingBroadcaster.format(change))
+
+
+@pytest.mark.asyncio
+class TestBookingStreams:
+    async def test_booking_writes_reach_the_room_stream(self, session):
+        _user = await UserDao(session).create(FakeDataGenerator.fake_user())
+        _room = await RoomDao(session).create(FakeDataGenerator.fake_room())
+        stream = BookingService.stream_changes(room_id=_room.id)
+        await anext(stream)
+        try:
+            _booking = await BookingService.add_booking(
+                FakeDataGenerator.fake_booking_in(override={"room_id": _room.id}), session, _user.id
+            )
+            await BookingService.update_by_id(_booking.id, BookingPatch(status=BookingStatus.CANCELLED), session)
+            await BookingService.delete_by_id(_booking.id, session)
+
+            events = [parse(await asyncio.wait_for(anext(stream), 1)) for _ in range(3)]
+        finally:
+            await stream.aclose()
+
+        assert [event for event, _ in events] == ["created", "cancelled", "deleted"]
+        assert {delta["id"] for _, delta in events} == {str(_booking.id)}
+        assert "user_id" not in events[0][1]
+
+    async def test_user_stream_carries_own_bookings(self, session):
+        _user = await UserDao(session).create(FakeDataGenerator.fake_user())
+        other = await UserDao(session).create(FakeDataGenerator.fake_user())
+        _room = await RoomDao(session).create(FakeDataGenerator.fake_room())
+        response = await booking_events(user=_user)
+        assert response.media_type == "text/event-stream"
+        messages = response.body_iterator
+        await anext(messages)
+        try:
+            start_time = datetime.now(timezone.utc) + timedelta(days=30)
+            for i, user_id in enumerate((other.id, _user.id)):
+                await BookingService.add_booking(
+                    FakeDataGenerator.fake_booking_in(
+                        override={
+                            "room_id": _room.id,
+                            "start_time": start_time + timedelta(hours=i),
+                            "end_time": start_time + timedelta(hours=i + 1),
+                        }
+                    ),
+                    session,
+                    user_id,
+                )
+
+            event, delta = parse(await asyncio.wait_for(anext(messages), 1))
+        finally:
+            await messages.aclose()
+
+        assert event == "created"
+        # The booking of the other user isn't streamed
+        assert as_utc(datetime.fromisoformat(delta["start_time"])) == start_time + timedelta(hours=1)
+        assert len(booking_broadcaster.subscriptions) == 0
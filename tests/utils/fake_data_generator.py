@@ -5,6 +5,7 @@ from datetime import datetime, timedelta, timezone
 from faker import Faker
 
 from easy_booking.schemas.booking import BookingIn, BookingOut
+from easy_booking.schemas.booking_series import BookingSeriesIn, Frequency
 from easy_booking.schemas.room import RoomIn, RoomOut
 from easy_booking.schemas.user import UserCreate
 
@@ -16,7 +17,7 @@ class FakeDataGenerator:
     def fake_user(override: UserCreate | dict | None = None) -> dict:
         data = {
             "id": uuid.uuid4(),
-            "email": fake.email(),
+            "email": fake.unique.email(),
             "first_name": fake.first_name(),
             "last_name": fake.last_name(),
             "hashed_password": "hashed_" + fake.password(),
@@ -36,7 +37,7 @@ class FakeDataGenerator:
     @staticmethod
     def fake_user_create(override: dict | None = None) -> UserCreate:
         data = {
-            "email": fake.email(),
+            "email": fake.unique.email(),
             "hashed_password": "hashed_" + fake.password(),
             "first_name": fake.first_name(),
             "last_name": fake.last_name(),
@@ -157,4 +158,18 @@ class FakeDataGenerator:
         }
         if override:
             data.update(override)
-        return BookingIn(**data)
\ No newline at end of file
+        return BookingIn(**data)
+
+    @staticmethod
+    def fake_series_in(override: dict | None = None) -> BookingSeriesIn:
+        start_time = datetime.now(timezone.utc).replace(microsecond=0)
+        data = {
+            "room_id": uuid.uuid4(),
+            "start_time": start_time,
+            "end_time": start_time + timedelta(hours=1),
+            "frequency": Frequency.WEEKLY,
+            "count": random.randint(2, 52),
+        }
+        if override:
+            data.update(override)
+        return BookingSeriesIn(**data)
@@ -0,0 +1,31 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from easy_booking.metrics import normalize_statement
+
+
+@contextmanager
+def assert_max_queries(engine: AsyncEngine, limit: int) -> Iterator[list[str]]:
+    """
+    Fail if more than `limit` statements run on `engine` inside the block.
+
+    The statements are collected in the yielded list and listed in the
+    failure message, e.g.
+
+        with assert_max_queries(test_engine, 2):
+            await test_client.get("/booking/")
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(normalize_statement(statement))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    assert len(statements) <= limit, f"{len(statements)} queries, expected at most {limit}:\n" + "\n".join(statements)